@@ -1,7 +1,15 @@
 """authentik API AppConfig"""
 
+from prometheus_client import Counter
+
 from authentik.blueprints.apps import ManagedAppConfig
 
+COUNTER_API_AUTH_CACHE = Counter(
+    "authentik_api_auth_cache",
+    "Lookups of authenticated API credentials in the cache",
+    ["result"],
+)
+
 
 class AuthentikAPIConfig(ManagedAppConfig):
     """authentik API Config"""
@@ -1,8 +1,11 @@
 """API Authentication"""
 
+from datetime import datetime
+from hashlib import sha256
 from hmac import compare_digest
 from pathlib import Path
 from tempfile import gettempdir
+from time import time
 from typing import Any
 
 from django.conf import settings
@@ -13,8 +16,11 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
 from structlog.stdlib import get_logger
 
+from authentik.api.apps import COUNTER_API_AUTH_CACHE
 from authentik.core.middleware import CTX_AUTH_VIA
 from authentik.core.models import Token, TokenIntents, User, UserTypes
+from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.outposts.models import Outpost
 from authentik.providers.oauth2.constants import SCOPE_AUTHENTIK_API
 
@@ -26,6 +32,56 @@ try:
 except OSError:
     ipc_key = None
 
+# Primary keys of users authenticated by a credential, keyed by the hash of the credential.
+# Entries are invalidated per user, see `authentik.api.signals`
+AUTH_CACHE = CacheNamespace(
+    "goauthentik.io/api/authentication/", CONFIG.get_int("cache.timeout_api_auth"), local=True
+)
+
+
+def auth_cache_scope(user_pk: int) -> str:
+    """Cache scope of all credentials of a user"""
+    return f"user_{user_pk}"
+
+
+def _auth_cache_get(auth_credentials: str) -> User | None:
+    """Get the user authenticated by `auth_credentials` from the cache. Only the user's
+    primary key is cached, the user itself is always loaded from the database."""
+    key = AUTH_CACHE.key(sha256(auth_credentials.encode()).hexdigest())
+    entry = AUTH_CACHE.get(key)
+    if not entry:
+        COUNTER_API_AUTH_CACHE.labels(result="miss").inc()
+        return None
+    user_pk, auth_via, expires, generation = entry
+    scope = auth_cache_scope(user_pk)
+    if (expires and expires <= time()) or AUTH_CACHE.generations(scope)[scope] != generation:
+        COUNTER_API_AUTH_CACHE.labels(result="stale").inc()
+        return None
+    user = User.objects.filter(pk=user_pk).first()
+    if not user:
+        COUNTER_API_AUTH_CACHE.labels(result="stale").inc()
+        return None
+    COUNTER_API_AUTH_CACHE.labels(result="hit").inc()
+    CTX_AUTH_VIA.set(auth_via)
+    return user
+
+
+def _auth_cache_set(auth_credentials: str, user: User, expires: datetime | None):
+    """Cache the primary key of the user authenticated by `auth_credentials`, at most until
+    the credential expires"""
+    timeout = AUTH_CACHE.timeout
+    expires_ts = expires.timestamp() if expires else None
+    if expires_ts:
+        timeout = min(timeout, int(expires_ts - time()))
+        if timeout <= 0:
+            return
+    scope = auth_cache_scope(user.pk)
+    AUTH_CACHE.set(
+        AUTH_CACHE.key(sha256(auth_credentials.encode()).hexdigest()),
+        (user.pk, CTX_AUTH_VIA.get(), expires_ts, AUTH_CACHE.generations(scope)[scope]),
+        timeout,
+    )
+
 
 def validate_auth(header: bytes) -> str | None:
     """Validate that the header is in a correct format,
@@ -54,33 +110,39 @@ def bearer_auth(raw_header: bytes) -> User | None:
 
 def auth_user_lookup(raw_header: bytes) -> User | None:
     """raw_header in the Format of `Bearer ....`"""
-    from authentik.providers.oauth2.models import AccessToken
+    from authentik.providers.oauth2.models import AccessToken, hash_token
 
     auth_credentials = validate_auth(raw_header)
     if not auth_credentials:
         return None
+    if user := _auth_cache_get(auth_credentials):
+        return user
     # first, check traditional tokens
     key_token = Token.filter_not_expired(
         key=auth_credentials, intent=TokenIntents.INTENT_API
     ).first()
     if key_token:
         CTX_AUTH_VIA.set("api_token")
+        _auth_cache_set(
+            auth_credentials, key_token.user, key_token.expires if key_token.expiring else None
+        )
         return key_token.user
     # then try to auth via JWT
-    jwt_token = AccessToken.filter_not_expired(
-        token=auth_credentials, _scope__icontains=SCOPE_AUTHENTIK_API
-    ).first()
+    jwt_token = AccessToken.filter_not_expired(token_digest=hash_token(auth_credentials)).first()
     if jwt_token:
-        # Double-check scopes, since they are saved in a single string
-        # we want to check the parsed version too
+        # Scopes are saved in a single string, hence they're checked on the parsed version
         if SCOPE_AUTHENTIK_API not in jwt_token.scope:
             raise AuthenticationFailed("Token invalid/expired")
         CTX_AUTH_VIA.set("jwt")
+        _auth_cache_set(
+            auth_credentials, jwt_token.user, jwt_token.expires if jwt_token.expiring else None
+        )
         return jwt_token.user
     # then try to auth via secret key (for embedded outpost/etc)
     user = token_secret_key(auth_credentials)
     if user:
         CTX_AUTH_VIA.set("secret_key")
+        _auth_cache_set(auth_credentials, user, None)
         return user
     # then try to auth via secret key (for embedded outpost/etc)
     user = token_ipc(auth_credentials)
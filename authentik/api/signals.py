@@ -0,0 +1,39 @@
+"""authentik API signals"""
+
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentik.api.authentication import AUTH_CACHE, auth_cache_scope
+from authentik.core.models import Token, User
+from authentik.outposts.apps import MANAGED_OUTPOST
+from authentik.outposts.models import Outpost
+from authentik.providers.oauth2.models import AccessToken
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_auth_cache_invalidate(sender: type[Model], instance: User, **_):
+    """Invalidate all cached credentials of a user when the user changes,
+    for example when they're deactivated"""
+    AUTH_CACHE.invalidate(auth_cache_scope(instance.pk))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=AccessToken)
+@receiver(post_delete, sender=AccessToken)
+def token_auth_cache_invalidate(sender: type[Model], instance: Token | AccessToken, **_):
+    """Invalidate all cached credentials of a token's user when the token is changed,
+    expired or deleted"""
+    AUTH_CACHE.invalidate(auth_cache_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Outpost)
+@receiver(post_delete, sender=Outpost)
+def outpost_auth_cache_invalidate(sender: type[Model], instance: Outpost, **_):
+    """Invalidate all cached credentials when the managed outpost changes, as its
+    service account is authenticated via the secret key"""
+    if instance.managed != MANAGED_OUTPOST:
+        return
+    AUTH_CACHE.invalidate()
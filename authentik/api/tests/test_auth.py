@@ -43,6 +43,27 @@ class TestAPIAuth(TestCase):
         token = Token.objects.create(intent=TokenIntents.INTENT_API, user=create_test_admin_user())
         self.assertEqual(bearer_auth(f"Bearer {token.key}".encode()), token.user)
 
+    def test_bearer_cached(self):
+        """Test that valid tokens are cached and invalidated when the user changes"""
+        user = create_test_admin_user()
+        token = Token.objects.create(intent=TokenIntents.INTENT_API, user=user)
+        self.assertEqual(bearer_auth(f"Bearer {token.key}".encode()), user)
+        # Only the user is loaded, the token is not looked up again
+        with self.assertNumQueries(1):
+            self.assertEqual(bearer_auth(f"Bearer {token.key}".encode()), user)
+        user.is_active = False
+        user.save()
+        with self.assertRaises(AuthenticationFailed):
+            bearer_auth(f"Bearer {token.key}".encode())
+
+    def test_bearer_cached_deleted(self):
+        """Test that cached tokens are invalidated when the token is deleted"""
+        token = Token.objects.create(intent=TokenIntents.INTENT_API, user=create_test_admin_user())
+        self.assertEqual(bearer_auth(f"Bearer {token.key}".encode()), token.user)
+        token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            bearer_auth(f"Bearer {token.key}".encode())
+
     def test_bearer_valid_deactivated(self):
         """Test valid token"""
         user = create_test_admin_user()
@@ -33,6 +33,7 @@ from authentik.blueprints.v1.common import (
 from authentik.blueprints.v1.meta.registry import BaseMetaModel, registry
 from authentik.core.models import (
     AuthenticatedSession,
+    GroupAncestor,
     GroupSourceConnection,
     PropertyMapping,
     Provider,
@@ -64,6 +65,7 @@ from authentik.lib.models import SerializerModel
 from authentik.lib.sentry import SentryIgnoredException
 from authentik.lib.utils.reflection import get_apps
 from authentik.outposts.models import OutpostServiceConnection
+from authentik.policies.geoip.models import GeoIPLoginHistory
 from authentik.policies.models import Policy, PolicyBindingModel
 from authentik.policies.reputation.models import Reputation
 from authentik.providers.oauth2.models import (
@@ -113,6 +115,7 @@ def excluded_models() -> list[type[Model]]:
         AuthenticatedSession,
         # Classes which are only internally managed
         # FIXME: these shouldn't need to be explicitly listed, but rather based off of a mixin
+        GroupAncestor,
         FlowToken,
         LicenseUsage,
         SCIMProviderGroup,
@@ -124,6 +127,7 @@ def excluded_models() -> list[type[Model]]:
         AccessToken,
         RefreshToken,
         Reputation,
+        GeoIPLoginHistory,
         WebAuthnDeviceType,
         SCIMSourceUser,
         SCIMSourceGroup,
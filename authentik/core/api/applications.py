@@ -3,7 +3,6 @@
 from collections.abc import Iterator
 from copy import copy
 
-from django.core.cache import cache
 from django.db.models import QuerySet
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
@@ -25,6 +24,7 @@ from authentik.core.api.used_by import UsedByMixin
 from authentik.core.api.utils import ModelSerializer
 from authentik.core.models import Application, User
 from authentik.events.logs import LogEventSerializer, capture_logs
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.lib.utils.file import (
     FilePathSerializer,
     FileUploadSerializer,
@@ -40,12 +40,15 @@ from authentik.rbac.filters import ObjectFilter
 LOGGER = get_logger()
 
 
+APP_ACCESS_CACHE = CacheNamespace(f"{CACHE_PREFIX}app_access/", 86400)
+
+
 def user_app_cache_key(user_pk: str, page_number: int | None = None) -> str:
     """Cache key where application list for user is saved"""
-    key = f"{CACHE_PREFIX}app_access/{user_pk}"
+    parts = [user_pk]
     if page_number:
-        key += f"/{page_number}"
-    return key
+        parts.append(page_number)
+    return APP_ACCESS_CACHE.key(*parts)
 
 
 class ApplicationSerializer(ModelSerializer):
@@ -259,17 +262,12 @@ class ApplicationViewSet(UsedByMixin, ModelViewSet):
         if not should_cache:
             allowed_applications = self._get_allowed_applications(paginated_apps)
         if should_cache:
-            allowed_applications = cache.get(
-                user_app_cache_key(self.request.user.pk, paginator.page.number)
-            )
+            key = user_app_cache_key(self.request.user.pk, paginator.page.number)
+            allowed_applications = APP_ACCESS_CACHE.get(key)
             if not allowed_applications:
                 LOGGER.debug("Caching allowed application list", page=paginator.page.number)
                 allowed_applications = self._get_allowed_applications(paginated_apps)
-                cache.set(
-                    user_app_cache_key(self.request.user.pk, paginator.page.number),
-                    allowed_applications,
-                    timeout=86400,
-                )
+                APP_ACCESS_CACHE.set(key, allowed_applications)
 
         if only_with_launch_url == "true":
             allowed_applications = self._filter_applications_with_launch_url(allowed_applications)
@@ -1,5 +1,6 @@
 """Property Mapping Evaluator"""
 
+from collections.abc import Iterable
 from types import CodeType
 from typing import Any
 
@@ -18,6 +19,11 @@ PROPERTY_MAPPING_TIME = Histogram(
     "Evaluation time of property mappings",
     ["mapping_name"],
 )
+PROPERTY_MAPPING_BATCH_TIME = Histogram(
+    "authentik_property_mapping_batch_execution_time",
+    "Total evaluation time of property mappings for a batch of objects",
+    ["mapping_name"],
+)
 
 
 class PropertyMappingEvaluator(BaseEvaluator):
@@ -33,6 +39,7 @@ class PropertyMappingEvaluator(BaseEvaluator):
         user: User | None = None,
         request: HttpRequest | None = None,
         dry_run: bool | None = False,
+        context_keys: Iterable[str] | None = None,
         **kwargs,
     ):
         self.model = model
@@ -42,15 +49,22 @@ class PropertyMappingEvaluator(BaseEvaluator):
             _filename = str(model)
         super().__init__(filename=_filename)
         self.dry_run = dry_run
+        # Names of all variables that will be set for evaluations, as they're part of the
+        # compiled expression, even if they're not set yet (for example `user`)
+        for key in context_keys or []:
+            self._context.setdefault(key, None)
         self.set_context(user, request, **kwargs)
 
     def set_context(
         self,
         user: User | None = None,
         request: HttpRequest | None = None,
+        empty_user: User | None = None,
         **kwargs,
     ):
-        req = PolicyRequest(user=User())
+        """Set context for the next evaluation. `empty_user` is used for the policy request
+        when no user is given, so that it can be re-used by multiple mappings"""
+        req = PolicyRequest(user=empty_user or User())
         req.obj = self.model
         if user:
             req.user = user
@@ -82,7 +96,9 @@ class PropertyMappingEvaluator(BaseEvaluator):
                 event.set_user(req.user)
         event.save()
 
-    def evaluate(self, *args, **kwargs) -> Any:
+    def evaluate(self, *args, record_time: bool = True, **kwargs) -> Any:
+        if not record_time:
+            return super().evaluate(*args, **kwargs)
         with PROPERTY_MAPPING_TIME.labels(mapping_name=self._filename).time():
             return super().evaluate(*args, **kwargs)
 
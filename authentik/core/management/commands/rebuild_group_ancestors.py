@@ -0,0 +1,18 @@
+"""Rebuild materialized group ancestors"""
+
+from django.core.management.base import BaseCommand, no_translations
+
+from authentik.core.models import GroupAncestor
+from authentik.tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    """Rebuild materialized group ancestors"""
+
+    @no_translations
+    def handle(self, *args, **options):
+        """Rebuild group ancestors for all tenants"""
+        for tenant in Tenant.objects.filter(ready=True):
+            with tenant:
+                self.stdout.write(f"Rebuilding group ancestors for tenant {tenant.schema_name}\n")
+                GroupAncestor.rebuild()
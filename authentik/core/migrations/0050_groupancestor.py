@@ -0,0 +1,72 @@
+# Generated by Django 5.1.11 on 2025-07-10 09:12
+
+import django.db.models.deletion
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+GROUP_RECURSION_LIMIT = 20
+
+
+def populate_group_ancestors(apps: Apps, schema_editor: BaseDatabaseSchemaEditor):
+    db_alias = schema_editor.connection.alias
+    Group = apps.get_model("authentik_core", "Group")
+    GroupAncestor = apps.get_model("authentik_core", "GroupAncestor")
+
+    parents = dict(Group.objects.using(db_alias).values_list("pk", "parent"))
+    rows = []
+    for group in parents.keys():
+        current, depth, seen = group, 0, set()
+        while current and current not in seen and depth < GROUP_RECURSION_LIMIT:
+            rows.append(GroupAncestor(group_id=group, ancestor_id=current, depth=depth))
+            seen.add(current)
+            current = parents.get(current)
+            depth += 1
+    GroupAncestor.objects.using(db_alias).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_core", "0049_alter_token_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupAncestor",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="authentik_core.group",
+                    ),
+                ),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_set",
+                        to="authentik_core.group",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Group ancestor",
+                "verbose_name_plural": "Group ancestors",
+                "indexes": [
+                    models.Index(fields=["ancestor"], name="authentik_c_group_ancestor_idx")
+                ],
+                "unique_together": {("group", "ancestor")},
+            },
+        ),
+        migrations.RunPython(populate_group_ancestors, migrations.RunPython.noop),
+    ]
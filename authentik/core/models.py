@@ -14,6 +14,7 @@ from django.contrib.sessions.base_session import AbstractBaseSession
 from django.db import models
 from django.db.models import Q, QuerySet, options
 from django.db.models.constants import LOOKUP_SEP
+from django.db.transaction import atomic
 from django.http import HttpRequest
 from django.utils.functional import SimpleLazyObject, cached_property
 from django.utils.timezone import now
@@ -114,6 +115,11 @@ class AttributesMixin(models.Model):
 
     def update_attributes(self, properties: dict[str, Any]):
         """Update fields and attributes, but correctly by merging dicts"""
+        self.merge_attributes(properties)
+        self.save()
+
+    def merge_attributes(self, properties: dict[str, Any]):
+        """Set fields and merge attributes from `properties` without saving"""
         for key, value in properties.items():
             if key == "attributes":
                 continue
@@ -122,7 +128,6 @@ class AttributesMixin(models.Model):
         MERGE_LIST_UNIQUE.merge(final_attributes, self.attributes)
         MERGE_LIST_UNIQUE.merge(final_attributes, properties.get("attributes", {}))
         self.attributes = final_attributes
-        self.save()
 
     @classmethod
     def update_or_create_attributes(
@@ -238,6 +243,80 @@ class Group(SerializerModel, AttributesMixin):
         return qs.with_children_recursive()
 
 
+class GroupAncestor(models.Model):
+    """Materialized group hierarchy, with one row for every group and each of its ancestors,
+    including the group itself at a depth of 0. Used to resolve a user's groups without
+    a recursive query."""
+
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="ancestor_set")
+    ancestor = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="+")
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (("group", "ancestor"),)
+        indexes = [models.Index(fields=["ancestor"], name="authentik_c_group_ancestor_idx")]
+        verbose_name = _("Group ancestor")
+        verbose_name_plural = _("Group ancestors")
+
+    def __str__(self):
+        return f"Group ancestor {self.ancestor_id} of {self.group_id}"
+
+    @classmethod
+    def update_group(cls, group: Group):
+        """Update ancestors of `group` and all of its descendants, after `group` has been
+        created or its parent has changed"""
+        current = set(
+            cls.objects.filter(group=group, depth__lte=1).values_list("ancestor", "depth")
+        )
+        expected = {(group.pk, 0)}
+        if group.parent_id:
+            expected.add((group.parent_id, 1))
+        if current == expected:
+            return
+        with atomic():
+            descendants = cls.detach_group(group)
+            ancestors = []
+            if group.parent_id:
+                ancestors = cls.objects.filter(group_id=group.parent_id).values_list(
+                    "ancestor", "depth"
+                )
+            rows = [cls(group=group, ancestor=group, depth=0)]
+            for descendant, descendant_depth in descendants.items():
+                for ancestor, ancestor_depth in ancestors:
+                    depth = descendant_depth + ancestor_depth + 1
+                    if depth >= GROUP_RECURSION_LIMIT:
+                        continue
+                    rows.append(cls(group_id=descendant, ancestor_id=ancestor, depth=depth))
+            cls.objects.bulk_create(rows, ignore_conflicts=True)
+
+    @classmethod
+    def detach_group(cls, group: Group) -> dict[Any, int]:
+        """Remove all ancestors above `group` from `group` and its descendants, returns
+        the descendants with their depth relative to `group`"""
+        descendants = dict(cls.objects.filter(ancestor=group).values_list("group", "depth"))
+        descendants[group.pk] = 0
+        cls.objects.filter(group__in=descendants.keys()).exclude(
+            ancestor__in=descendants.keys()
+        ).delete()
+        return descendants
+
+    @classmethod
+    def rebuild(cls):
+        """Rebuild ancestors of all groups"""
+        parents = dict(Group.objects.values_list("pk", "parent"))
+        rows = []
+        for group in parents.keys():
+            current, depth, seen = group, 0, set()
+            while current and current not in seen and depth < GROUP_RECURSION_LIMIT:
+                rows.append(cls(group_id=group, ancestor_id=current, depth=depth))
+                seen.add(current)
+                current = parents.get(current)
+                depth += 1
+        with atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+
+
 class UserQuerySet(models.QuerySet):
     """User queryset"""
 
@@ -305,7 +384,11 @@ class User(SerializerModel, GuardianUserMixin, AttributesMixin, AbstractUser):
 
     def all_groups(self) -> QuerySet[Group]:
         """Recursively get all groups this user is a member of."""
-        return self.ak_groups.all().with_children_recursive()
+        return Group.objects.filter(
+            group_uuid__in=GroupAncestor.objects.filter(group__in=self.ak_groups.all()).values(
+                "ancestor"
+            )
+        )
 
     def group_attributes(self, request: HttpRequest | None = None) -> dict[str, Any]:
         """Get a dictionary containing the attributes from all groups the user belongs to,
@@ -887,6 +970,11 @@ class ExpiringModel(models.Model):
     expires = models.DateTimeField(default=None, null=True)
     expiring = models.BooleanField(default=True)
 
+    # Expired objects are deleted in bulk without sending signals, unless this is set. Must be
+    # set by models which override `expire_action` or rely on signals when they're deleted,
+    # so that `expire_action` is called for every expired object.
+    expire_per_object = False
+
     class Meta:
         abstract = True
         indexes = [
@@ -897,8 +985,9 @@ class ExpiringModel(models.Model):
 
     def expire_action(self, *args, **kwargs):
         """Handler which is called when this object is expired. By
-        default the object is deleted. This is less efficient compared
-        to bulk deleting objects, but classes like Token() need to change
+        default the object is deleted. This is only called when
+        `expire_per_object` is set, as expired objects are deleted
+        in bulk otherwise, but classes like Token() need to change
         values instead of being deleted."""
         return self.delete(*args, **kwargs)
 
@@ -946,6 +1035,9 @@ class Token(SerializerModel, ManagedModel, ExpiringModel):
     user = models.ForeignKey("User", on_delete=models.CASCADE, related_name="+")
     description = models.TextField(default="", blank=True)
 
+    # Tokens are rotated instead of being deleted
+    expire_per_object = True
+
     class Meta:
         verbose_name = _("Token")
         verbose_name_plural = _("Tokens")
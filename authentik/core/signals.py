@@ -1,10 +1,9 @@
 """authentik core signals"""
 
 from django.contrib.auth.signals import user_logged_in
-from django.core.cache import cache
 from django.core.signals import Signal
 from django.db.models import Model
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.http.request import HttpRequest
 from structlog.stdlib import get_logger
@@ -14,6 +13,8 @@ from authentik.core.models import (
     AuthenticatedSession,
     BackchannelProvider,
     ExpiringModel,
+    Group,
+    GroupAncestor,
     Session,
     User,
     default_token_duration,
@@ -30,14 +31,26 @@ LOGGER = get_logger()
 @receiver(post_save, sender=Application)
 def post_save_application(sender: type[Model], instance, created: bool, **_):
     """Clear user's application cache upon application creation"""
-    from authentik.core.api.applications import user_app_cache_key
+    from authentik.core.api.applications import APP_ACCESS_CACHE
 
     if not created:  # pragma: no cover
         return
 
     # Also delete user application cache
-    keys = cache.keys(user_app_cache_key("*"))
-    cache.delete_many(keys)
+    APP_ACCESS_CACHE.invalidate()
+
+
+@receiver(post_save, sender=Group)
+def post_save_group(sender: type[Model], instance: Group, **_):
+    """Update the materialized ancestors of a group and its descendants"""
+    GroupAncestor.update_group(instance)
+
+
+@receiver(pre_delete, sender=Group)
+def pre_delete_group(sender: type[Model], instance: Group, **_):
+    """Detach descendants of a deleted group from its ancestors, as their parent
+    is set to null without sending any signals"""
+    GroupAncestor.detach_group(instance)
 
 
 @receiver(user_logged_in)
@@ -1,3 +1,4 @@
+from collections.abc import Generator, Iterable, Iterator
 from typing import Any
 
 from django.http import HttpRequest
@@ -6,6 +7,7 @@ from structlog.stdlib import get_logger
 from authentik.core.expression.exceptions import PropertyMappingExpressionException
 from authentik.core.models import Group, PropertyMapping, Source, User
 from authentik.events.models import Event, EventAction
+from authentik.lib.expression.exceptions import ControlFlowException
 from authentik.lib.merge import MERGE_LIST_UNIQUE
 from authentik.lib.sync.mapper import PropertyMappingManager
 from authentik.policies.utils import delete_none_values
@@ -70,24 +72,55 @@ class SourceMapper:
             properties=properties,
             **kwargs,
         )
+        return self._merge_evaluations(properties, evaluations)
+
+    def build_objects_properties(
+        self,
+        object_type: type[User | Group],
+        manager: "PropertyMappingManager",
+        contexts: Iterable[dict[str, Any]],
+        user: User | None = None,
+        request: HttpRequest | None = None,
+    ) -> Generator[tuple[dict[str, Any], dict[str, Any] | None, ControlFlowException | None]]:
+        """Build properties for many users or groups at once, see `build_object_properties`.
+        Yields each context with its properties, or with the ControlFlowException that was
+        raised by a mapping (for example SkipObject)."""
+
+        def batch_contexts():
+            for context in contexts:
+                properties = self.get_base_properties(object_type, **context)
+                if "attributes" not in properties:
+                    properties["attributes"] = {}
+                yield {**context, "source": self.source, "properties": properties}
+
+        evaluations = manager.iter_eval_batch(
+            batch_contexts(), user=user, request=request, return_mapping=True
+        )
+        try:
+            for batch_context, values, exc in evaluations:
+                context = {
+                    k: v for k, v in batch_context.items() if k not in ["source", "properties"]
+                }
+                if exc:
+                    yield context, None, exc
+                    continue
+                properties = self._merge_evaluations(batch_context["properties"], iter(values))
+                yield context, properties, None
+        except PropertyMappingExpressionException as exc:
+            self._mapping_failed(exc)
+            raise exc
+
+    def _merge_evaluations(
+        self, properties: dict[str, Any], evaluations: Iterator[tuple[Any, PropertyMapping]]
+    ) -> dict[str, Any | dict[str, Any]]:
+        """Merge the results of all mappings into `properties`"""
         while True:
             try:
                 value, mapping = next(evaluations)
             except StopIteration:
                 break
             except PropertyMappingExpressionException as exc:
-                Event.new(
-                    EventAction.CONFIGURATION_ERROR,
-                    message=f"Failed to evaluate property mapping: '{exc.mapping.name}'",
-                    source=self,
-                    mapping=exc.mapping,
-                ).save()
-                LOGGER.warning(
-                    "Mapping failed to evaluate",
-                    exc=exc,
-                    source=self,
-                    mapping=exc.mapping,
-                )
+                self._mapping_failed(exc)
                 raise exc
 
             if not value or not isinstance(value, dict):
@@ -101,3 +134,18 @@ class SourceMapper:
             MERGE_LIST_UNIQUE.merge(properties, value)
 
         return delete_none_values(properties)
+
+    def _mapping_failed(self, exc: PropertyMappingExpressionException):
+        """Report a mapping which failed to evaluate"""
+        Event.new(
+            EventAction.CONFIGURATION_ERROR,
+            message=f"Failed to evaluate property mapping: '{exc.mapping.name}'",
+            source=self,
+            mapping=exc.mapping,
+        ).save()
+        LOGGER.warning(
+            "Mapping failed to evaluate",
+            exc=exc,
+            source=self,
+            mapping=exc.mapping,
+        )
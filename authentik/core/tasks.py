@@ -2,6 +2,8 @@
 
 from datetime import datetime, timedelta
 
+from django.db import connections, router
+from django.db.transaction import atomic
 from django.utils.timezone import now
 from structlog.stdlib import get_logger
 
@@ -15,6 +17,72 @@ from authentik.events.system_tasks import SystemTask, TaskStatus, prefill_task
 from authentik.root.celery import CELERY_APP
 
 LOGGER = get_logger()
+# Number of expired objects which are expired at once, each batch in its own transaction
+EXPIRE_BATCH_SIZE = 1000
+
+
+def _delete_raw(model: type[ExpiringModel]) -> bool:
+    """Check if objects of `model` can be deleted without the ORM, which is the case when
+    no other objects reference them, and hence need to be deleted or updated with them"""
+    opts = model._meta
+    if opts.many_to_many or opts.private_fields:
+        return False
+    return not any(
+        field.auto_created and not field.concrete for field in opts.get_fields(include_hidden=True)
+    )
+
+
+def _expire_batch(model: type[ExpiringModel], pks: list) -> int:
+    """Expire the objects of a single batch, returns the number of expired objects"""
+    # Objects might have been renewed since the batch was selected
+    objects = (
+        model.objects.filter(pk__in=pks)
+        .exclude(expiring=False)
+        .exclude(expiring=True, expires__gt=now())
+    )
+    if model.expire_per_object:
+        amount = 0
+        for obj in objects.order_by("pk"):
+            obj.expire_action()
+            amount += 1
+        return amount
+    # Objects referenced by other objects are deleted through the ORM, which deletes
+    # or updates the referencing objects for the whole batch
+    if not _delete_raw(model):
+        _, deleted = objects.delete()
+        return deleted.get(model._meta.label, 0)
+    using = router.db_for_write(model)
+    sql, params = objects.values("pk").query.sql_with_params()
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({sql})", params)  # nosec
+        return cursor.rowcount
+
+
+def expire_model(model: type[ExpiringModel], batch_size: int = EXPIRE_BATCH_SIZE) -> int:
+    """Expire all expired objects of `model` in batches, paginated by primary key.
+    Returns the number of expired objects"""
+    expired = (
+        model.objects.all()
+        .exclude(expiring=False)
+        .exclude(expiring=True, expires__gt=now())
+        .order_by("pk")
+    )
+    amount = 0
+    last_pk = None
+    while True:
+        batch = expired
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+        with atomic(using=router.db_for_write(model)):
+            amount += _expire_batch(model, pks)
+    return amount
 
 
 @CELERY_APP.task(bind=True, base=SystemTask)
@@ -24,12 +92,7 @@ def clean_expired_models(self: SystemTask):
     messages = []
     for cls in ExpiringModel.__subclasses__():
         cls: ExpiringModel
-        objects = (
-            cls.objects.all().exclude(expiring=False).exclude(expiring=True, expires__gt=now())
-        )
-        amount = objects.count()
-        for obj in objects:
-            obj.expire_action()
+        amount = expire_model(cls)
         LOGGER.debug("Expired models", model=cls, amount=amount)
         messages.append(f"Expired {amount} {cls._meta.verbose_name_plural}")
     self.set_status(TaskStatus.SUCCESSFUL, *messages)
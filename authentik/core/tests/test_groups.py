@@ -2,7 +2,7 @@
 
 from django.test.testcases import TestCase
 
-from authentik.core.models import Group, User
+from authentik.core.models import Group, GroupAncestor, User
 from authentik.lib.generators import generate_id
 
 
@@ -57,3 +57,42 @@ class TestGroups(TestCase):
         group.save()
         self.assertTrue(group.is_member(user))
         self.assertTrue(group2.is_member(user))
+
+    def test_group_ancestors_move(self):
+        """Test ancestors are updated when a group is moved"""
+        user = User.objects.create(username=generate_id())
+        root = Group.objects.create(name=generate_id())
+        other_root = Group.objects.create(name=generate_id())
+        parent = Group.objects.create(name=generate_id(), parent=root)
+        child = Group.objects.create(name=generate_id(), parent=parent)
+        child.users.add(user)
+        self.assertEqual(set(user.all_groups()), {child, parent, root})
+        parent.parent = other_root
+        parent.save()
+        self.assertEqual(set(user.all_groups()), {child, parent, other_root})
+        self.assertEqual(
+            GroupAncestor.objects.get(group=child, ancestor=other_root).depth,
+            2,
+        )
+
+    def test_group_ancestors_delete(self):
+        """Test ancestors are removed when a group in the middle is deleted"""
+        user = User.objects.create(username=generate_id())
+        root = Group.objects.create(name=generate_id())
+        parent = Group.objects.create(name=generate_id(), parent=root)
+        child = Group.objects.create(name=generate_id(), parent=parent)
+        child.users.add(user)
+        parent.delete()
+        self.assertEqual(set(user.all_groups()), {child})
+
+    def test_group_ancestors_rebuild(self):
+        """Test rebuilding ancestors"""
+        root = Group.objects.create(name=generate_id())
+        parent = Group.objects.create(name=generate_id(), parent=root)
+        child = Group.objects.create(name=generate_id(), parent=parent)
+        before = set(GroupAncestor.objects.values_list("group", "ancestor", "depth"))
+        GroupAncestor.objects.filter(group=child).delete()
+        GroupAncestor.rebuild()
+        self.assertEqual(
+            set(GroupAncestor.objects.values_list("group", "ancestor", "depth")), before
+        )
@@ -2,6 +2,7 @@
 
 from django.test import TestCase
 
+from authentik.core.expression.exceptions import SkipObjectException
 from authentik.core.models import Group, PropertyMapping, Source, User
 from authentik.core.sources.mapper import SourceMapper
 from authentik.lib.generators import generate_id
@@ -70,3 +71,53 @@ class TestSourcePropertyMappings(TestCase):
                 "attributes": {},
             },
         )
+
+    def test_build_objects_properties(self):
+        """Test building properties for many objects at once"""
+        source = ProxySource.objects.create(name=generate_id(), slug=generate_id(), enabled=True)
+        mapper = SourceMapper(source)
+
+        source.user_property_mappings.add(
+            PropertyMapping.objects.create(
+                name=generate_id(),
+                expression="""
+                    if data.get("skip"):
+                        raise SkipObject
+                    return {"username": data.get("username", None), "email": None}
+                """,
+            )
+        )
+
+        manager = mapper.get_manager(User, ["username", "data"])
+        results = list(
+            mapper.build_objects_properties(
+                object_type=User,
+                manager=manager,
+                contexts=[
+                    {"username": "test1", "data": {"username": "test2"}},
+                    {"username": "test3", "data": {"skip": True}},
+                    {"username": "test4", "data": {"username": "test5"}},
+                ],
+            )
+        )
+
+        self.assertEqual(len(results), 3)
+        context, properties, exc = results[0]
+        self.assertEqual(context, {"username": "test1", "data": {"username": "test2"}})
+        self.assertIsNone(exc)
+        self.assertEqual(
+            properties,
+            {
+                "username": "test2",
+                "path": f"goauthentik.io/sources/{source.slug}",
+                "attributes": {},
+            },
+        )
+        context, properties, exc = results[1]
+        self.assertEqual(context["username"], "test3")
+        self.assertIsNone(properties)
+        self.assertIsInstance(exc, SkipObjectException)
+        # Skipping an object does not affect the following objects
+        context, properties, exc = results[2]
+        self.assertIsNone(exc)
+        self.assertEqual(properties["username"], "test5")
@@ -1,5 +1,6 @@
 """Test tasks"""
 
+from datetime import timedelta
 from time import mktime
 
 from django.utils.timezone import now
@@ -9,6 +10,7 @@ from rest_framework.test import APITestCase
 from authentik.core.models import (
     USER_ATTRIBUTE_EXPIRES,
     USER_ATTRIBUTE_GENERATED,
+    ExpiringModel,
     Token,
     TokenIntents,
     User,
@@ -16,9 +18,11 @@ from authentik.core.models import (
 from authentik.core.tasks import (
     clean_expired_models,
     clean_temporary_users,
+    expire_model,
 )
 from authentik.core.tests.utils import create_test_admin_user
 from authentik.lib.generators import generate_id
+from authentik.policies.reputation.models import Reputation
 
 
 class TestTasks(APITestCase):
@@ -40,6 +44,51 @@ class TestTasks(APITestCase):
         token.refresh_from_db()
         self.assertNotEqual(key, token.key)
 
+    def test_expire_batched(self):
+        """Test expiring objects in batches"""
+        expired = [
+            Token.objects.create(
+                expires=now() - timedelta(hours=1),
+                user=self.user,
+                intent=TokenIntents.INTENT_VERIFICATION,
+            )
+            for _ in range(5)
+        ]
+        valid = Token.objects.create(
+            expires=now() + timedelta(hours=1),
+            user=self.user,
+            intent=TokenIntents.INTENT_VERIFICATION,
+        )
+        not_expiring = Token.objects.create(
+            expires=now() - timedelta(hours=1),
+            expiring=False,
+            user=self.user,
+            intent=TokenIntents.INTENT_VERIFICATION,
+        )
+        self.assertEqual(expire_model(Token, batch_size=2), 5)
+        self.assertFalse(Token.objects.filter(pk__in=[x.pk for x in expired]).exists())
+        self.assertTrue(Token.objects.filter(pk=valid.pk).exists())
+        self.assertTrue(Token.objects.filter(pk=not_expiring.pk).exists())
+
+    def test_expire_raw(self):
+        """Test expiring objects which are deleted without the ORM"""
+        expired = Reputation.objects.create(
+            identifier=generate_id(), ip="127.0.0.1", expires=now() - timedelta(hours=1)
+        )
+        valid = Reputation.objects.create(
+            identifier=generate_id(), ip="127.0.0.1", expires=now() + timedelta(hours=1)
+        )
+        self.assertEqual(expire_model(Reputation, batch_size=1), 1)
+        self.assertFalse(Reputation.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(Reputation.objects.filter(pk=valid.pk).exists())
+
+    def test_expire_action_declared(self):
+        """Test that all models with a custom expire_action are expired per object"""
+        for model in ExpiringModel.__subclasses__():
+            if model.expire_action is ExpiringModel.expire_action:
+                continue
+            self.assertTrue(model.expire_per_object, model)
+
     def test_clean_temporary_users(self):
         """Test clean_temporary_users task"""
         username = generate_id
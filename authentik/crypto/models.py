@@ -1,9 +1,13 @@
 """authentik crypto models"""
 
 from binascii import hexlify
-from hashlib import md5
+from collections.abc import Callable
+from hashlib import md5, sha256
+from threading import Lock
+from typing import Any, TypeVar
 from uuid import uuid4
 
+from cachetools import LRUCache
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes, PublicKeyTypes
@@ -11,13 +15,38 @@ from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from cryptography.x509 import Certificate, load_pem_x509_certificate
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from prometheus_client import Counter
 from rest_framework.serializers import Serializer
 from structlog.stdlib import get_logger
 
 from authentik.blueprints.models import ManagedModel
+from authentik.lib.config import CONFIG
 from authentik.lib.models import CreatedUpdatedModel, SerializerModel
 
 LOGGER = get_logger()
+T = TypeVar("T")
+COUNTER_KEY_MATERIAL_CACHE = Counter(
+    "authentik_crypto_key_material_cache",
+    "Lookups of parsed keys and certificates in the process-wide cache",
+    ["result"],
+)
+# Parsed keys and certificates are shared by all instances of a keypair within a process.
+# Entries are keyed by a hash of the PEM data, so a changed keypair never hits an outdated
+# entry, even before it's removed by `clear_key_material`.
+_KEY_MATERIAL: LRUCache[tuple[str, str, str], Any] = LRUCache(
+    maxsize=max(CONFIG.get_int("crypto.key_cache_size", 256), 1)
+)
+_KEY_MATERIAL_LOCK = Lock()
+
+
+def clear_key_material(kp_uuid: str | None = None):
+    """Remove cached key material of a keypair, or of all keypairs"""
+    with _KEY_MATERIAL_LOCK:
+        if kp_uuid is None:
+            _KEY_MATERIAL.clear()
+            return
+        for key in [key for key in _KEY_MATERIAL.keys() if key[0] == str(kp_uuid)]:
+            _KEY_MATERIAL.pop(key, None)
 
 
 class CertificateKeyPair(SerializerModel, ManagedModel, CreatedUpdatedModel):
@@ -46,12 +75,33 @@ class CertificateKeyPair(SerializerModel, ManagedModel, CreatedUpdatedModel):
 
         return CertificateKeyPairSerializer
 
+    def cached_material(self, kind: str, factory: Callable[[], T]) -> T:
+        """Get key material derived from this keypair (for example a parsed key) from the
+        process-wide cache, calling `factory` to create it if it's not cached yet.
+        Results of `factory` must not be modified, and `None` is not cached."""
+        data_hash = sha256(f"{self.certificate_data}\0{self.key_data}".encode()).hexdigest()
+        cache_key = (str(self.kp_uuid), kind, data_hash)
+        with _KEY_MATERIAL_LOCK:
+            value = _KEY_MATERIAL.get(cache_key)
+        if value is not None:
+            COUNTER_KEY_MATERIAL_CACHE.labels(result="hit").inc()
+            return value
+        COUNTER_KEY_MATERIAL_CACHE.labels(result="miss").inc()
+        value = factory()
+        if value is not None:
+            with _KEY_MATERIAL_LOCK:
+                _KEY_MATERIAL[cache_key] = value
+        return value
+
     @property
     def certificate(self) -> Certificate:
         """Get python cryptography Certificate instance"""
         if not self._cert:
-            self._cert = load_pem_x509_certificate(
-                self.certificate_data.encode("utf-8"), default_backend()
+            self._cert = self.cached_material(
+                "certificate",
+                lambda: load_pem_x509_certificate(
+                    self.certificate_data.encode("utf-8"), default_backend()
+                ),
             )
         return self._cert
 
@@ -68,17 +118,20 @@ class CertificateKeyPair(SerializerModel, ManagedModel, CreatedUpdatedModel):
     ) -> PrivateKeyTypes | None:
         """Get python cryptography PrivateKey instance"""
         if not self._private_key and self.key_data != "":
-            try:
-                self._private_key = load_pem_private_key(
-                    str.encode("\n".join([x.strip() for x in self.key_data.split("\n")])),
-                    password=None,
-                    backend=default_backend(),
-                )
-            except ValueError as exc:
-                LOGGER.warning(exc)
-                return None
+            self._private_key = self.cached_material("private_key", self._load_private_key)
         return self._private_key
 
+    def _load_private_key(self) -> PrivateKeyTypes | None:
+        try:
+            return load_pem_private_key(
+                str.encode("\n".join([x.strip() for x in self.key_data.split("\n")])),
+                password=None,
+                backend=default_backend(),
+            )
+        except ValueError as exc:
+            LOGGER.warning(exc)
+            return None
+
     @property
     def fingerprint_sha256(self) -> str:
         """Get SHA256 Fingerprint of certificate_data"""
@@ -0,0 +1,13 @@
+"""authentik crypto signals"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentik.crypto.models import CertificateKeyPair, clear_key_material
+
+
+@receiver(post_save, sender=CertificateKeyPair)
+@receiver(post_delete, sender=CertificateKeyPair)
+def certificate_key_pair_clear_cache(sender, instance: CertificateKeyPair, **_):
+    """Remove cached key material of changed keypairs"""
+    clear_key_material(instance.pk)
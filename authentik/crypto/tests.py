@@ -4,6 +4,7 @@ from json import loads
 from os import makedirs
 from tempfile import TemporaryDirectory
 
+from cryptography.hazmat.primitives import hashes
 from cryptography.x509.extensions import SubjectAlternativeName
 from cryptography.x509.general_name import DNSName
 from django.urls import reverse
@@ -348,3 +349,23 @@ class TestCrypto(APITestCase):
         self.assertTrue(
             CertificateKeyPair.objects.filter(managed=MANAGED_DISCOVERED % "foo.bar").exists()
         )
+
+    def test_key_material_cache(self):
+        """Test that parsed keys are shared between instances, until the keypair changes"""
+        keypair = create_test_cert()
+        first = CertificateKeyPair.objects.get(pk=keypair.pk)
+        second = CertificateKeyPair.objects.get(pk=keypair.pk)
+        self.assertIs(first.private_key, second.private_key)
+        self.assertIs(first.certificate, second.certificate)
+
+        other = create_test_cert()
+        keypair.key_data = other.key_data
+        keypair.certificate_data = other.certificate_data
+        keypair.save()
+        updated = CertificateKeyPair.objects.get(pk=keypair.pk)
+        self.assertIsNot(updated.private_key, first.private_key)
+        self.assertEqual(updated.kid, other.kid)
+        self.assertEqual(
+            updated.certificate.fingerprint(hashes.SHA256()),
+            other.certificate.fingerprint(hashes.SHA256()),
+        )
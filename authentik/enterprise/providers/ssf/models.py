@@ -163,6 +163,8 @@ class StreamEvent(CreatedUpdatedModel, ExpiringModel):
     type = models.TextField(choices=EventTypes.choices)
     payload = models.JSONField(default=dict)
 
+    expire_per_object = True
+
     def expire_action(self, *args, **kwargs):
         """Only allow automatic cleanup of successfully sent event"""
         if self.status != SSFEventStatus.SENT:
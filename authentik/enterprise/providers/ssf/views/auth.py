@@ -8,7 +8,7 @@ from rest_framework.request import Request
 
 from authentik.core.models import Token, TokenIntents, User
 from authentik.enterprise.providers.ssf.models import SSFProvider
-from authentik.providers.oauth2.models import AccessToken
+from authentik.providers.oauth2.models import AccessToken, hash_token
 
 if TYPE_CHECKING:
     from authentik.enterprise.providers.ssf.views.base import SSFView
@@ -39,7 +39,7 @@ class SSFTokenAuth(BaseAuthentication):
         """Check JWT-based authentication, this supports tokens issued either by providers
         configured directly in the provider, and by providers assigned to the application
         that the SSF provider is a backchannel provider of."""
-        token = AccessToken.filter_not_expired(token=jwt, revoked=False).first()
+        token = AccessToken.filter_not_expired(token_digest=hash_token(jwt), revoked=False).first()
         if not token:
             return None
         ssf_provider = SSFProvider.objects.filter(
@@ -55,10 +55,13 @@ class ASNContextProcessor(MMDBContextProcessor):
             if not self.configured():
                 return None
             self.check_expired()
-            try:
-                return self.reader.asn(ip_address)
-            except (GeoIP2Error, ValueError):
-                return None
+            return self.cached_lookup(ip_address, self._asn)
+
+    def _asn(self, ip_address: str) -> ASN | None:
+        try:
+            return self.reader.asn(ip_address)
+        except (GeoIP2Error, ValueError):
+            return None
 
     def asn_to_dict(self, asn: ASN | None) -> ASNDict:
         """Convert ASN to dict"""
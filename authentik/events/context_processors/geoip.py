@@ -56,10 +56,13 @@ class GeoIPContextProcessor(MMDBContextProcessor):
             if not self.configured():
                 return None
             self.check_expired()
-            try:
-                return self.reader.city(ip_address)
-            except (GeoIP2Error, ValueError):
-                return None
+            return self.cached_lookup(ip_address, self._city)
+
+    def _city(self, ip_address: str) -> City | None:
+        try:
+            return self.reader.city(ip_address)
+        except (GeoIP2Error, ValueError):
+            return None
 
     def city_to_dict(self, city: City | None) -> GeoIPDict:
         """Convert City to dict"""
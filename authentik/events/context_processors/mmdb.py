@@ -1,19 +1,43 @@
 """Common logic for reading MMDB files"""
 
+from collections.abc import Callable
 from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import TypeVar
 
-from geoip2.database import Reader
+from cachetools import LRUCache
+from geoip2.database import MODE_MMAP, MODE_MMAP_EXT, Reader
+from prometheus_client import Counter
 from structlog.stdlib import get_logger
 
 from authentik.events.context_processors.base import EventContextProcessor
+from authentik.lib.config import CONFIG
+
+COUNTER_MMDB_LOOKUP_CACHE = Counter(
+    "authentik_events_mmdb_lookup_cache",
+    "Lookups of IP addresses in the per-process cache of MMDB results",
+    ["database", "result"],
+)
+T = TypeVar("T")
+_MISSING = object()
 
 
 class MMDBContextProcessor(EventContextProcessor):
-    """Common logic for reading MaxMind DB files, including re-loading if the file has changed"""
+    """Common logic for reading MaxMind DB files, including re-loading if the file has changed.
+
+    Results are cached per IP address, as the same address is looked up several times
+    for a single request (event, reputation, policies). The cache is cleared when the
+    database is re-loaded."""
 
     def __init__(self):
         self.reader: Reader | None = None
         self._last_mtime: float = 0.0
+        self._last_check: float = 0.0
+        self._lookups: LRUCache[str, object] = LRUCache(
+            maxsize=max(CONFIG.get_int("events.context_processors.cache_size", 4096), 1)
+        )
+        self._lookups_lock = Lock()
         self.logger = get_logger()
         self.load()
 
@@ -21,24 +45,40 @@ class MMDBContextProcessor(EventContextProcessor):
         """Get the path to the MMDB file to load"""
         raise NotImplementedError
 
+    def open(self, path: str) -> Reader:
+        """Open the database memory-mapped, using the C extension if it's available"""
+        try:
+            return Reader(path, mode=MODE_MMAP_EXT)
+        except ValueError:
+            # The C extension is not available
+            return Reader(path, mode=MODE_MMAP)
+
     def load(self):
         """Get GeoIP Reader, if configured, otherwise none"""
         path = self.path()
         if path == "" or not path:
             return
         try:
-            self.reader = Reader(path)
+            self.reader = self.open(path)
             self._last_mtime = Path(path).stat().st_mtime
+            self._last_check = monotonic()
+            with self._lookups_lock:
+                self._lookups.clear()
             self.logger.info("Loaded MMDB database", last_write=self._last_mtime, file=path)
         except OSError as exc:
             self.logger.warning("Failed to load MMDB database", path=path, exc=exc)
 
     def check_expired(self):
         """Check if the modification date of the MMDB database has
-        changed, and reload it if so"""
+        changed, and reload it if so. The file is checked at most once per
+        `events.context_processors.check_interval` seconds."""
         path = self.path()
         if path == "" or not path:
             return
+        now = monotonic()
+        if now - self._last_check < CONFIG.get_int("events.context_processors.check_interval", 60):
+            return
+        self._last_check = now
         try:
             mtime = Path(path).stat().st_mtime
             diff = self._last_mtime < mtime
@@ -48,6 +88,21 @@ class MMDBContextProcessor(EventContextProcessor):
         except OSError as exc:
             self.logger.warning("Failed to check MMDB age", exc=exc)
 
+    def cached_lookup(self, ip_address: str, lookup: Callable[[str], T | None]) -> T | None:
+        """Look up `ip_address` with `lookup`, or return the cached result of a previous
+        lookup. Addresses which are not found are cached too."""
+        database = Path(self.path() or "").stem
+        with self._lookups_lock:
+            result = self._lookups.get(ip_address, _MISSING)
+        if result is not _MISSING:
+            COUNTER_MMDB_LOOKUP_CACHE.labels(database=database, result="hit").inc()
+            return result
+        COUNTER_MMDB_LOOKUP_CACHE.labels(database=database, result="miss").inc()
+        result = lookup(ip_address)
+        with self._lookups_lock:
+            self._lookups[ip_address] = result
+        return result
+
     def configured(self) -> bool:
         """Return true if this context processor is configured"""
         return bool(self.reader)
@@ -1,5 +1,7 @@
 """Event notification tasks"""
 
+from uuid import UUID
+
 from django.db.models.query_utils import Q
 from guardian.shortcuts import get_anonymous_user
 from structlog.stdlib import get_logger
@@ -16,7 +18,9 @@ from authentik.events.models import (
 )
 from authentik.events.system_tasks import SystemTask, prefill_task
 from authentik.policies.engine import PolicyEngine
+from authentik.policies.event_matcher.models import EventMatcherPolicy
 from authentik.policies.models import PolicyBinding, PolicyEngineMode
+from authentik.policies.types import PolicyRequest
 from authentik.root.celery import CELERY_APP
 
 LOGGER = get_logger()
@@ -24,40 +28,79 @@ LOGGER = get_logger()
 
 @CELERY_APP.task()
 def event_notification_handler(event_uuid: str):
-    """Start task for each trigger definition"""
-    for trigger in NotificationRule.objects.all():
-        event_trigger_handler.apply_async(args=[event_uuid, trigger.name], queue="authentik_events")
-
-
-@CELERY_APP.task()
-def event_trigger_handler(event_uuid: str, trigger_name: str):
-    """Check if policies attached to NotificationRule match event"""
+    """Check all NotificationRules against an event at once, and create notifications
+    for all rules that match"""
     event: Event = Event.objects.filter(event_uuid=event_uuid).first()
     if not event:
         LOGGER.warning("event doesn't exist yet or anymore", event_uuid=event_uuid)
         return
-    trigger: NotificationRule | None = NotificationRule.objects.filter(name=trigger_name).first()
-    if not trigger:
+    rules = list(NotificationRule.objects.all())
+    if not rules:
         return
+    bindings: dict[UUID, list[PolicyBinding]] = {rule.pk: [] for rule in rules}
+    for binding in PolicyBinding.objects.filter(target__in=bindings.keys()):
+        bindings[binding.target_id].append(binding)
 
     if "policy_uuid" in event.context:
-        policy_uuid = event.context["policy_uuid"]
-        if PolicyBinding.objects.filter(
-            target__in=NotificationRule.objects.all().values_list("pbm_uuid", flat=True),
-            policy=policy_uuid,
-        ).exists():
+        policy_uuid = str(event.context["policy_uuid"]).replace("-", "")
+        if any(
+            binding.policy_id and binding.policy_id.hex == policy_uuid
+            for rule_bindings in bindings.values()
+            for binding in rule_bindings
+        ):
             # If policy that caused this event to be created is attached
             # to *any* NotificationRule, we return early.
             # This is the most effective way to prevent infinite loops.
-            LOGGER.debug("e(trigger): attempting to prevent infinite loop", trigger=trigger)
+            LOGGER.debug("e(trigger): attempting to prevent infinite loop", event=event)
             return
 
+    user = _get_event_user(event)
+    matchers = {
+        policy.pk: policy
+        for policy in EventMatcherPolicy.objects.filter(
+            pk__in=[
+                binding.policy_id
+                for rule_bindings in bindings.values()
+                for binding in rule_bindings
+                if binding.policy_id
+            ]
+        )
+    }
+    request = PolicyRequest(user)
+    request.obj = event
+    request.context["event"] = event
+    for rule in rules:
+        if not _rule_may_match(bindings[rule.pk], matchers, request):
+            continue
+        _trigger_rule(event, rule, user)
+
+
+def _get_event_user(event: Event) -> User:
+    """Get the user an event was created by, or the anonymous user"""
+    return User.objects.filter(pk=event.user.get("pk")).first() or get_anonymous_user()
+
+
+def _rule_may_match(
+    bindings: list[PolicyBinding], matchers: dict[UUID, EventMatcherPolicy], request: PolicyRequest
+) -> bool:
+    """Check if a rule can match the event, without running a PolicyEngine. Rules are
+    evaluated in MODE_ANY, so a rule can only be skipped when all of its bindings are
+    event matchers which don't match the event."""
+    for binding in bindings:
+        if not binding.enabled:
+            continue
+        matcher = matchers.get(binding.policy_id)
+        if not matcher or binding.negate:
+            return True
+        checks = matcher.event_checks(request, request.context["event"])
+        if all(result.passing for result in checks):
+            return True
+    return False
+
+
+def _trigger_rule(event: Event, trigger: NotificationRule, user: User):
+    """Check if policies attached to NotificationRule match event, and send notifications"""
     LOGGER.debug("e(trigger): checking if trigger applies", trigger=trigger)
-    try:
-        user = User.objects.filter(pk=event.user.get("pk")).first() or get_anonymous_user()
-    except User.DoesNotExist:
-        LOGGER.warning("e(trigger): failed to get user", trigger=trigger)
-        return
     policy_engine = PolicyEngine(trigger, user)
     policy_engine.mode = PolicyEngineMode.MODE_ANY
     policy_engine.empty_result = False
@@ -72,13 +115,13 @@ def event_trigger_handler(event_uuid: str, trigger_name: str):
     LOGGER.debug("e(trigger): event trigger matched", trigger=trigger)
     # Create the notification objects
     for transport in trigger.transports.all():
-        for user in trigger.destination_users(event):
+        for destination in trigger.destination_users(event):
             LOGGER.debug("created notification")
             notification_transport.apply_async(
                 args=[
                     transport.pk,
                     str(event.pk),
-                    user.pk,
+                    destination.pk,
                     str(trigger.pk),
                 ],
                 queue="authentik_events",
@@ -87,6 +130,29 @@ def event_trigger_handler(event_uuid: str, trigger_name: str):
                 break
 
 
+@CELERY_APP.task()
+def event_trigger_handler(event_uuid: str, trigger_name: str):
+    """Check if policies attached to a single NotificationRule match event. Only kept for
+    tasks which have been queued before upgrading, see `event_notification_handler`"""
+    event: Event = Event.objects.filter(event_uuid=event_uuid).first()
+    if not event:
+        LOGGER.warning("event doesn't exist yet or anymore", event_uuid=event_uuid)
+        return
+    trigger: NotificationRule | None = NotificationRule.objects.filter(name=trigger_name).first()
+    if not trigger:
+        return
+
+    if "policy_uuid" in event.context:
+        policy_uuid = event.context["policy_uuid"]
+        if PolicyBinding.objects.filter(
+            target__in=NotificationRule.objects.all().values_list("pbm_uuid", flat=True),
+            policy=policy_uuid,
+        ).exists():
+            LOGGER.debug("e(trigger): attempting to prevent infinite loop", trigger=trigger)
+            return
+    _trigger_rule(event, trigger, _get_event_user(event))
+
+
 @CELERY_APP.task(
     bind=True,
     autoretry_for=(NotificationTransportError,),
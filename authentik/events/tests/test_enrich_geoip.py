@@ -1,5 +1,7 @@
 """Test GeoIP Wrapper"""
 
+from unittest.mock import patch
+
 from django.test import TestCase
 
 from authentik.events.context_processors.base import get_context_processors
@@ -35,3 +37,18 @@ class TestGeoIP(TestCase):
         for processor in get_context_processors():
             processor.enrich_event(event)
         event.save()
+
+    def test_lookup_cache(self):
+        """Test that lookups are cached per IP, and the cache is cleared on reload"""
+        with patch.object(self.reader.reader, "city", wraps=self.reader.reader.city) as city:
+            self.reader.city_dict("2.125.160.216")
+            self.reader.city_dict("2.125.160.216")
+            self.assertEqual(city.call_count, 1)
+            # Addresses which are not found are cached too
+            self.assertIsNone(self.reader.city_dict("127.0.0.1"))
+            self.assertIsNone(self.reader.city_dict("127.0.0.1"))
+            self.assertEqual(city.call_count, 2)
+        self.reader.load()
+        with patch.object(self.reader.reader, "city", wraps=self.reader.reader.city) as city:
+            self.reader.city_dict("2.125.160.216")
+            self.assertEqual(city.call_count, 1)
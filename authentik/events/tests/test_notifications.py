@@ -21,6 +21,7 @@ from authentik.lib.generators import generate_id
 from authentik.policies.event_matcher.models import EventMatcherPolicy
 from authentik.policies.exceptions import PolicyException
 from authentik.policies.models import PolicyBinding
+from authentik.policies.types import PolicyResult
 
 
 class TestEventsNotifications(APITestCase):
@@ -111,6 +112,26 @@ class TestEventsNotifications(APITestCase):
                 Event.new(EventAction.CUSTOM_PREFIX).save()
         self.assertEqual(passes.call_count, 1)
 
+    def test_trigger_prefilter(self):
+        """Test rules whose event matchers can't match aren't evaluated"""
+        transport = NotificationTransport.objects.create(name=generate_id())
+        NotificationRule.objects.filter(name__startswith="default").delete()
+        for action in [EventAction.CUSTOM_PREFIX, EventAction.LOGIN]:
+            trigger = NotificationRule.objects.create(
+                name=generate_id(), destination_group=self.group
+            )
+            trigger.transports.add(transport)
+            matcher = EventMatcherPolicy.objects.create(name=generate_id(), action=action)
+            PolicyBinding.objects.create(target=trigger, policy=matcher, order=0)
+
+        execute_mock = MagicMock()
+        passes = MagicMock(return_value=PolicyResult(True))
+        with patch("authentik.policies.event_matcher.models.EventMatcherPolicy.passes", passes):
+            with patch("authentik.events.models.NotificationTransport.send", execute_mock):
+                Event.new(EventAction.CUSTOM_PREFIX).save()
+        self.assertEqual(passes.call_count, 1)
+        self.assertEqual(execute_mock.call_count, 1)
+
     def test_transport_once(self):
         """Test transport's send_once"""
         user2 = User.objects.create(name="test2-user", username="test2")
@@ -1,6 +1,6 @@
 """authentik flows app config"""
 
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 from authentik.blueprints.apps import ManagedAppConfig
 from authentik.lib.utils.reflection import all_subclasses
@@ -10,6 +10,11 @@ GAUGE_FLOWS_CACHED = Gauge(
     "Cached flows",
     ["tenant"],
 )
+COUNTER_FLOWS_CACHE_LOCAL = Counter(
+    "authentik_flows_cache_local",
+    "Lookups of cached flow plans in the in-process cache",
+    ["result"],
+)
 HIST_FLOW_EXECUTION_STAGE_TIME = Histogram(
     "authentik_flows_execution_stage_time",
     "Duration each stage took to execute.",
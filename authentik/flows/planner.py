@@ -3,7 +3,6 @@
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any
 
-from django.core.cache import cache
 from django.http import HttpRequest, HttpResponse
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
@@ -11,7 +10,7 @@ from structlog.stdlib import BoundLogger, get_logger
 
 from authentik.core.models import User
 from authentik.events.models import cleanse_dict
-from authentik.flows.apps import HIST_FLOWS_PLAN_TIME
+from authentik.flows.apps import COUNTER_FLOWS_CACHE_LOCAL, HIST_FLOWS_PLAN_TIME
 from authentik.flows.exceptions import EmptyFlowException, FlowNonApplicableException
 from authentik.flows.markers import ReevaluateMarker, StageMarker
 from authentik.flows.models import (
@@ -23,6 +22,7 @@ from authentik.flows.models import (
     in_memory_stage,
 )
 from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.lib.utils.urls import redirect_with_qs
 from authentik.outposts.models import Outpost
 from authentik.policies.engine import PolicyEngine
@@ -46,14 +46,21 @@ PLAN_CONTEXT_IS_REDIRECTED = "is_redirected"
 PLAN_CONTEXT_REDIRECT_STAGE_TARGET = "redirect_stage_target"
 CACHE_TIMEOUT = CONFIG.get_int("cache.timeout_flows")
 CACHE_PREFIX = "goauthentik.io/flows/planner/"
+FLOW_CACHE = CacheNamespace(
+    CACHE_PREFIX,
+    CACHE_TIMEOUT,
+    local=True,
+    local_metric=COUNTER_FLOWS_CACHE_LOCAL,
+    count_scopes=True,
+)
 
 
 def cache_key(flow: Flow, user: User | None = None) -> str:
     """Generate Cache key for flow"""
-    prefix = CACHE_PREFIX + str(flow.pk)
+    suffix = ""
     if user:
-        prefix += f"#{user.pk}"
-    return prefix
+        suffix += f"#{user.pk}"
+    return FLOW_CACHE.key(suffix, scope=str(flow.pk))
 
 
 @dataclass(slots=True)
@@ -272,7 +279,7 @@ class FlowPlanner:
                 raise exc
             # User is passing so far, check if we have a cached plan
             cached_plan_key = cache_key(self.flow, user)
-            cached_plan = cache.get(cached_plan_key, None)
+            cached_plan = FLOW_CACHE.get(cached_plan_key, None)
             if self.flow.designation not in [FlowDesignation.STAGE_CONFIGURATION]:
                 if cached_plan and self.use_cache:
                     self._logger.debug(
@@ -287,7 +294,7 @@ class FlowPlanner:
             )
             plan = self._build_plan(user, request, context)
             if self.use_cache:
-                cache.set(cache_key(self.flow, user), plan, CACHE_TIMEOUT)
+                FLOW_CACHE.set(cached_plan_key, plan)
             if not plan.bindings and not self.allow_empty_flows:
                 raise EmptyFlowException()
             return plan
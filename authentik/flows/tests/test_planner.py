@@ -23,6 +23,7 @@ from authentik.flows.models import (
     in_memory_stage,
 )
 from authentik.flows.planner import (
+    FLOW_CACHE,
     PLAN_CONTEXT_IS_REDIRECTED,
     PLAN_CONTEXT_PENDING_USER,
     FlowPlanner,
@@ -40,7 +41,7 @@ from authentik.root.middleware import ClientIPMiddleware
 from authentik.stages.dummy.models import DummyStage
 
 POLICY_RETURN_FALSE = PropertyMock(return_value=PolicyResult(False))
-CACHE_MOCK = Mock(wraps=cache)
+CACHE_MOCK = Mock(wraps=FLOW_CACHE)
 
 POLICY_RETURN_TRUE = MagicMock(return_value=PolicyResult(True))
 
@@ -149,7 +150,7 @@ class TestFlowPlanner(TestCase):
             planner = FlowPlanner(flow)
             planner.plan(request)
 
-    @patch("authentik.flows.planner.cache", CACHE_MOCK)
+    @patch("authentik.flows.planner.FLOW_CACHE", CACHE_MOCK)
     def test_planner_cache(self):
         """Test planner cache"""
         flow = create_test_flow(FlowDesignation.AUTHENTICATION)
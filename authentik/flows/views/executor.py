@@ -4,7 +4,6 @@ from copy import deepcopy
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.cache import cache
 from django.http import Http404, HttpRequest, HttpResponse, HttpResponseRedirect
 from django.http.request import QueryDict
 from django.shortcuts import get_object_or_404, redirect
@@ -47,7 +46,7 @@ from authentik.flows.models import (
     Stage,
 )
 from authentik.flows.planner import (
-    CACHE_PREFIX,
+    FLOW_CACHE,
     PLAN_CONTEXT_IS_RESTORED,
     PLAN_CONTEXT_PENDING_USER,
     PLAN_CONTEXT_REDIRECT,
@@ -202,8 +201,7 @@ class FlowExecutorView(APIView):
                 self._logger.warning(
                     "f(exec): found incompatible flow plan, invalidating run", exc=exc
                 )
-                keys = cache.keys(f"{CACHE_PREFIX}*")
-                cache.delete_many(keys)
+                FLOW_CACHE.invalidate()
                 return self.stage_invalid()
             if not next_binding:
                 self._logger.debug("f(exec): no more stages, flow is done.")
@@ -352,8 +350,7 @@ class FlowExecutorView(APIView):
             # from the cache. If there are errors, just delete all cached flows
             _ = plan.has_stages
         except Exception:
-            keys = cache.keys(f"{CACHE_PREFIX}*")
-            cache.delete_many(keys)
+            FLOW_CACHE.invalidate()
             return self._initiate_plan()
         return plan
 
@@ -2,26 +2,30 @@
 
 import re
 import socket
+from functools import lru_cache
+from hashlib import sha256
 from ipaddress import ip_address, ip_network
 from textwrap import indent
-from types import CodeType
+from threading import Lock
+from types import CodeType, MappingProxyType
 from typing import Any
 
-from cachetools import TLRUCache, cached
+from cachetools import LRUCache, TLRUCache, cached
 from django.core.exceptions import FieldError
 from django.http import HttpRequest
 from django.utils.text import slugify
 from django.utils.timezone import now
 from guardian.shortcuts import get_anonymous_user
+from prometheus_client import Counter
 from rest_framework.serializers import ValidationError
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
-from structlog.stdlib import get_logger
+from structlog.stdlib import BoundLogger, get_logger
 
 from authentik.core.models import User
 from authentik.events.models import Event
 from authentik.lib.expression.exceptions import ControlFlowException
-from authentik.lib.utils.http import get_http_session
+from authentik.lib.utils.http import LazyPooledHTTPSession
 from authentik.lib.utils.time import timedelta_from_string
 from authentik.policies.models import Policy, PolicyBinding
 from authentik.policies.process import PolicyProcess
@@ -33,12 +37,28 @@ from authentik.stages.authenticator import devices_for_user
 LOGGER = get_logger()
 
 ARG_SANITIZE = re.compile(r"[:.-]")
+COUNTER_EXPRESSION_COMPILE_CACHE = Counter(
+    "authentik_expression_compile_cache",
+    "Lookups of compiled expressions in the process-wide cache",
+    ["result"],
+)
+# Compiled expressions are shared by all evaluators of a process. Entries are keyed by the hash of
+# the expression, so saving a changed expression never hits an outdated entry.
+_COMPILE_CACHE: LRUCache[tuple[str, str, str], CodeType] = LRUCache(maxsize=1024)
+_COMPILE_CACHE_LOCK = Lock()
 
 
 def sanitize_arg(arg_name: str) -> str:
     return re.sub(ARG_SANITIZE, "_", arg_name)
 
 
+@lru_cache(maxsize=1024)
+def expression_logger(filename: str) -> BoundLogger:
+    """Logger available to expressions as `ak_logger`, shared by all evaluators with the
+    same filename"""
+    return get_logger(filename).bind()
+
+
 class BaseEvaluator:
     """Validate and evaluate python-based expressions"""
 
@@ -55,22 +75,12 @@ class BaseEvaluator:
         # update website/docs/expressions/_objects.md
         # update website/docs/expressions/_functions.md
         self._globals = {
+            **STATIC_GLOBALS,
             "ak_call_policy": self.expr_func_call_policy,
             "ak_create_event": self.expr_event_create,
-            "ak_is_group_member": BaseEvaluator.expr_is_group_member,
-            "ak_logger": get_logger(self._filename).bind(),
-            "ak_user_by": BaseEvaluator.expr_user_by,
-            "ak_user_has_authenticator": BaseEvaluator.expr_func_user_has_authenticator,
+            "ak_logger": expression_logger(self._filename),
             "ak_create_jwt": self.expr_create_jwt,
-            "ip_address": ip_address,
-            "ip_network": ip_network,
-            "list_flatten": BaseEvaluator.expr_flatten,
-            "regex_match": BaseEvaluator.expr_regex_match,
-            "regex_replace": BaseEvaluator.expr_regex_replace,
-            "requests": get_http_session(),
-            "resolve_dns": BaseEvaluator.expr_resolve_dns,
-            "reverse_dns": BaseEvaluator.expr_reverse_dns,
-            "slugify": slugify,
+            "requests": LazyPooledHTTPSession(),
         }
         self._context = {}
 
@@ -227,8 +237,21 @@ class BaseEvaluator:
 
     def compile(self, expression: str) -> CodeType:
         """Parse expression. Raises SyntaxError or ValueError if the syntax is incorrect."""
-        expression = self.wrap_expression(expression)
-        return compile(expression, self._filename, "exec")
+        key = (
+            self._filename,
+            sha256(expression.encode()).hexdigest(),
+            ",".join(sanitize_arg(x) for x in self._context.keys()),
+        )
+        with _COMPILE_CACHE_LOCK:
+            compiled = _COMPILE_CACHE.get(key)
+        if compiled:
+            COUNTER_EXPRESSION_COMPILE_CACHE.labels(result="hit").inc()
+            return compiled
+        COUNTER_EXPRESSION_COMPILE_CACHE.labels(result="miss").inc()
+        compiled = compile(self.wrap_expression(expression), self._filename, "exec")
+        with _COMPILE_CACHE_LOCK:
+            _COMPILE_CACHE[key] = compiled
+        return compiled
 
     def evaluate(self, expression_source: str) -> Any:
         """Parse and evaluate expression. If the syntax is incorrect, a SyntaxError is raised.
@@ -272,3 +295,21 @@ class BaseEvaluator:
             return True
         except (ValueError, SyntaxError) as exc:
             raise ValidationError(f"Expression Syntax Error: {str(exc)}") from exc
+
+
+# Globals which don't depend on the evaluator, shared by all evaluators
+STATIC_GLOBALS = MappingProxyType(
+    {
+        "ak_is_group_member": BaseEvaluator.expr_is_group_member,
+        "ak_user_by": BaseEvaluator.expr_user_by,
+        "ak_user_has_authenticator": BaseEvaluator.expr_func_user_has_authenticator,
+        "ip_address": ip_address,
+        "ip_network": ip_network,
+        "list_flatten": BaseEvaluator.expr_flatten,
+        "regex_match": BaseEvaluator.expr_regex_match,
+        "regex_replace": BaseEvaluator.expr_regex_replace,
+        "resolve_dns": BaseEvaluator.expr_resolve_dns,
+        "reverse_dns": BaseEvaluator.expr_reverse_dns,
+        "slugify": slugify,
+    }
+)
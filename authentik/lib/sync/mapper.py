@@ -1,9 +1,15 @@
-from collections.abc import Generator
+from collections import defaultdict
+from collections.abc import Generator, Iterable
+from time import perf_counter
+from typing import Any
 
 from django.db.models import QuerySet
 from django.http import HttpRequest
 
-from authentik.core.expression.evaluator import PropertyMappingEvaluator
+from authentik.core.expression.evaluator import (
+    PROPERTY_MAPPING_BATCH_TIME,
+    PropertyMappingEvaluator,
+)
 from authentik.core.expression.exceptions import (
     PropertyMappingExpressionException,
 )
@@ -19,6 +25,7 @@ class PropertyMappingManager:
     mapping_subclass: type[PropertyMapping]
 
     _evaluators: list[PropertyMappingEvaluator]
+    _mappings: list[PropertyMapping] | None
 
     globals: dict
 
@@ -33,25 +40,37 @@ class PropertyMappingManager:
         # As they keys of parameters are part of the compilation,
         # we need a list of all parameter names that will be used during evaluation
         context_keys: list[str],
+        # Mappings are evaluated in this order
+        order_by: str = "name",
     ) -> None:
-        self.query_set = qs.order_by("name")
+        self.query_set = qs.order_by(order_by)
         self.mapping_subclass = mapping_subclass
         self.context_keys = context_keys
         self.globals = {}
+        self._mappings = None
         self.__has_compiled = False
 
+    def get_mappings(self) -> list[PropertyMapping]:
+        """Get all mappings of the queryset which are an instance of `mapping_subclass`,
+        the queryset is only evaluated once"""
+        if self._mappings is None:
+            self._mappings = [
+                mapping
+                for mapping in self.query_set.all()
+                if isinstance(mapping, self.mapping_subclass)
+            ]
+        return self._mappings
+
+    def create_evaluator(self, mapping: PropertyMapping) -> PropertyMappingEvaluator:
+        """Create an evaluator for `mapping` and compile its expression"""
+        evaluator = PropertyMappingEvaluator(mapping, context_keys=self.context_keys)
+        evaluator._globals.update(self.globals)
+        # Compile and cache expression
+        evaluator.compile()
+        return evaluator
+
     def compile(self):
-        self._evaluators = []
-        for mapping in self.query_set:
-            if not isinstance(mapping, self.mapping_subclass):
-                continue
-            evaluator = PropertyMappingEvaluator(
-                mapping, **{key: None for key in self.context_keys}
-            )
-            evaluator._globals.update(self.globals)
-            # Compile and cache expression
-            evaluator.compile()
-            self._evaluators.append(evaluator)
+        self._evaluators = [self.create_evaluator(mapping) for mapping in self.get_mappings()]
 
     def iter_eval(
         self,
@@ -79,3 +98,71 @@ class PropertyMappingManager:
                 yield value, mapping.model
             else:
                 yield value
+
+    def iter_eval_each(
+        self,
+        user: User | None,
+        request: HttpRequest | None,
+        **kwargs,
+    ) -> Generator[tuple[PropertyMapping, Any, PropertyMappingExpressionException | None]]:
+        """Execute all mappings with the given context. Unlike `iter_eval`, a failing mapping
+        doesn't stop the iteration, its exception is yielded with the mapping instead. `None`
+        values are yielded too. Evaluators are created for each call, so the manager can be
+        used by multiple threads at once, compiled expressions are cached by the evaluator."""
+        for mapping in map(self.create_evaluator, self.get_mappings()):
+            mapping.set_context(user, request, **kwargs)
+            value, error = None, None
+            try:
+                value = mapping.evaluate(mapping.model.expression)
+            except ControlFlowException as exc:
+                raise exc from exc
+            except PropertyMappingExpressionException as exc:
+                error = exc
+            except Exception as exc:
+                error = PropertyMappingExpressionException(exc, mapping.model)
+            yield mapping.model, value, error
+
+    def iter_eval_batch(
+        self,
+        contexts: Iterable[dict[str, Any]],
+        user: User | None = None,
+        request: HttpRequest | None = None,
+        return_mapping: bool = False,
+    ) -> Generator[tuple[dict[str, Any], list, ControlFlowException | None]]:
+        """Execute all mappings that were pre-compiled for each context of `contexts`.
+
+        Yields each context with the values of all mappings as soon as they have been
+        evaluated, so objects can be processed as a stream. A ControlFlowException (for
+        example SkipObject) only stops the evaluation of its own context, and is yielded
+        with it. Evaluation time is recorded once per mapping for the whole batch."""
+        if not self.__has_compiled:
+            self.compile()
+            self.__has_compiled = True
+        durations: dict[str, float] = defaultdict(float)
+        try:
+            for context in contexts:
+                # Placeholder user shared by all mappings of this object
+                empty_user = User() if not user else None
+                values = []
+                try:
+                    for mapping in self._evaluators:
+                        mapping.set_context(user, request, empty_user=empty_user, **context)
+                        start = perf_counter()
+                        try:
+                            value = mapping.evaluate(mapping.model.expression, record_time=False)
+                        except (PropertyMappingExpressionException, ControlFlowException) as exc:
+                            raise exc from exc
+                        except Exception as exc:
+                            raise PropertyMappingExpressionException(exc, mapping.model) from exc
+                        finally:
+                            durations[mapping._filename] += perf_counter() - start
+                        if value is None:
+                            continue
+                        values.append((value, mapping.model) if return_mapping else value)
+                except ControlFlowException as exc:
+                    yield context, values, exc
+                    continue
+                yield context, values, None
+        finally:
+            for mapping_name, duration in durations.items():
+                PROPERTY_MAPPING_BATCH_TIME.labels(mapping_name=mapping_name).observe(duration)
@@ -1,8 +1,12 @@
 """Test Evaluator base functions"""
 
+from unittest.mock import patch
+
 from django.test import RequestFactory, TestCase
 from django.urls import reverse
 from jwt import decode
+from requests.adapters import HTTPAdapter
+from requests.sessions import Session
 
 from authentik.blueprints.tests import apply_blueprint
 from authentik.core.tests.utils import create_test_admin_user, create_test_flow, create_test_user
@@ -77,3 +81,34 @@ class TestEvaluator(TestCase):
             jwt, provider.client_secret, algorithms=["HS256"], audience=provider.client_id
         )
         self.assertEqual(decoded["preferred_username"], user.username)
+
+    def test_compile_cache(self):
+        """Test compiled expressions are shared between evaluators"""
+        filename = generate_id()
+        first = BaseEvaluator(filename)
+        first._context = {"foo": "bar"}
+        second = BaseEvaluator(filename)
+        second._context = {"foo": "baz"}
+        self.assertIs(first.compile("return foo"), second.compile("return foo"))
+        self.assertEqual(second.evaluate("return foo"), "baz")
+        # Different arguments or expressions need to be compiled separately
+        second._context = {"foo": "baz", "bar": "qux"}
+        self.assertIsNot(first.compile("return foo"), second.compile("return foo"))
+        self.assertIsNot(first.compile("return foo"), first.compile("return foo + foo"))
+
+    def test_lazy_http_session(self):
+        """Test no HTTP session is created for expressions which don't use `requests`"""
+        with (
+            patch.object(
+                Session, "__init__", autospec=True, side_effect=Session.__init__
+            ) as session_init,
+            patch.object(
+                HTTPAdapter, "__init__", autospec=True, side_effect=HTTPAdapter.__init__
+            ) as adapter_init,
+        ):
+            evaluator = BaseEvaluator(generate_id())
+            self.assertTrue(evaluator.evaluate("return True"))
+            session_init.assert_not_called()
+            adapter_init.assert_not_called()
+            self.assertIn("User-Agent", evaluator.evaluate("return requests.headers"))
+            session_init.assert_called_once()
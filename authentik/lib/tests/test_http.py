@@ -4,6 +4,7 @@ from django.test import RequestFactory, TestCase
 
 from authentik.core.models import Token, TokenIntents, UserTypes
 from authentik.core.tests.utils import create_test_admin_user
+from authentik.lib.utils.http import get_pooled_http_adapter, get_pooled_http_session
 from authentik.lib.views import bad_request_message
 from authentik.root.middleware import ClientIPMiddleware
 
@@ -80,3 +81,13 @@ class TestHTTP(TestCase):
             },
         )
         self.assertEqual(ClientIPMiddleware.get_client_ip(request), "1.2.3.4")
+
+    def test_pooled_session(self):
+        """Test pooled sessions share connections, but no other state"""
+        session = get_pooled_http_session()
+        other = get_pooled_http_session()
+        self.assertIsNot(session, other)
+        self.assertIs(session.get_adapter("https://goauthentik.io/"), get_pooled_http_adapter())
+        self.assertIs(other.get_adapter("https://goauthentik.io/"), get_pooled_http_adapter())
+        session.headers["Authorization"] = "Bearer foo"
+        self.assertNotIn("Authorization", other.headers)
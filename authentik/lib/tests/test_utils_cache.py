@@ -0,0 +1,117 @@
+"""Test cache utils"""
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from authentik.lib.generators import generate_id
+from authentik.lib.utils.cache import _MISSING, CacheNamespace, LocalCache
+
+
+class TestCacheNamespace(TestCase):
+    """Test CacheNamespace"""
+
+    def setUp(self):
+        self.namespace = CacheNamespace(
+            f"goauthentik.io/tests/{generate_id()}/", 60, count_scopes=True
+        )
+
+    def test_key_stable(self):
+        """Test keys are stable until invalidated"""
+        self.assertEqual(
+            self.namespace.key("foo", scope="a"),
+            self.namespace.key("foo", scope="a"),
+        )
+        self.assertNotEqual(
+            self.namespace.key("foo", scope="a"),
+            self.namespace.key("foo", scope="b"),
+        )
+
+    def test_invalidate_scope(self):
+        """Test invalidating a single scope"""
+        key_a = self.namespace.key("foo", scope="a")
+        key_b = self.namespace.key("foo", scope="b")
+        cache.set(key_a, True)
+        self.namespace.invalidate("a")
+        self.assertNotEqual(self.namespace.key("foo", scope="a"), key_a)
+        self.assertIsNone(cache.get(self.namespace.key("foo", scope="a")))
+        self.assertEqual(self.namespace.key("foo", scope="b"), key_b)
+
+    def test_invalidate_all(self):
+        """Test invalidating the whole namespace"""
+        key_a = self.namespace.key("foo", scope="a")
+        key = self.namespace.key("foo")
+        self.namespace.invalidate()
+        self.assertNotEqual(self.namespace.key("foo", scope="a"), key_a)
+        self.assertNotEqual(self.namespace.key("foo"), key)
+
+    def test_many(self):
+        """Test getting and setting many keys at once"""
+        generations = self.namespace.generations("a", "b")
+        data = {
+            self.namespace.key("foo", scope="a", generations=generations): 1,
+            self.namespace.key("foo", scope="b", generations=generations): 2,
+        }
+        self.namespace.set_many(data)
+        self.assertEqual(self.namespace.get_many([*data.keys(), generate_id()]), data)
+        self.assertEqual(self.namespace.count(), 2)
+
+    def test_generations_batch(self):
+        """Test building keys from pre-fetched generations"""
+        generations = self.namespace.generations("a", "b")
+        self.assertEqual(
+            self.namespace.key("foo", scope="b", generations=generations),
+            self.namespace.key("foo", scope="b"),
+        )
+
+    def test_count(self):
+        """Test counting tracked keys"""
+        for scope in ["a", "a", "b"]:
+            key = self.namespace.key(generate_id(), scope=scope)
+            self.namespace.set(key, True)
+        self.assertEqual(self.namespace.count(), 3)
+        self.assertEqual(self.namespace.count("a"), 2)
+        self.assertEqual(self.namespace.count("b"), 1)
+        self.namespace.invalidate("a")
+        self.assertEqual(self.namespace.count("a"), 0)
+        self.assertEqual(self.namespace.count(), 3)
+        self.namespace.invalidate()
+        self.assertEqual(self.namespace.count(), 0)
+        self.assertEqual(self.namespace.count("b"), 0)
+
+
+class TestLocalCache(TestCase):
+    """Test in-process cache"""
+
+    def test_lru(self):
+        """Test least recently used entries are evicted"""
+        local = LocalCache(2, 60)
+        local.set("a", 1)
+        local.set("b", 2)
+        self.assertEqual(local.get("a"), 1)
+        local.set("c", 3)
+        self.assertIs(local.get("b"), _MISSING)
+        self.assertEqual(local.get("a"), 1)
+        self.assertEqual(local.get("c"), 3)
+
+    def test_timeout(self):
+        """Test entries expire"""
+        local = LocalCache(2, 60)
+        local.set("a", 1, timeout=-1)
+        self.assertIs(local.get("a"), _MISSING)
+
+    @patch("authentik.lib.utils.cache._ensure_invalidation_listener", MagicMock())
+    def test_namespace_local(self):
+        """Test namespace with local cache"""
+        namespace = CacheNamespace(f"goauthentik.io/tests/{generate_id()}/", 60, local=True)
+        key = namespace.key("foo", scope="a")
+        value = {"foo": "bar"}
+        namespace.set(key, value)
+        cache.delete(key)
+        # Served from the local cache, as a copy
+        cached = namespace.get(key)
+        self.assertEqual(cached, value)
+        self.assertIsNot(cached, value)
+        namespace.invalidate("a")
+        self.assertIsNone(namespace.get(namespace.key("foo", scope="a")))
@@ -0,0 +1,281 @@
+"""Cache utilities"""
+
+from collections import OrderedDict
+from os import getpid
+from pickle import dumps, loads  # nosec
+from secrets import token_hex
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+
+LOGGER = get_logger()
+SCOPE_NONE = "-"
+COUNT_SUFFIX = "#count"
+INVALIDATION_CHANNEL = "authentik_cache_invalidation"
+_MISSING = object()
+
+
+class LocalCache:
+    """Bounded, in-process LRU cache with a timeout per entry"""
+
+    def __init__(self, max_size: int, timeout: int):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Any:
+        """Get `key`, returns `_MISSING` if the key is not set or has expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry:
+                return _MISSING
+            expires, value = entry
+            if expires < monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, timeout: int | None = None):
+        """Set `key`, evicting the least recently used entry when full"""
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        with self._lock:
+            self._data[key] = (monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        """Delete `key` if it exists"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Delete all entries"""
+        with self._lock:
+            self._data.clear()
+
+
+_LOCAL_CACHES: list[LocalCache] = []
+_LISTENER_LOCK = Lock()
+_LISTENER_PID: int | None = None
+
+
+def _listen_invalidations():
+    """Drop keys from all local caches when they're invalidated by any process"""
+    while True:
+        try:
+            pubsub = get_redis_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # We might have missed invalidations while we were not subscribed
+            for local in _LOCAL_CACHES:
+                local.clear()
+            for message in pubsub.listen():
+                key = message["data"].decode()
+                for local in _LOCAL_CACHES:
+                    local.delete(key)
+        except RedisError as exc:
+            LOGGER.warning("Lost connection to cache invalidation channel", exc=exc)
+            sleep(1)
+
+
+def _ensure_invalidation_listener():
+    """Start listening for invalidations in this process, if we're not already. Checks the
+    PID as the listener thread does not survive a fork."""
+    global _LISTENER_PID  # noqa: PLW0603
+    if _LISTENER_PID == getpid():
+        return
+    with _LISTENER_LOCK:
+        if _LISTENER_PID == getpid():
+            return
+        Thread(
+            target=_listen_invalidations, name="authentik-cache-invalidation", daemon=True
+        ).start()
+        _LISTENER_PID = getpid()
+
+
+class CacheNamespace:
+    """Group of cache keys which can be invalidated in O(1), without scanning for keys.
+
+    Every key contains a generation token of the namespace and of its scope (for example
+    a flow or a policy binding). Invalidating deletes the generation token, so that all keys
+    built afterwards differ from the previous ones; old entries are never read again and
+    expire on their own.
+
+    With `local` set, generations and values are also kept in a bounded in-process cache
+    in front of the shared cache. Invalidations are broadcast to all processes. Values are
+    stored pickled locally, so callers can't modify the cached object."""
+
+    prefix: str
+    timeout: int | None
+    local: LocalCache | None
+
+    def __init__(
+        self,
+        prefix: str,
+        timeout: int | None = None,
+        local: bool = False,
+        local_metric: Counter | None = None,
+        count_scopes: bool = False,
+    ):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.count_scopes = count_scopes
+        self.local = None
+        self.local_metric = local_metric
+        if local and CONFIG.get_int("cache.local_size") > 0:
+            self.local = LocalCache(
+                CONFIG.get_int("cache.local_size"), CONFIG.get_int("cache.local_timeout")
+            )
+            _LOCAL_CACHES.append(self.local)
+
+    def _generation_key(self, scope: str | None = None) -> str:
+        if scope is None:
+            return f"{self.prefix}generation"
+        return f"{self.prefix}generation/{scope}"
+
+    def generations(self, *scopes: str) -> dict[str | None, str]:
+        """Get the current generation of the namespace (as `None`) and of all `scopes`,
+        creating them when they don't exist yet"""
+        keys = {self._generation_key(scope): scope for scope in (None, *scopes)}
+        generations = {}
+        if self.local:
+            _ensure_invalidation_listener()
+            for key, scope in list(keys.items()):
+                generation = self.local.get(cache.make_key(key))
+                if generation is not _MISSING:
+                    generations[scope] = generation
+                    del keys[key]
+        current = cache.get_many(keys.keys()) if keys else {}
+        for key, scope in keys.items():
+            if key not in current:
+                # `add` only sets the key if it does not exist yet, so concurrent
+                # callers agree on the same generation
+                cache.add(key, token_hex(8), None)
+                current[key] = cache.get(key)
+            generations[scope] = current[key]
+            if self.local and current[key]:
+                self.local.set(cache.make_key(key), current[key])
+        return generations
+
+    def key(
+        self,
+        *parts: str,
+        scope: str | None = None,
+        generations: dict[str | None, str] | None = None,
+    ) -> str:
+        """Build a key within this namespace, optionally within `scope`.
+        `generations` can be passed when building many keys at once, see `generations()`"""
+        if generations is None:
+            generations = self.generations(*([scope] if scope else []))
+        scope_generation = SCOPE_NONE
+        if scope:
+            scope_generation = generations[scope]
+        return (
+            f"{self.prefix}{generations[None]}/{scope or SCOPE_NONE}/{scope_generation}/"
+            + "/".join(str(part) for part in parts)
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get `key`, from the local cache if possible"""
+        if self.local:
+            value = self.local.get(cache.make_key(key))
+            if value is not _MISSING:
+                if self.local_metric:
+                    self.local_metric.labels(result="hit").inc()
+                return loads(value)  # nosec
+            if self.local_metric:
+                self.local_metric.labels(result="miss").inc()
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if self.local:
+            self.local.set(cache.make_key(key), dumps(value), self.timeout)
+        return value
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Get all `keys` which are set, with a single lookup in the shared cache for all
+        keys which are not in the local cache"""
+        found = {}
+        remaining = keys
+        if self.local:
+            remaining = []
+            for key in keys:
+                value = self.local.get(cache.make_key(key))
+                if value is _MISSING:
+                    remaining.append(key)
+                    continue
+                found[key] = loads(value)  # nosec
+            if self.local_metric:
+                self.local_metric.labels(result="hit").inc(len(found))
+                self.local_metric.labels(result="miss").inc(len(remaining))
+        if not remaining:
+            return found
+        fetched = cache.get_many(remaining)
+        if self.local:
+            for key, value in fetched.items():
+                self.local.set(cache.make_key(key), dumps(value), self.timeout)
+        found.update(fetched)
+        return found
+
+    def set(self, key: str, value: Any, timeout: int | None = None):
+        """Set `key` and count it towards the number of entries in its namespace and scope"""
+        self.set_many({key: value}, timeout)
+
+    def set_many(self, data: dict[str, Any], timeout: int | None = None):
+        """Set all keys of `data` at once and count them towards the number of entries
+        in their namespace and scope"""
+        if not data:
+            return
+        timeout = timeout or self.timeout
+        cache.set_many(data, timeout)
+        counts: dict[str, int] = {}
+        for key, value in data.items():
+            if self.local:
+                self.local.set(cache.make_key(key), dumps(value), timeout)
+            for count_key in self._count_keys(key):
+                counts[count_key] = counts.get(count_key, 0) + 1
+        for count_key, delta in counts.items():
+            try:
+                cache.incr(count_key, delta)
+            except ValueError:
+                cache.set(count_key, delta, timeout)
+
+    def _count_keys(self, key: str) -> list[str]:
+        generation, scope, scope_generation, _ = key.removeprefix(self.prefix).split("/", 3)
+        count_keys = [f"{self.prefix}{generation}/{COUNT_SUFFIX}"]
+        if self.count_scopes and scope != SCOPE_NONE:
+            count_keys.append(
+                f"{self.prefix}{generation}/{scope}/{scope_generation}/{COUNT_SUFFIX}"
+            )
+        return count_keys
+
+    def count(self, scope: str | None = None) -> int:
+        """Approximate number of entries set in the namespace (or scope, when `count_scopes`
+        is set) since it has last been invalidated. Counters expire with the namespace's
+        timeout."""
+        key = self.key(scope=scope)
+        return cache.get(self._count_keys(key)[-1], 0)
+
+    def invalidate(self, scope: str | None = None):
+        """Invalidate all keys of the namespace, or only of `scope`"""
+        key = self._generation_key(scope)
+        cache.delete(key)
+        if not self.local:
+            return
+        made_key = cache.make_key(key)
+        self.local.delete(made_key)
+        try:
+            get_redis_connection().publish(INVALIDATION_CHANNEL, made_key)
+        except RedisError as exc:
+            LOGGER.warning("Failed to broadcast cache invalidation", exc=exc, key=key)
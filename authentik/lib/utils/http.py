@@ -1,7 +1,11 @@
 """http helpers"""
 
+from os import getpid
+from threading import Lock
+from typing import Any
 from uuid import uuid4
 
+from requests.adapters import HTTPAdapter
 from requests.sessions import PreparedRequest, Session
 from structlog.stdlib import get_logger
 
@@ -9,6 +13,9 @@ from authentik import get_full_version
 from authentik.lib.config import CONFIG
 
 LOGGER = get_logger()
+_POOLED_ADAPTER: HTTPAdapter | None = None
+_POOLED_ADAPTER_PID: int | None = None
+_POOLED_ADAPTER_LOCK = Lock()
 
 
 def authentik_user_agent() -> str:
@@ -81,3 +88,57 @@ def get_http_session() -> Session:
     session.headers["User-Agent"] = authentik_user_agent()
     session.timeout = CONFIG.get_optional_int("http_timeout")
     return session
+
+
+def get_pooled_http_adapter() -> HTTPAdapter:
+    """Get a process-wide HTTP adapter, which keeps connections alive between requests.
+    The adapter is re-created after a fork, as connections can't be shared between processes."""
+    global _POOLED_ADAPTER, _POOLED_ADAPTER_PID  # noqa: PLW0603
+    if _POOLED_ADAPTER and _POOLED_ADAPTER_PID == getpid():
+        return _POOLED_ADAPTER
+    with _POOLED_ADAPTER_LOCK:
+        if _POOLED_ADAPTER and _POOLED_ADAPTER_PID == getpid():
+            return _POOLED_ADAPTER
+        _POOLED_ADAPTER = HTTPAdapter(
+            pool_connections=CONFIG.get_int("http_pool_connections", 10),
+            pool_maxsize=CONFIG.get_int("http_pool_maxsize", 10),
+        )
+        _POOLED_ADAPTER_PID = getpid()
+        return _POOLED_ADAPTER
+
+
+def get_pooled_http_session() -> Session:
+    """Get a requests session with common headers, which uses the process-wide connection pool.
+    Each call returns a new session, so headers, authentication, cookies and other settings
+    are not shared between users of the session, only connections are."""
+    session = get_http_session()
+    adapter = get_pooled_http_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class LazyPooledHTTPSession:
+    """Proxy to a session of `get_pooled_http_session`, which is only created when it's
+    used for the first time. Used by expressions, most of which never send a request."""
+
+    __slots__ = ("_session",)
+
+    def __init__(self):
+        self._session: Session | None = None
+
+    @property
+    def session(self) -> Session:
+        """Get the session, creating it if it doesn't exist yet"""
+        if self._session is None:
+            self._session = get_pooled_http_session()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    def __enter__(self) -> Session:
+        return self.session.__enter__()
+
+    def __exit__(self, *args):
+        return self.session.__exit__(*args)
@@ -1,6 +1,5 @@
 """policy API Views"""
 
-from django.core.cache import cache
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from guardian.shortcuts import get_objects_for_user
@@ -12,7 +11,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from structlog.stdlib import get_logger
 
-from authentik.core.api.applications import user_app_cache_key
+from authentik.core.api.applications import APP_ACCESS_CACHE
 from authentik.core.api.object_types import TypesMixin
 from authentik.core.api.used_by import UsedByMixin
 from authentik.core.api.utils import (
@@ -23,8 +22,8 @@ from authentik.core.api.utils import (
 from authentik.events.logs import LogEventSerializer, capture_logs
 from authentik.policies.api.exec import PolicyTestResultSerializer, PolicyTestSerializer
 from authentik.policies.models import Policy, PolicyBinding
-from authentik.policies.process import PolicyProcess
-from authentik.policies.types import CACHE_PREFIX, PolicyRequest
+from authentik.policies.process import POLICY_CACHE, PolicyProcess
+from authentik.policies.types import PolicyRequest
 from authentik.rbac.decorators import permission_required
 
 LOGGER = get_logger()
@@ -99,7 +98,7 @@ class PolicyViewSet(
     @action(detail=False, pagination_class=None, filter_backends=[])
     def cache_info(self, request: Request) -> Response:
         """Info about cached policies"""
-        return Response(data={"count": len(cache.keys(f"{CACHE_PREFIX}*"))})
+        return Response(data={"count": POLICY_CACHE.count()})
 
     @permission_required(None, ["authentik_policies.clear_policy_cache"])
     @extend_schema(
@@ -112,12 +111,10 @@ class PolicyViewSet(
     @action(detail=False, methods=["POST"])
     def cache_clear(self, request: Request) -> Response:
         """Clear policy cache"""
-        keys = cache.keys(f"{CACHE_PREFIX}*")
-        cache.delete_many(keys)
-        LOGGER.debug("Cleared Policy cache", keys=len(keys))
+        POLICY_CACHE.invalidate()
+        LOGGER.debug("Cleared Policy cache")
         # Also delete user application cache
-        keys = cache.keys(user_app_cache_key("*"))
-        cache.delete_many(keys)
+        APP_ACCESS_CACHE.invalidate()
         return Response(status=204)
 
     @permission_required("authentik_policies.view_policy")
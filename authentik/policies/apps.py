@@ -4,7 +4,7 @@ Every system policy should be its own Django app under the `policies` app.
 For example: The 'dummy' policy is available at `authentik.policies.dummy`.
 """
 
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 from authentik.blueprints.apps import ManagedAppConfig
 
@@ -13,6 +13,11 @@ GAUGE_POLICIES_CACHED = Gauge(
     "Cached Policies",
     ["tenant"],
 )
+COUNTER_POLICIES_CACHE_LOCAL = Counter(
+    "authentik_policies_cache_local",
+    "Lookups of cached policy results in the in-process cache",
+    ["result"],
+)
 HIST_POLICIES_ENGINE_TOTAL_TIME = Histogram(
     "authentik_policies_engine_time_total_seconds",
     "(Total) Duration the policy engine took to evaluate a result.",
@@ -1,10 +1,12 @@
 """authentik policy engine"""
 
 from collections.abc import Iterable
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from multiprocessing import Pipe, current_process
 from multiprocessing.connection import Connection
+from time import perf_counter
+from uuid import UUID
 
-from django.core.cache import cache
 from django.db.models import Count, Q, QuerySet
 from django.http import HttpRequest
 from sentry_sdk import start_span
@@ -12,25 +14,39 @@ from sentry_sdk.tracing import Span
 from structlog.stdlib import BoundLogger, get_logger
 
 from authentik.core.models import User
+from authentik.lib.config import CONFIG
 from authentik.lib.utils.reflection import class_to_path
 from authentik.policies.apps import HIST_POLICIES_ENGINE_TOTAL_TIME, HIST_POLICIES_EXECUTION_TIME
 from authentik.policies.exceptions import PolicyEngineException
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel, PolicyEngineMode
-from authentik.policies.process import PolicyProcess, cache_key
-from authentik.policies.types import PolicyRequest, PolicyResult
+from authentik.policies.pool import EXECUTOR_THREAD, PolicyTask, get_policy_pool
+from authentik.policies.process import (
+    POLICY_CACHE,
+    PolicyProcess,
+    average_execution_time,
+    cache_key,
+    observe_execution_time,
+)
+from authentik.policies.types import PolicyRequest, PolicyResult, SkippedPolicyResult
 
 CURRENT_PROCESS = current_process()
 
 
 class PolicyProcessInfo:
-    """Dataclass to hold all information and communication channels to a process"""
+    """Dataclass to hold all information and communication channels to a process.
+    When evaluated by the worker pool, `process` and `connection` are not set."""
 
-    process: PolicyProcess
-    connection: Connection
+    process: PolicyProcess | None
+    connection: Connection | None
     result: PolicyResult | None
     binding: PolicyBinding
 
-    def __init__(self, process: PolicyProcess, connection: Connection, binding: PolicyBinding):
+    def __init__(
+        self,
+        process: PolicyProcess | None,
+        connection: Connection | None,
+        binding: PolicyBinding,
+    ):
         self.process = process
         self.connection = connection
         self.binding = binding
@@ -41,6 +57,7 @@ class PolicyEngine:
     """Orchestrate policy checking, launch tasks and return result"""
 
     use_cache: bool
+    short_circuit: bool
     request: PolicyRequest
 
     logger: BoundLogger
@@ -65,7 +82,11 @@ class PolicyEngine:
             self.request.set_http_request(request)
         self.__cached_policies: list[PolicyResult] = []
         self.__processes: list[PolicyProcessInfo] = []
+        self.__cache_keys: dict[UUID, str] = {}
+        self.__skipped_policies: list[SkippedPolicyResult] = []
         self.use_cache = True
+        # Evaluate bindings one at a time and stop once the outcome is determined
+        self.short_circuit = CONFIG.get_bool("policies.short_circuit", False)
         self.__expected_result_count = 0
         self.__static_result: PolicyResult | None = None
 
@@ -78,30 +99,59 @@ class PolicyEngine:
         if binding.policy is not None and binding.policy.__class__ == Policy:
             raise PolicyEngineException(f"Policy '{binding.policy}' is root type")
 
-    def _check_cache(self, binding: PolicyBinding):
-        if not self.use_cache:
-            return False
+    def _check_cache(self, bindings: list[PolicyBinding]) -> list[PolicyBinding]:
+        """Fetch cached results of all bindings at once, returns all bindings that
+        don't have a cached result and need to be evaluated"""
+        if not bindings or (not self.use_cache and not self.request.should_cache):
+            return bindings
         # It's a bit silly to time this, but
         with HIST_POLICIES_EXECUTION_TIME.labels(
-            binding_order=binding.order,
-            binding_target_type=binding.target_type,
-            binding_target_name=binding.target_name,
+            binding_order="",
+            binding_target_type="",
+            binding_target_name="",
             object_pk=str(self.request.obj.pk),
             object_type=class_to_path(self.request.obj.__class__),
             mode="cache_retrieve",
         ).time():
-            key = cache_key(binding, self.request)
-            cached_policy = cache.get(key, None)
-            if not cached_policy:
-                return False
-        self.logger.debug(
-            "P_ENG: Taking result from cache",
-            binding=binding,
-            cache_key=key,
-            request=self.request,
+            generations = POLICY_CACHE.generations(
+                *[binding.policy_binding_uuid.hex for binding in bindings]
+            )
+            # Keys are also used to write results after evaluation
+            for binding in bindings:
+                self.__cache_keys[binding.pk] = cache_key(binding, self.request, generations)
+            if not self.use_cache:
+                return bindings
+            cached = POLICY_CACHE.get_many(list(self.__cache_keys.values()))
+        pending = []
+        for binding in bindings:
+            key = self.__cache_keys[binding.pk]
+            if key not in cached:
+                pending.append(binding)
+                continue
+            self.logger.debug(
+                "P_ENG: Taking result from cache",
+                binding=binding,
+                cache_key=key,
+                request=self.request,
+            )
+            self.__cached_policies.append(cached[key])
+        return pending
+
+    def _write_cache(self):
+        """Write all results evaluated in this run to the cache at once"""
+        if not self.request.should_cache:
+            return
+        # Only results from `PolicyProcess.execute` have a source binding, unexpected errors
+        # and timeouts are not cached
+        POLICY_CACHE.set_many(
+            {
+                self.__cache_keys[proc_info.binding.pk]: proc_info.result
+                for proc_info in self.__processes
+                if proc_info.result
+                and proc_info.result.source_binding
+                and proc_info.binding.pk in self.__cache_keys
+            }
         )
-        self.__cached_policies.append(cached_policy)
-        return True
 
     def compute_static_bindings(self, bindings: QuerySet[PolicyBinding]):
         """Check static bindings if possible"""
@@ -141,6 +191,98 @@ class PolicyEngine:
             passing = False
         self.__static_result = PolicyResult(passing)
 
+    def _start_process(self, binding: PolicyBinding) -> PolicyProcessInfo:
+        """Start evaluating a single binding in a forked process (or inline, if we can't fork)"""
+        self.logger.debug("P_ENG: Evaluating policy", binding=binding, request=self.request)
+        our_end, task_end = Pipe(False)
+        task = PolicyProcess(binding, self.request, task_end)
+        task.daemon = False
+        self.logger.debug("P_ENG: Starting Process", binding=binding, request=self.request)
+        if not CURRENT_PROCESS._config.get("daemon"):
+            task.run()
+        else:
+            task.start()
+        return PolicyProcessInfo(process=task, connection=our_end, binding=binding)
+
+    def _wait_process(self, proc_info: PolicyProcessInfo):
+        """Wait for a forked process to finish and receive its result"""
+        if not proc_info.process:
+            return
+        if proc_info.process.is_alive():
+            proc_info.process.join(proc_info.binding.timeout)
+        # Only call .recv() if no result is saved, otherwise we just deadlock here
+        if not proc_info.result:
+            proc_info.result = proc_info.connection.recv()
+
+    def _is_decided(self) -> bool:
+        """Check if the results so far already determine the outcome of the engine"""
+        results = [x.result for x in self.__processes if x.result] + self.__cached_policies
+        if self.__static_result:
+            results.append(self.__static_result)
+        if self.mode == PolicyEngineMode.MODE_ALL:
+            return any(not x.passing for x in results)
+        if self.mode == PolicyEngineMode.MODE_ANY:
+            return any(x.passing for x in results)
+        return False
+
+    def _evaluate_ordered(self, bindings: list[PolicyBinding], use_pool: bool):
+        """Evaluate bindings one by one, cheapest first, and skip the remaining bindings
+        as soon as the outcome is determined"""
+        # Bindings without any history are estimated at 0, so they are evaluated (and measured)
+        # first
+        for binding in sorted(bindings, key=lambda x: (average_execution_time(x), x.order)):
+            if self._is_decided():
+                self.logger.debug("P_ENG: Skipping policy", binding=binding, request=self.request)
+                self.__skipped_policies.append(SkippedPolicyResult(binding))
+                continue
+            if use_pool:
+                self._evaluate_pool([binding])
+                continue
+            start = perf_counter()
+            proc_info = self._start_process(binding)
+            self._wait_process(proc_info)
+            # Executions in a forked process are only measured in the forked process
+            if proc_info.process.pid:
+                observe_execution_time(binding, perf_counter() - start)
+            self.__processes.append(proc_info)
+
+    def _evaluate_pool(self, bindings: list[PolicyBinding]):
+        """Dispatch bindings to the worker pool at once and wait for their results. Each
+        binding's timeout is counted from the time its evaluation starts. Bindings which don't
+        fit into the pool are evaluated like they are without the pool."""
+        self.logger.debug(
+            "P_ENG: Evaluating policies", bindings=bindings, request=self.request, pool=True
+        )
+        tasks, overflow = get_policy_pool().dispatch(bindings, self.request)
+        if overflow:
+            self.logger.info(
+                "P_ENG: Policy worker pool saturated, evaluating outside of pool",
+                bindings=overflow,
+            )
+            for binding in overflow:
+                self.__processes.append(self._start_process(binding))
+        for task in tasks:
+            proc_info = PolicyProcessInfo(process=None, connection=None, binding=task.binding)
+            proc_info.result = self._wait_task(task)
+            self.__processes.append(proc_info)
+
+    def _wait_task(self, task: PolicyTask) -> PolicyResult:
+        """Wait for the result of a single pool task"""
+        binding = task.binding
+        # Threads are only handed out when idle, but other engines might still have
+        # claimed the thread in the meantime
+        if not task.started.wait(binding.timeout) and task.future.cancel():
+            self.logger.warning("P_ENG: Policy worker pool saturated", binding=binding)
+            return PolicyResult(binding.failure_result, "Policy worker pool saturated")
+        task.started.wait()
+        remaining = max(binding.timeout - (perf_counter() - task.started_at), 0)
+        try:
+            return task.future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # The thread can't be stopped, it keeps its slot in the pool until it finishes
+            self.logger.warning("P_ENG: Policy timed out", binding=binding, timeout=binding.timeout)
+            return PolicyResult(binding.failure_result, "Policy execution timed out")
+
     def build(self) -> "PolicyEngine":
         """Build wrapper which monitors performance"""
         with (
@@ -161,31 +303,23 @@ class PolicyEngine:
             if isinstance(bindings, QuerySet):
                 self.compute_static_bindings(bindings)
                 policy_bindings = [x for x in bindings if x.policy]
+            use_pool = CONFIG.get("policies.executor") == EXECUTOR_THREAD
             for binding in policy_bindings:
                 self.__expected_result_count += 1
 
                 self._check_policy_type(binding)
-                if self._check_cache(binding):
-                    continue
-                self.logger.debug("P_ENG: Evaluating policy", binding=binding, request=self.request)
-                our_end, task_end = Pipe(False)
-                task = PolicyProcess(binding, self.request, task_end)
-                task.daemon = False
-                self.logger.debug("P_ENG: Starting Process", binding=binding, request=self.request)
-                if not CURRENT_PROCESS._config.get("daemon"):
-                    task.run()
-                else:
-                    task.start()
-                self.__processes.append(
-                    PolicyProcessInfo(process=task, connection=our_end, binding=binding)
-                )
+            pending = self._check_cache(list(policy_bindings))
+            if self.short_circuit:
+                self._evaluate_ordered(pending, use_pool)
+            elif use_pool and pending:
+                self._evaluate_pool(pending)
+            else:
+                for binding in pending:
+                    self.__processes.append(self._start_process(binding))
             # If all policies are cached, we have an empty list here.
             for proc_info in self.__processes:
-                if proc_info.process.is_alive():
-                    proc_info.process.join(proc_info.binding.timeout)
-                # Only call .recv() if no result is saved, otherwise we just deadlock here
-                if not proc_info.result:
-                    proc_info.result = proc_info.connection.recv()
+                self._wait_process(proc_info)
+            self._write_cache()
             return self
 
     @property
@@ -194,7 +328,9 @@ class PolicyEngine:
         self.__processes.sort(key=lambda x: x.binding.order)
         process_results: list[PolicyResult] = [x.result for x in self.__processes if x.result]
         all_results = list(process_results + self.__cached_policies)
-        if len(all_results) < self.__expected_result_count:  # pragma: no cover
+        if (
+            len(all_results) + len(self.__skipped_policies) < self.__expected_result_count
+        ):  # pragma: no cover
             raise AssertionError("Got less results than polices")
         if self.__static_result:
             all_results.append(self.__static_result)
@@ -207,7 +343,8 @@ class PolicyEngine:
         if self.mode == PolicyEngineMode.MODE_ANY:
             passing = any(x.passing for x in all_results)
         result = PolicyResult(passing)
-        result.source_results = all_results
+        # Skipped bindings are reported, but neither count towards the result nor its messages
+        result.source_results = all_results + self.__skipped_policies
         result.messages = tuple(y for x in all_results for y in x.messages)
         return result
 
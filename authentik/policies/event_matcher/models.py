@@ -90,8 +90,16 @@ class EventMatcherPolicy(Policy):
         if "event" not in request.context:
             return PolicyResult(False)
         event: Event = request.context["event"]
+        matches = self.event_checks(request, event)
+        passing = all(x.passing for x in matches)
+        messages = chain(*[x.messages for x in matches])
+        result = PolicyResult(passing, *messages)
+        result.source_results = matches
+        return result
+
+    def event_checks(self, request: PolicyRequest, event: Event) -> list[PolicyResult]:
+        """Run all configured checks against `event`"""
         matches: list[PolicyResult] = []
-        messages = []
         checks = [
             self.passes_action,
             self.passes_client_ip,
@@ -108,11 +116,7 @@ class EventMatcherPolicy(Policy):
                 result=result,
             )
             matches.append(result)
-        passing = all(x.passing for x in matches)
-        messages = chain(*[x.messages for x in matches])
-        result = PolicyResult(passing, *messages)
-        result.source_results = matches
-        return result
+        return matches
 
     def passes_action(self, request: PolicyRequest, event: Event) -> PolicyResult | None:
         """Check if `self.action` matches"""
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.11 on 2025-07-14 10:21
+
+import uuid
+
+import django.db.models.deletion
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import F, Max, Window
+from django.db.models.fields.json import KT
+from django.db.models.functions import RowNumber
+
+DEFAULT_HISTORY_SIZE = 5
+
+
+def populate_login_history(apps: Apps, schema_editor: BaseDatabaseSchemaEditor):
+    db_alias = schema_editor.connection.alias
+    Event = apps.get_model("authentik_events", "Event")
+    User = apps.get_model("authentik_core", "User")
+    GeoIPPolicy = apps.get_model("authentik_policies_geoip", "GeoIPPolicy")
+    GeoIPLoginHistory = apps.get_model("authentik_policies_geoip", "GeoIPLoginHistory")
+
+    size = GeoIPPolicy.objects.using(db_alias).aggregate(size=Max("history_login_count"))["size"]
+    size = max(size or 0, DEFAULT_HISTORY_SIZE)
+    users = {str(pk) for pk in User.objects.using(db_alias).values_list("pk", flat=True)}
+    logins = (
+        Event.objects.using(db_alias)
+        .filter(action="login")
+        .annotate(
+            user_pk=KT("user__pk"),
+            lat=KT("context__geo__lat"),
+            long=KT("context__geo__long"),
+            row=Window(RowNumber(), partition_by=KT("user__pk"), order_by=F("created").desc()),
+        )
+        .filter(row__lte=size)
+        .values_list("user_pk", "lat", "long", "created")
+    )
+    rows = []
+    for user_pk, lat, long, created in logins.iterator():
+        if user_pk not in users:
+            continue
+        rows.append(
+            GeoIPLoginHistory(
+                user_id=int(user_pk),
+                latitude=float(lat) if lat is not None else None,
+                longitude=float(long) if long is not None else None,
+                created=created,
+            )
+        )
+    GeoIPLoginHistory.objects.using(db_alias).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_policies_geoip", "0002_geoippolicy_check_history_distance_and_more"),
+        ("authentik_events", "0010_rename_group_notificationrule_destination_group_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeoIPLoginHistory",
+            fields=[
+                (
+                    "login_uuid",
+                    models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False),
+                ),
+                ("latitude", models.FloatField(null=True)),
+                ("longitude", models.FloatField(null=True)),
+                ("created", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "GeoIP Login history",
+                "verbose_name_plural": "GeoIP Login histories",
+                "indexes": [
+                    models.Index(fields=["user", "-created"], name="authentik_p_geoip_login_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(populate_login_history, migrations.RunPython.noop),
+    ]
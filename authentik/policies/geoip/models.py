@@ -1,23 +1,44 @@
 """GeoIP policy"""
 
 from itertools import chain
+from math import asin, cos, radians, sin, sqrt
+from uuid import uuid4
 
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import Max
 from django.utils.timezone import now
 from django.utils.translation import gettext as _
 from django_countries.fields import CountryField
-from geopy import distance
 from rest_framework.serializers import BaseSerializer
 
+from authentik.core.models import User
 from authentik.events.context_processors.geoip import GeoIPDict
-from authentik.events.models import Event, EventAction
+from authentik.events.models import Event
 from authentik.policies.exceptions import PolicyException
 from authentik.policies.geoip.exceptions import GeoIPNotFoundException
 from authentik.policies.models import Policy
 from authentik.policies.types import PolicyRequest, PolicyResult
 
 MAX_DISTANCE_HOUR_KM = 1000
+EARTH_RADIUS_KM = 6371.0088
+# Number of logins kept per user when no policy requires more
+DEFAULT_HISTORY_SIZE = 5
+
+
+def haversine_km(origin: tuple[float, float], points: list[tuple[float, float]]) -> list[float]:
+    """Great-circle distances in km from `origin` to all `points`, as (latitude, longitude)"""
+    lat, long = radians(origin[0]), radians(origin[1])
+    cos_lat = cos(lat)
+    distances = []
+    for point in points:
+        point_lat, point_long = radians(point[0]), radians(point[1])
+        hav = (
+            sin((point_lat - lat) / 2) ** 2
+            + cos_lat * cos(point_lat) * sin((point_long - long) / 2) ** 2
+        )
+        distances.append(2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(hav))))
+    return distances
 
 
 class GeoIPPolicy(Policy):
@@ -113,29 +134,25 @@ class GeoIPPolicy(Policy):
     def passes_distance(self, request: PolicyRequest) -> PolicyResult:
         """Check if current policy execution is out of distance range compared
         to previous authentication requests"""
-        # Get previous login event and GeoIP data
-        previous_logins = Event.objects.filter(
-            action=EventAction.LOGIN,
-            user__pk=request.user.pk,  # context__geo__isnull=False
-        ).order_by("-created")[: self.history_login_count]
+        previous_logins = list(
+            GeoIPLoginHistory.objects.filter(user__pk=request.user.pk).order_by("-created")[
+                : self.history_login_count
+            ]
+        )
         _now = now()
         geoip_data: GeoIPDict | None = request.context.get("geoip")
         if not geoip_data:
             return PolicyResult(False)
-        if not previous_logins.exists():
+        if not previous_logins:
             return PolicyResult(True)
+        previous_logins = [login for login in previous_logins if login.latitude is not None]
+        distances = haversine_km(
+            (geoip_data["lat"], geoip_data["long"]),
+            [(login.latitude, login.longitude) for login in previous_logins],
+        )
         result = False
-        for previous_login in previous_logins:
-            if "geo" not in previous_login.context:
-                continue
-            previous_login_geoip: GeoIPDict = previous_login.context["geo"]
-
-            # Figure out distance
-            dist = distance.geodesic(
-                (previous_login_geoip["lat"], previous_login_geoip["long"]),
-                (geoip_data["lat"], geoip_data["long"]),
-            )
-            if self.check_history_distance and dist.km >= (
+        for previous_login, dist_km in zip(previous_logins, distances, strict=True):
+            if self.check_history_distance and dist_km >= (
                 self.history_max_distance_km + self.distance_tolerance_km
             ):
                 return PolicyResult(
@@ -146,7 +163,7 @@ class GeoIPPolicy(Policy):
             # (round down to the lowest closest time of hours)
             # clamped to be at least 1 hour
             rel_time_hours = max(int((_now - previous_login.created).total_seconds() / 3600), 1)
-            if self.check_impossible_travel and dist.km >= (
+            if self.check_impossible_travel and dist_km >= (
                 (MAX_DISTANCE_HOUR_KM * rel_time_hours) + self.distance_tolerance_km
             ):
                 return PolicyResult(False, _("Distance is further than possible."))
@@ -156,3 +173,45 @@ class GeoIPPolicy(Policy):
     class Meta(Policy.PolicyMeta):
         verbose_name = _("GeoIP Policy")
         verbose_name_plural = _("GeoIP Policies")
+
+
+class GeoIPLoginHistory(models.Model):
+    """Location of the most recent logins of a user, used by distance checks instead
+    of querying the events table. Written for each login event, logins without
+    GeoIP data are stored without a location."""
+
+    login_uuid = models.UUIDField(primary_key=True, default=uuid4)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    created = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created"], name="authentik_p_geoip_login_idx")]
+        verbose_name = _("GeoIP Login history")
+        verbose_name_plural = _("GeoIP Login histories")
+
+    def __str__(self):
+        return f"GeoIP Login history {self.user_id} at {self.created}"
+
+    @staticmethod
+    def history_size() -> int:
+        """Number of logins to keep per user, the most any policy checks"""
+        size = GeoIPPolicy.objects.aggregate(size=Max("history_login_count"))["size"]
+        return max(size or 0, DEFAULT_HISTORY_SIZE)
+
+    @classmethod
+    def record(cls, event: Event):
+        """Record a login event, and remove logins of the user which are not checked anymore"""
+        user_pk = event.user.get("pk")
+        if not user_pk or not User.objects.filter(pk=user_pk).exists():
+            return
+        geo: GeoIPDict = event.context.get("geo", {})
+        cls.objects.create(
+            user_id=user_pk,
+            latitude=geo.get("lat"),
+            longitude=geo.get("long"),
+            created=event.created,
+        )
+        outdated = cls.objects.filter(user_id=user_pk).order_by("-created")[cls.history_size() :]
+        cls.objects.filter(pk__in=list(outdated.values_list("pk", flat=True))).delete()
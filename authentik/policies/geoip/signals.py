@@ -0,0 +1,15 @@
+"""GeoIP policy signals"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from authentik.events.models import Event, EventAction
+from authentik.policies.geoip.models import GeoIPLoginHistory
+
+
+@receiver(post_save, sender=Event)
+def event_post_save_login_history(sender, instance: Event, created: bool, **_):
+    """Keep track of login locations for distance checks"""
+    if not created or instance.action != EventAction.LOGIN:
+        return
+    GeoIPLoginHistory.record(instance)
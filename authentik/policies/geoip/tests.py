@@ -8,7 +8,12 @@ from authentik.events.utils import get_user
 from authentik.policies.engine import PolicyRequest, PolicyResult
 from authentik.policies.exceptions import PolicyException
 from authentik.policies.geoip.exceptions import GeoIPNotFoundException
-from authentik.policies.geoip.models import GeoIPPolicy
+from authentik.policies.geoip.models import (
+    DEFAULT_HISTORY_SIZE,
+    GeoIPLoginHistory,
+    GeoIPPolicy,
+    haversine_km,
+)
 
 
 class TestGeoIPPolicy(TestCase):
@@ -228,3 +233,25 @@ class TestGeoIPPolicy(TestCase):
 
         result: PolicyResult = policy.passes(self.request)
         self.assertFalse(result.passing)
+
+    def test_history_pruned(self):
+        """Test that only the logins which are checked are kept"""
+        GeoIPPolicy.objects.create(check_history_distance=True, history_login_count=2)
+        for _ in range(DEFAULT_HISTORY_SIZE + 2):
+            Event.objects.create(
+                action=EventAction.LOGIN,
+                user=get_user(self.user),
+                context={
+                    "geo": {"lat": 55.868351, "long": -104.441011},
+                },
+            )
+        history = GeoIPLoginHistory.objects.filter(user=self.user)
+        self.assertEqual(history.count(), DEFAULT_HISTORY_SIZE)
+        self.assertEqual(history.first().latitude, 55.868351)
+
+    def test_haversine(self):
+        """Test distance calculation"""
+        # Berlin to Paris
+        distances = haversine_km((52.52, 13.405), [(52.52, 13.405), (48.8566, 2.3522)])
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 878, delta=2)
@@ -0,0 +1,64 @@
+"""Benchmark policy evaluation"""
+
+from time import perf_counter
+
+from django.core.management.base import no_translations
+
+from authentik.core.tests.utils import create_test_user
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+from authentik.policies.engine import PolicyEngine
+from authentik.policies.expression.models import ExpressionPolicy
+from authentik.policies.models import PolicyBinding, PolicyBindingModel
+from authentik.policies.pool import EXECUTOR_FORK, EXECUTOR_THREAD
+from authentik.tenants.management import TenantCommand
+
+
+class Command(TenantCommand):
+    """Benchmark how many policy checks can be done per second, with each executor"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bindings", type=int, default=5)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--executor",
+            choices=[EXECUTOR_FORK, EXECUTOR_THREAD],
+            action="append",
+            help="Executor to benchmark, can be given multiple times. Defaults to all executors.",
+        )
+        parser.add_argument("--expression", type=str, default="return True")
+
+    @no_translations
+    def handle_per_tenant(self, *args, **options):
+        """Start benchmark"""
+        iterations = options["iterations"]
+        pbm = PolicyBindingModel.objects.create()
+        user = create_test_user()
+        policies = [
+            ExpressionPolicy.objects.create(name=generate_id(), expression=options["expression"])
+            for _ in range(options["bindings"])
+        ]
+        for order, policy in enumerate(policies):
+            PolicyBinding.objects.create(target=pbm, policy=policy, order=order)
+        try:
+            for executor in options["executor"] or [EXECUTOR_FORK, EXECUTOR_THREAD]:
+                durations = []
+                with CONFIG.patch("policies.executor", executor):
+                    for _ in range(iterations):
+                        start = perf_counter()
+                        engine = PolicyEngine(pbm, user)
+                        engine.use_cache = False
+                        engine.build()
+                        durations.append(perf_counter() - start)
+                durations.sort()
+                self.stdout.write(
+                    f"{executor} with {len(policies)} bindings: "
+                    f"{iterations / sum(durations):.1f} checks/s, "
+                    f"avg {sum(durations) / iterations * 1000:.2f}ms, "
+                    f"p99 {durations[int(iterations * 0.99)] * 1000:.2f}ms\n"
+                )
+        finally:
+            pbm.delete()
+            for policy in policies:
+                policy.delete()
+            user.delete()
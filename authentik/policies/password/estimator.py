@@ -0,0 +1,121 @@
+"""Bounded and cached zxcvbn password strength estimation"""
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from json import dumps
+from multiprocessing import current_process
+from os import getpid
+from threading import Event, Lock
+from time import perf_counter
+from typing import Any
+
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from prometheus_client import Histogram
+from zxcvbn import zxcvbn
+
+from authentik.lib.config import CONFIG
+from authentik.policies.process import PolicyProcess
+
+CACHE_KEY_PREFIX = "goauthentik.io/policies/password/zxcvbn/"
+HIST_ZXCVBN_TIME = Histogram(
+    "authentik_policies_password_zxcvbn_time",
+    "Duration of zxcvbn password strength estimations",
+    ["cached"],
+)
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_PID: int | None = None
+_EXECUTOR_LOCK = Lock()
+
+
+class EstimationTimeout(Exception):
+    """zxcvbn did not finish within the configured timeout"""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the executor, re-creating it when the process has been forked since,
+    as threads don't survive a fork"""
+    global _EXECUTOR, _EXECUTOR_PID  # noqa: PLW0603
+    with _EXECUTOR_LOCK:
+        if not _EXECUTOR or _EXECUTOR_PID != getpid():
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=CONFIG.get_int("policies.password.zxcvbn_workers", 2),
+                thread_name_prefix="authentik-zxcvbn",
+            )
+            _EXECUTOR_PID = getpid()
+        return _EXECUTOR
+
+
+def _estimate(password: str, user_inputs: list[str]) -> dict[str, Any]:
+    result = zxcvbn(password, user_inputs)
+    # Only keep what's needed, the full result contains the password
+    return {
+        "score": result["score"],
+        "feedback": {
+            "warning": result["feedback"]["warning"],
+            "suggestions": result["feedback"]["suggestions"],
+        },
+    }
+
+
+class _Estimation:
+    """A single estimation submitted to the executor, tracks when it actually started"""
+
+    def __init__(self, password: str, user_inputs: list[str]):
+        self.password = password
+        self.user_inputs = user_inputs
+        self.started = Event()
+        self.started_at = 0.0
+
+    def run(self) -> dict[str, Any]:
+        self.started_at = perf_counter()
+        self.started.set()
+        return _estimate(self.password, self.user_inputs)
+
+
+def _estimate_pooled(password: str, user_inputs: list[str]) -> dict[str, Any]:
+    timeout = float(CONFIG.get("policies.password.zxcvbn_timeout", 1))
+    estimation = _Estimation(password, user_inputs)
+    future = _get_executor().submit(estimation.run)
+    try:
+        # Waiting for a free thread is bounded by the timeout as well
+        if not estimation.started.wait(timeout) and future.cancel():
+            raise EstimationTimeout("Password strength estimation timed out waiting for a thread")
+        estimation.started.wait()
+        remaining = max(timeout - (perf_counter() - estimation.started_at), 0)
+        return future.result(timeout=remaining)
+    except FutureTimeoutError as exc:
+        raise EstimationTimeout("Password strength estimation timed out") from exc
+
+
+def estimate_strength(password: str, user_inputs: list[str]) -> dict[str, Any]:
+    """Estimate the strength of `password` with zxcvbn, returning its score and feedback.
+
+    Estimations run in a bounded pool of threads and raise `EstimationTimeout` when they
+    take longer than `policies.password.zxcvbn_timeout` seconds after they started, or
+    don't get a thread within that time. In forked policy processes, estimations run
+    directly instead, and are bounded by the binding's timeout. Results are cached for a
+    short time, keyed by a salted hash of the password and the user inputs, so that
+    re-validating the same prompt doesn't estimate again."""
+    start = perf_counter()
+    digest = salted_hmac(
+        CACHE_KEY_PREFIX, dumps([password, user_inputs]), algorithm="sha256"
+    ).hexdigest()
+    key = f"{CACHE_KEY_PREFIX}{digest}"
+    result = cache.get(key)
+    if result is not None:
+        HIST_ZXCVBN_TIME.labels(cached="true").observe(perf_counter() - start)
+        return result
+    try:
+        if isinstance(current_process(), PolicyProcess):
+            # Policy processes only live for a single policy execution and are killed when
+            # the binding times out. A pool in each of them wouldn't limit the number of
+            # threads, and the process would wait for a timed out thread before exiting
+            result = _estimate(password, user_inputs)
+        else:
+            result = _estimate_pooled(password, user_inputs)
+    finally:
+        HIST_ZXCVBN_TIME.labels(cached="false").observe(perf_counter() - start)
+    cache.set(key, result, CONFIG.get_int("policies.password.zxcvbn_cache_timeout", 300))
+    return result
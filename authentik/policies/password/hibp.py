@@ -0,0 +1,183 @@
+"""haveibeenpwned backends"""
+
+from collections.abc import Iterable
+from mmap import ACCESS_READ, mmap
+from os import replace
+from pathlib import Path
+from struct import Struct
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import monotonic
+
+from django.core.cache import cache
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+from authentik.lib.utils.http import get_pooled_http_session
+
+LOGGER = get_logger()
+HIBP_API_URL = "https://api.pwnedpasswords.com/range/"
+CACHE_KEY_PREFIX = "goauthentik.io/policies/password/hibp/"
+
+BACKEND_API = "api"
+BACKEND_CACHE = "cache"
+BACKEND_LOCAL = "local"
+
+# Corpus files start with this header, followed by records of the binary SHA-1 digest
+# and the count as unsigned 32-bit integer, sorted by digest
+CORPUS_HEADER = b"AKHIBP1\n"
+CORPUS_RECORD = Struct(">20sI")
+# How often the corpus file is checked for updates, in seconds
+CORPUS_CHECK_INTERVAL = 60
+
+
+class HIBPCorpusError(Exception):
+    """Error reading or writing a local haveibeenpwned corpus"""
+
+
+class HIBPBackend:
+    """Get all hashes with a given prefix, in the format of the haveibeenpwned range API"""
+
+    def get_range(self, prefix: str) -> str:
+        """Get all hashes starting with the 5 character hex `prefix`, as lines of
+        `<suffix>:<count>` separated by CRLF"""
+        raise NotImplementedError
+
+
+class APIHIBPBackend(HIBPBackend):
+    """Query the haveibeenpwned API for each password"""
+
+    def get_range(self, prefix: str) -> str:
+        response = get_pooled_http_session().get(f"{HIBP_API_URL}{prefix}")
+        response.raise_for_status()
+        return response.text
+
+
+class CachedAPIHIBPBackend(APIHIBPBackend):
+    """Query the haveibeenpwned API and cache the response for each prefix. There are only
+    16^5 prefixes, so the cache is hit for most passwords once it's warm. With all prefixes
+    cached, this takes up several gigabytes of cache."""
+
+    def get_range(self, prefix: str) -> str:
+        key = f"{CACHE_KEY_PREFIX}{prefix.upper()}"
+        hashes = cache.get(key)
+        if hashes is None:
+            hashes = super().get_range(prefix)
+            cache.set(key, hashes, CONFIG.get_int("policies.password.hibp_cache_timeout", 86400))
+        return hashes
+
+
+class LocalHIBPBackend(HIBPBackend):
+    """Look up hashes in a local copy of the haveibeenpwned corpus, see
+    `ak import_hibp_corpus`. The file is memory-mapped and searched with a binary search,
+    and re-opened when it has been replaced."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        self._mmap: mmap | None = None
+        self._mtime = 0.0
+        self._last_check = 0.0
+
+    def _open(self) -> mmap:
+        now = monotonic()
+        with self._lock:
+            if self._mmap and now - self._last_check < CORPUS_CHECK_INTERVAL:
+                return self._mmap
+            self._last_check = now
+            try:
+                mtime = Path(self.path).stat().st_mtime
+                if self._mmap and mtime == self._mtime:
+                    return self._mmap
+                with open(self.path, "rb") as corpus:
+                    mapped = mmap(corpus.fileno(), 0, access=ACCESS_READ)
+            except (OSError, ValueError) as exc:
+                raise HIBPCorpusError(f"Failed to open corpus {self.path}: {exc}") from exc
+            if mapped[: len(CORPUS_HEADER)] != CORPUS_HEADER or (
+                (len(mapped) - len(CORPUS_HEADER)) % CORPUS_RECORD.size != 0
+            ):
+                mapped.close()
+                raise HIBPCorpusError(f"Invalid corpus {self.path}")
+            # The previous map is not closed, as other threads might still be reading it
+            self._mmap, self._mtime = mapped, mtime
+            LOGGER.info("Loaded HIBP corpus", path=self.path, records=self._count(mapped))
+            return mapped
+
+    @staticmethod
+    def _count(mapped: mmap) -> int:
+        return (len(mapped) - len(CORPUS_HEADER)) // CORPUS_RECORD.size
+
+    @staticmethod
+    def _prefix_at(mapped: mmap, index: int) -> int:
+        """First 20 bits of the digest of the record at `index`"""
+        offset = len(CORPUS_HEADER) + index * CORPUS_RECORD.size
+        return int.from_bytes(mapped[offset : offset + 3], "big") >> 4
+
+    def get_range(self, prefix: str) -> str:
+        mapped = self._open()
+        target = int(prefix, 16)
+        low, high = 0, self._count(mapped)
+        while low < high:
+            middle = (low + high) // 2
+            if self._prefix_at(mapped, middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        hashes = []
+        offset = len(CORPUS_HEADER) + low * CORPUS_RECORD.size
+        while offset + CORPUS_RECORD.size <= len(mapped):
+            digest, count = CORPUS_RECORD.unpack_from(mapped, offset)
+            full_hash = digest.hex().upper()
+            if int(full_hash[:5], 16) != target:
+                break
+            hashes.append(f"{full_hash[5:]}:{count}")
+            offset += CORPUS_RECORD.size
+        return "\r\n".join(hashes)
+
+
+def write_corpus(path: str, hashes: Iterable[tuple[str, int]]) -> int:
+    """Write a corpus from `(sha1 hex, count)` tuples sorted by hash. The file is written
+    next to `path` and moved into place once complete, so readers never see a partial file.
+    Returns the number of hashes written."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    previous = b""
+    with NamedTemporaryFile("wb", dir=target.parent, delete=False) as corpus:
+        try:
+            corpus.write(CORPUS_HEADER)
+            for full_hash, count in hashes:
+                digest = bytes.fromhex(full_hash)
+                if len(digest) != CORPUS_RECORD.size - 4 or digest <= previous:
+                    raise HIBPCorpusError(
+                        f"Hashes must be unique SHA-1 hashes in order, got {full_hash}"
+                    )
+                corpus.write(CORPUS_RECORD.pack(digest, min(count, 2**32 - 1)))
+                previous = digest
+                written += 1
+        except BaseException:
+            Path(corpus.name).unlink(missing_ok=True)
+            raise
+    replace(corpus.name, target)
+    return written
+
+
+_BACKEND: HIBPBackend | None = None
+_BACKEND_LOCK = Lock()
+
+
+def get_hibp_backend() -> HIBPBackend:
+    """Get the configured haveibeenpwned backend"""
+    global _BACKEND  # noqa: PLW0603
+    backend = CONFIG.get("policies.password.hibp_backend", BACKEND_API)
+    with _BACKEND_LOCK:
+        if backend == BACKEND_LOCAL:
+            path = CONFIG.get("policies.password.hibp_corpus")
+            if not isinstance(_BACKEND, LocalHIBPBackend) or _BACKEND.path != path:
+                _BACKEND = LocalHIBPBackend(path)
+        elif backend == BACKEND_CACHE:
+            if type(_BACKEND) is not CachedAPIHIBPBackend:
+                _BACKEND = CachedAPIHIBPBackend()
+        elif type(_BACKEND) is not APIHIBPBackend:
+            _BACKEND = APIHIBPBackend()
+        return _BACKEND
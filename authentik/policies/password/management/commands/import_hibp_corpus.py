@@ -0,0 +1,88 @@
+"""Import or refresh a local copy of the haveibeenpwned corpus"""
+
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from sys import exit as sys_exit
+
+from django.core.management.base import BaseCommand, no_translations
+
+from authentik.lib.config import CONFIG
+from authentik.policies.password.hibp import APIHIBPBackend, HIBPCorpusError, write_corpus
+
+# Number of hash prefixes in the haveibeenpwned range API
+PREFIX_COUNT = 16**5
+
+
+class Command(BaseCommand):
+    """Import or refresh a local copy of the haveibeenpwned corpus"""
+
+    help = (
+        "Import a local copy of the haveibeenpwned password hashes, used when "
+        "policies.password.hibp_backend is set to local."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            type=str,
+            help=(
+                "File with SHA-1 hashes ordered by hash, with one `<hash>:<count>` per line, "
+                "as created by the haveibeenpwned downloader."
+            ),
+        )
+        parser.add_argument(
+            "--download",
+            action="store_true",
+            help="Download all hashes from the haveibeenpwned API instead.",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Path to write the corpus to, defaults to policies.password.hibp_corpus.",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+
+    @no_translations
+    def handle(self, *args, **options):
+        """Import corpus"""
+        output = options["output"] or CONFIG.get("policies.password.hibp_corpus")
+        if options["download"]:
+            hashes = self.download(options["workers"])
+        elif options["source"]:
+            hashes = self.read(options["source"])
+        else:
+            self.stderr.write("Either --source or --download is required\n")
+            sys_exit(1)
+        try:
+            count = write_corpus(output, hashes)
+        except (HIBPCorpusError, OSError, ValueError) as exc:
+            self.stderr.write(f"Failed to import corpus: {exc}\n")
+            sys_exit(1)
+        self.stdout.write(f"Imported {count} hashes into {output}\n")
+
+    def read(self, path: str) -> Generator[tuple[str, int]]:
+        """Read hashes from a file"""
+        with open(path, encoding="utf-8") as source:
+            for raw_line in source:
+                line = raw_line.strip()
+                if not line:
+                    continue
+                full_hash, _, count = line.partition(":")
+                yield full_hash, int(count or 0)
+
+    def download(self, workers: int) -> Generator[tuple[str, int]]:
+        """Download hashes of all prefixes from the API, in order"""
+        backend = APIHIBPBackend()
+        chunk_size = workers * 64
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, PREFIX_COUNT, chunk_size):
+                prefixes = [f"{i:05X}" for i in range(start, min(start + chunk_size, PREFIX_COUNT))]
+                for prefix, hashes in zip(
+                    prefixes, executor.map(backend.get_range, prefixes), strict=True
+                ):
+                    for line in hashes.splitlines():
+                        suffix, _, count = line.partition(":")
+                        yield f"{prefix}{suffix}", int(count or 0)
+                done = start + len(prefixes)
+                if done % 2**16 < chunk_size or done == PREFIX_COUNT:
+                    self.stdout.write(f"Downloaded {done}/{PREFIX_COUNT} ranges\n")
@@ -5,12 +5,14 @@ from hashlib import sha1
 
 from django.db import models
 from django.utils.translation import gettext as _
+from requests.exceptions import RequestException
 from rest_framework.serializers import BaseSerializer
 from structlog.stdlib import get_logger
-from zxcvbn import zxcvbn
 
-from authentik.lib.utils.http import get_http_session
+from authentik.policies.exceptions import PolicyException
 from authentik.policies.models import Policy
+from authentik.policies.password.estimator import EstimationTimeout, estimate_strength
+from authentik.policies.password.hibp import HIBPCorpusError, get_hibp_backend
 from authentik.policies.types import PolicyRequest, PolicyResult
 from authentik.stages.prompt.stage import PLAN_CONTEXT_PROMPT
 
@@ -117,18 +119,22 @@ class PasswordPolicy(Policy):
         return PolicyResult(True)
 
     def check_hibp(self, short_hash: str) -> str:
-        """Check the haveibeenpwned API"""
-        url = f"https://api.pwnedpasswords.com/range/{short_hash}"
-        return get_http_session().get(url).text
+        """Check the haveibeenpwned API, or the configured alternative"""
+        return get_hibp_backend().get_range(short_hash)
 
     def passes_hibp(self, password: str, request: PolicyRequest) -> PolicyResult:
         """Check if password is in HIBP DB. Hashes given Password with SHA1, uses the first 5
         characters of Password in request and checks if full hash is in response. Returns 0
         if Password is not in result otherwise the count of how many times it was used."""
         pw_hash = sha1(password.encode("utf-8")).hexdigest()  # nosec
-        result = self.check_hibp(pw_hash[:5])
+        try:
+            result = self.check_hibp(pw_hash[:5])
+        except (HIBPCorpusError, RequestException) as exc:
+            raise PolicyException(exc) from exc
         final_count = 0
-        for line in result.split("\r\n"):
+        for line in result.splitlines():
+            if not line:
+                continue
             full_hash, count = line.split(":")
             if pw_hash[5:] == full_hash.lower():
                 final_count = int(count)
@@ -151,7 +157,11 @@ class PasswordPolicy(Policy):
         # Only calculate result for the first 72 characters, as with over 100 char
         # long passwords we can be reasonably sure that they'll surpass the score anyways
         # See https://github.com/dropbox/zxcvbn#runtime-latency
-        results = zxcvbn(password[:72], user_inputs)
+        try:
+            results = estimate_strength(password[:72], user_inputs)
+        except EstimationTimeout as exc:
+            LOGGER.warning("password check failed", check="zxcvbn", exc=exc)
+            raise PolicyException(exc) from exc
         LOGGER.debug("password failed", check="zxcvbn", score=results["score"])
         result = PolicyResult(results["score"] > self.zxcvbn_score_threshold)
         if not result.passing:
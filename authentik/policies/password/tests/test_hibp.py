@@ -1,9 +1,24 @@
 """Password Policy HIBP tests"""
 
+from hashlib import sha1
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
 from django.test import TestCase
 from guardian.shortcuts import get_anonymous_user
+from requests_mock import Mocker
 
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_key
+from authentik.policies.exceptions import PolicyException
+from authentik.policies.password.hibp import (
+    BACKEND_API,
+    BACKEND_CACHE,
+    BACKEND_LOCAL,
+    HIBP_API_URL,
+    HIBPCorpusError,
+    write_corpus,
+)
 from authentik.policies.password.models import PasswordPolicy
 from authentik.policies.types import PolicyRequest, PolicyResult
 from authentik.stages.prompt.stage import PLAN_CONTEXT_PROMPT
@@ -49,3 +64,71 @@ class TestPasswordPolicyHIBP(TestCase):
         result: PolicyResult = policy.passes(request)
         self.assertTrue(result.passing)
         self.assertEqual(result.messages, tuple())
+
+    def test_cache(self):
+        """Test that API responses are cached per prefix"""
+        policy = PasswordPolicy.objects.create(
+            check_have_i_been_pwned=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        password = generate_key()
+        pw_hash = sha1(password.encode("utf-8")).hexdigest().upper()  # nosec
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": password}
+        with CONFIG.patch("policies.password.hibp_backend", BACKEND_CACHE), Mocker() as mocker:
+            mocker.get(f"{HIBP_API_URL}{pw_hash[:5]}", text=f"{pw_hash[5:]}:3\r\n")
+            self.assertFalse(policy.passes(request).passing)
+            self.assertFalse(policy.passes(request).passing)
+            self.assertEqual(mocker.call_count, 1)
+
+    def test_api_error(self):
+        """Test that API errors fail the policy with an exception"""
+        policy = PasswordPolicy.objects.create(
+            check_have_i_been_pwned=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        password = generate_key()
+        pw_hash = sha1(password.encode("utf-8")).hexdigest().upper()  # nosec
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": password}
+        with CONFIG.patch("policies.password.hibp_backend", BACKEND_API), Mocker() as mocker:
+            mocker.get(f"{HIBP_API_URL}{pw_hash[:5]}", status_code=503)
+            with self.assertRaises(PolicyException):
+                policy.passes(request)
+
+    def test_local(self):
+        """Test local corpus"""
+        policy = PasswordPolicy.objects.create(
+            check_have_i_been_pwned=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        passwords = ["password", "123456", generate_key()]
+        hashes = sorted(
+            (sha1(password.encode("utf-8")).hexdigest().upper(), 10)  # nosec
+            for password in passwords
+        )
+        with TemporaryDirectory() as tmp:
+            corpus = str(Path(tmp) / "corpus.bin")
+            self.assertEqual(write_corpus(corpus, hashes), 3)
+            with (
+                CONFIG.patch("policies.password.hibp_backend", BACKEND_LOCAL),
+                CONFIG.patch("policies.password.hibp_corpus", corpus),
+            ):
+                for password in passwords:
+                    request = PolicyRequest(get_anonymous_user())
+                    request.context[PLAN_CONTEXT_PROMPT] = {"password": password}
+                    self.assertFalse(policy.passes(request).passing)
+                request = PolicyRequest(get_anonymous_user())
+                request.context[PLAN_CONTEXT_PROMPT] = {"password": generate_key()}
+                self.assertTrue(policy.passes(request).passing)
+
+    def test_local_unordered(self):
+        """Test that corpus files must be ordered"""
+        with TemporaryDirectory() as tmp:
+            corpus = Path(tmp) / "corpus.bin"
+            with self.assertRaises(HIBPCorpusError):
+                write_corpus(str(corpus), [("F" * 40, 1), ("0" * 40, 1)])
+            self.assertFalse(corpus.exists())
@@ -1,10 +1,18 @@
 """Password Policy zxcvbn tests"""
 
+from threading import Event
+from time import sleep
+from unittest.mock import MagicMock, patch
+
 from django.test import TestCase
 from guardian.shortcuts import get_anonymous_user
 
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_key
+from authentik.policies.exceptions import PolicyException
+from authentik.policies.password import estimator
 from authentik.policies.password.models import PasswordPolicy
+from authentik.policies.process import PolicyProcess
 from authentik.policies.types import PolicyRequest, PolicyResult
 from authentik.stages.prompt.stage import PLAN_CONTEXT_PROMPT
 
@@ -57,3 +65,91 @@ class TestPasswordPolicyZxcvbn(TestCase):
         result: PolicyResult = policy.passes(request)
         self.assertTrue(result.passing)
         self.assertEqual(result.messages, tuple())
+
+    def test_cached(self):
+        """Test that results are cached"""
+        policy = PasswordPolicy.objects.create(
+            check_zxcvbn=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": generate_key()}
+        with patch.object(estimator, "zxcvbn", wraps=estimator.zxcvbn) as zxcvbn:
+            self.assertTrue(policy.passes(request).passing)
+            self.assertTrue(policy.passes(request).passing)
+            self.assertEqual(zxcvbn.call_count, 1)
+
+    def test_timeout(self):
+        """Test that slow estimations fail the policy"""
+        policy = PasswordPolicy.objects.create(
+            check_zxcvbn=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": generate_key()}
+        with (
+            CONFIG.patch("policies.password.zxcvbn_timeout", 0.1),
+            patch.object(estimator, "zxcvbn", side_effect=lambda *_: sleep(0.5)),
+            self.assertRaises(PolicyException),
+        ):
+            policy.passes(request)
+
+    def test_timeout_queued(self):
+        """Test that time spent waiting for a thread doesn't count towards the timeout"""
+        policy = PasswordPolicy.objects.create(
+            check_zxcvbn=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": generate_key()}
+        clock = [0.0]
+        release = Event()
+        executor = estimator._get_executor()
+        # Occupy all threads until the estimation is queued
+        blockers = [
+            executor.submit(release.wait)
+            for _ in range(CONFIG.get_int("policies.password.zxcvbn_workers", 2))
+        ]
+        submit = executor.submit
+
+        def queue(*args):
+            future = submit(*args)
+            # Waiting for a thread and estimating each take more than half the timeout
+            clock[0] += 0.6
+            release.set()
+            return future
+
+        original = estimator.zxcvbn
+
+        def estimate(*args):
+            clock[0] += 0.6
+            return original(*args)
+
+        with (
+            CONFIG.patch("policies.password.zxcvbn_timeout", 1),
+            patch.object(estimator, "perf_counter", side_effect=lambda: clock[0]),
+            patch.object(executor, "submit", side_effect=queue),
+            patch.object(estimator, "zxcvbn", side_effect=estimate),
+        ):
+            self.assertTrue(policy.passes(request).passing)
+        for blocker in blockers:
+            blocker.result()
+
+    def test_policy_process(self):
+        """Test that estimations run directly in forked policy processes"""
+        policy = PasswordPolicy.objects.create(
+            check_zxcvbn=True,
+            check_static_rules=False,
+            name=generate_key(),
+        )
+        request = PolicyRequest(get_anonymous_user())
+        request.context[PLAN_CONTEXT_PROMPT] = {"password": generate_key()}
+        with (
+            patch.object(estimator, "current_process", return_value=MagicMock(spec=PolicyProcess)),
+            patch.object(estimator, "_get_executor") as get_executor,
+        ):
+            self.assertTrue(policy.passes(request).passing)
+            get_executor.assert_not_called()
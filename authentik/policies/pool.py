@@ -0,0 +1,138 @@
+"""authentik policy worker pool"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from os import getpid
+from threading import Event, Lock
+from time import perf_counter
+
+from django.db import close_old_connections, connection
+from django_tenants.utils import schema_context
+from structlog.stdlib import get_logger
+
+from authentik.lib.config import CONFIG
+from authentik.policies.models import PolicyBinding
+from authentik.policies.process import PolicyProcess
+from authentik.policies.types import PolicyRequest, PolicyResult
+
+LOGGER = get_logger()
+
+EXECUTOR_FORK = "fork"
+EXECUTOR_THREAD = "thread"
+
+
+def _evaluate(schema_name: str, binding: PolicyBinding, request: PolicyRequest) -> PolicyResult:
+    """Evaluate a single binding within a pool thread, equivalent of `PolicyProcess.run`"""
+    close_old_connections()
+    try:
+        with schema_context(schema_name):
+            return PolicyProcess(binding, request, None).profiling_wrapper()
+    except Exception as exc:
+        LOGGER.warning("Policy failed to run", exc=exc)
+        return PolicyResult(False, str(exc))
+    finally:
+        close_old_connections()
+
+
+class PolicyTask:
+    """A single binding submitted to the pool. Tracks when the evaluation actually started,
+    so the binding's timeout doesn't include the time spent waiting for a free thread."""
+
+    binding: PolicyBinding
+    future: Future[PolicyResult]
+    started: Event
+    started_at: float | None
+
+    def __init__(self, binding: PolicyBinding):
+        self.binding = binding
+        self.started = Event()
+        self.started_at = None
+
+    def run(self, schema_name: str, request: PolicyRequest) -> PolicyResult:
+        """Mark the task as started and evaluate the binding"""
+        self.started_at = perf_counter()
+        self.started.set()
+        return _evaluate(schema_name, self.binding, request)
+
+
+class PolicyWorkerPool:
+    """Long-lived pool of threads which evaluate policy bindings. The pool is shared by all
+    PolicyEngines of a process, instead of forking a new process for every binding."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pid: int | None = None
+        # Number of tasks which are either queued or running
+        self._pending = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Get the executor, re-creating it when the process has been forked since,
+        as threads don't survive a fork"""
+        with self._lock:
+            if not self._executor or self._pid != getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="authentik-policy"
+                )
+                self._pid = getpid()
+                self._pending = 0
+            return self._executor
+
+    def _release(self):
+        with self._lock:
+            self._pending = max(self._pending - 1, 0)
+
+    def _run(self, task: PolicyTask, schema_name: str, request: PolicyRequest) -> PolicyResult:
+        # Release the slot before the result is set, so waiters can immediately re-use it
+        try:
+            return task.run(schema_name, request)
+        finally:
+            self._release()
+
+    def _task_done(self, future: Future):
+        # Cancelled tasks never run, so they can't release their slot themselves
+        if future.cancelled():
+            self._release()
+
+    def dispatch(
+        self, bindings: list[PolicyBinding], request: PolicyRequest
+    ) -> tuple[list[PolicyTask], list[PolicyBinding]]:
+        """Submit the bindings of a single engine at once, as far as threads are idle.
+        Returns a task per submitted binding and the bindings which were not submitted, as
+        the pool is saturated. Those should be evaluated outside of the pool instead of
+        queueing behind other requests."""
+        executor = self.executor
+        schema_name = connection.schema_name
+        with self._lock:
+            idle = max(self.max_workers - self._pending, 0)
+            self._pending += min(idle, len(bindings))
+        tasks = []
+        for binding in bindings[:idle]:
+            task = PolicyTask(binding)
+            # Each task needs its own copy of the context, as a context can't be entered
+            # by multiple threads at once
+            task.future = executor.submit(copy_context().run, self._run, task, schema_name, request)
+            task.future.add_done_callback(self._task_done)
+            tasks.append(task)
+        return tasks, bindings[idle:]
+
+    def shutdown(self):
+        """Stop all threads of this pool"""
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pending = 0
+
+
+_POOL: PolicyWorkerPool | None = None
+
+
+def get_policy_pool() -> PolicyWorkerPool:
+    """Get the process-wide policy worker pool"""
+    global _POOL  # noqa: PLW0603
+    if not _POOL:
+        _POOL = PolicyWorkerPool(CONFIG.get_int("policies.executor_workers", 4))
+    return _POOL
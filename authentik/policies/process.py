@@ -2,17 +2,20 @@
 
 from multiprocessing import get_context
 from multiprocessing.connection import Connection
+from threading import Lock
+from time import perf_counter
 
-from django.core.cache import cache
+from cachetools import LRUCache
 from sentry_sdk import start_span
 from sentry_sdk.tracing import Span
 from structlog.stdlib import get_logger
 
 from authentik.events.models import Event, EventAction
 from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.lib.utils.errors import exception_to_dict
 from authentik.lib.utils.reflection import class_to_path
-from authentik.policies.apps import HIST_POLICIES_EXECUTION_TIME
+from authentik.policies.apps import COUNTER_POLICIES_CACHE_LOCAL, HIST_POLICIES_EXECUTION_TIME
 from authentik.policies.exceptions import PolicyException
 from authentik.policies.models import PolicyBinding
 from authentik.policies.types import CACHE_PREFIX, PolicyRequest, PolicyResult
@@ -22,16 +25,42 @@ LOGGER = get_logger()
 FORK_CTX = get_context("fork")
 CACHE_TIMEOUT = CONFIG.get_int("cache.timeout_policies")
 PROCESS_CLASS = FORK_CTX.Process
+POLICY_CACHE = CacheNamespace(
+    CACHE_PREFIX, CACHE_TIMEOUT, local=True, local_metric=COUNTER_POLICIES_CACHE_LOCAL
+)
+# Running average execution time and number of executions per binding in this process
+_EXECUTION_TIMES: LRUCache[str, tuple[float, int]] = LRUCache(maxsize=1024)
+_EXECUTION_TIMES_LOCK = Lock()
 
 
-def cache_key(binding: PolicyBinding, request: PolicyRequest) -> str:
-    """Generate Cache key for policy"""
-    prefix = f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}_"
+def observe_execution_time(binding: PolicyBinding, duration: float):
+    """Add a single execution of `binding` to its running average execution time"""
+    key = binding.policy_binding_uuid.hex
+    with _EXECUTION_TIMES_LOCK:
+        average, count = _EXECUTION_TIMES.get(key, (0.0, 0))
+        count += 1
+        _EXECUTION_TIMES[key] = (average + (duration - average) / count, count)
+
+
+def average_execution_time(binding: PolicyBinding) -> float:
+    """Average execution time of `binding` in this process, 0 if it wasn't executed yet"""
+    with _EXECUTION_TIMES_LOCK:
+        return _EXECUTION_TIMES.get(binding.policy_binding_uuid.hex, (0.0, 0))[0]
+
+
+def cache_key(
+    binding: PolicyBinding,
+    request: PolicyRequest,
+    generations: dict[str | None, str] | None = None,
+) -> str:
+    """Generate Cache key for policy, `generations` can be passed when generating
+    keys for multiple bindings, see `CacheNamespace.generations`"""
+    suffix = ""
     if request.http_request and hasattr(request.http_request, "session"):
-        prefix += f"_{request.http_request.session.session_key}"
+        suffix += f"_{request.http_request.session.session_key}"
     if request.user:
-        prefix += f"#{request.user.pk}"
-    return prefix
+        suffix += f"#{request.user.pk}"
+    return POLICY_CACHE.key(suffix, scope=binding.policy_binding_uuid.hex, generations=generations)
 
 
 class PolicyProcess(PROCESS_CLASS):
@@ -104,15 +133,11 @@ class PolicyProcess(PROCESS_CLASS):
                 )
             LOGGER.debug("P_ENG(proc): error, using failure result", exc=src_exc)
             policy_result = PolicyResult(self.binding.failure_result, str(src_exc))
+        # Results with a source binding are written to the cache by the PolicyEngine
         policy_result.source_binding = self.binding
-        should_cache = self.request.should_cache
-        if should_cache:
-            key = cache_key(self.binding, self.request)
-            cache.set(key, policy_result, CACHE_TIMEOUT)
         LOGGER.debug(
             "P_ENG(proc): finished",
             policy=self.binding.policy,
-            cached=should_cache,
             result=policy_result,
             # this is used for filtering in access checking where logs are sent to the admin
             process="PolicyProcess",
@@ -139,7 +164,11 @@ class PolicyProcess(PROCESS_CLASS):
             span: Span
             span.set_data("policy", self.binding.policy)
             span.set_data("request", self.request)
-            return self.execute()
+            start = perf_counter()
+            try:
+                return self.execute()
+            finally:
+                observe_execution_time(self.binding, perf_counter() - start)
 
     def run(self):  # pragma: no cover
         """Task wrapper to run policy checking"""
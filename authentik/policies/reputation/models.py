@@ -1,13 +1,17 @@
 """authentik reputation request policy"""
 
 from datetime import timedelta
+from json import dumps, loads
 from uuid import uuid4
 
-from django.db import models
+from django.core.cache import cache
+from django.db import connection, models
 from django.db.models import Sum
 from django.db.models.query_utils import Q
 from django.utils.timezone import now
 from django.utils.translation import gettext as _
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
 from rest_framework.serializers import BaseSerializer
 from structlog import get_logger
 
@@ -19,6 +23,7 @@ from authentik.policies.types import PolicyRequest, PolicyResult
 from authentik.root.middleware import ClientIPMiddleware
 
 LOGGER = get_logger()
+CACHE_KEY_PENDING_PREFIX = "goauthentik.io/policies/reputation/pending/"
 
 
 def reputation_expiry():
@@ -26,6 +31,71 @@ def reputation_expiry():
     return now() + timedelta(seconds=CONFIG.get_int("reputation.expiry"))
 
 
+def _pending_keys() -> tuple[str, str, str]:
+    """Keys of the pending score changes of the current tenant, by (IP, identifier) pair,
+    by IP and by identifier"""
+    prefix = cache.make_key(f"{CACHE_KEY_PENDING_PREFIX}{connection.schema_name}/")
+    return f"{prefix}pairs", f"{prefix}ip", f"{prefix}identifier"
+
+
+def add_pending_score(ip: str, identifier: str, amount: int):
+    """Record a score change, which is written to the database by `reputation_flush`.
+    Changes are accumulated in redis, so that concurrent requests don't lock the same
+    reputation rows and the changes are visible to all processes."""
+    pairs, ips, identifiers = _pending_keys()
+    try:
+        pipeline = get_redis_connection().pipeline(transaction=False)
+        pipeline.hincrby(pairs, dumps([ip, identifier]), amount)
+        pipeline.hincrby(ips, ip, amount)
+        pipeline.hincrby(identifiers, identifier, amount)
+        pipeline.execute()
+    except RedisError as exc:
+        # Same as for other cache operations, don't fail the request when redis is unavailable
+        LOGGER.warning("Failed to record reputation score change", exc=exc, ip=ip, amount=amount)
+
+
+def get_pending_score(ip: str | None = None, identifier: str | None = None) -> int:
+    """Sum of the score changes for `ip` or `identifier` which have not been written yet.
+    When redis is unavailable, only the score in the database is used."""
+    pairs, ips, identifiers = _pending_keys()
+    try:
+        pipeline = get_redis_connection().pipeline(transaction=False)
+        if ip is not None:
+            pipeline.hget(ips, ip)
+        if identifier is not None:
+            pipeline.hget(identifiers, identifier)
+        if ip is not None and identifier is not None:
+            pipeline.hget(pairs, dumps([ip, identifier]))
+        scores = [int(value or 0) for value in pipeline.execute()]
+    except RedisError as exc:
+        LOGGER.warning("Failed to get pending reputation score", exc=exc)
+        return 0
+    if ip is not None and identifier is not None:
+        ip_score, identifier_score, pair_score = scores
+        # Changes of the pair itself are included in the sums of both the IP and identifier
+        return ip_score + identifier_score - pair_score
+    return sum(scores)
+
+
+def pop_pending_scores() -> dict[tuple[str, str], int]:
+    """Get and remove all pending score changes, by (IP, identifier) pair"""
+    pairs, ips, identifiers = _pending_keys()
+    try:
+        pipeline = get_redis_connection().pipeline(transaction=True)
+        pipeline.hgetall(pairs)
+        pipeline.delete(pairs, ips, identifiers)
+        pending, _ = pipeline.execute()
+    except RedisError as exc:
+        LOGGER.warning("Failed to get pending reputation scores", exc=exc)
+        return {}
+    scores = {}
+    for pair, amount in pending.items():
+        ip, identifier = loads(pair)
+        if int(amount) != 0:
+            scores[(ip, identifier)] = int(amount)
+    return scores
+
+
 class ReputationPolicy(Policy):
     """Return true if request IP/target username's score is below a certain threshold"""
 
@@ -53,6 +123,10 @@ class ReputationPolicy(Policy):
         score = (
             Reputation.objects.filter(query).aggregate(total_score=Sum("score"))["total_score"] or 0
         )
+        score += get_pending_score(
+            ip=remote_ip if self.check_ip else None,
+            identifier=request.user.username if self.check_username else None,
+        )
         passing = score <= self.threshold
         LOGGER.debug(
             "Score for user",
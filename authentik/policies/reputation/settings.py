@@ -0,0 +1,11 @@
+"""Reputation Settings"""
+
+from celery.schedules import crontab
+
+CELERY_BEAT_SCHEDULE = {
+    "policies_reputation_flush": {
+        "task": "authentik.policies.reputation.tasks.reputation_flush",
+        "schedule": crontab(minute="*"),
+        "options": {"queue": "authentik_scheduled"},
+    },
+}
@@ -1,56 +1,24 @@
 """authentik reputation request signals"""
 
 from django.contrib.auth.signals import user_logged_in
-from django.db import transaction
 from django.dispatch import receiver
 from django.http import HttpRequest
 from structlog.stdlib import get_logger
 
 from authentik.core.signals import login_failed
-from authentik.events.context_processors.asn import ASN_CONTEXT_PROCESSOR
-from authentik.events.context_processors.geoip import GEOIP_CONTEXT_PROCESSOR
-from authentik.policies.reputation.models import Reputation, reputation_expiry
+from authentik.policies.reputation.models import add_pending_score
 from authentik.root.middleware import ClientIPMiddleware
 from authentik.stages.identification.signals import identification_failed
-from authentik.tenants.utils import get_current_tenant
 
 LOGGER = get_logger()
 
 
-def clamp(value, min, max):
-    return sorted([min, value, max])[1]
-
-
 def update_score(request: HttpRequest, identifier: str, amount: int):
-    """Update score for IP and User"""
+    """Update score for IP and User. The change is written to the database in the background,
+    see `reputation_flush`"""
     remote_ip = ClientIPMiddleware.get_client_ip(request)
-    tenant = get_current_tenant()
-    new_score = clamp(amount, tenant.reputation_lower_limit, tenant.reputation_upper_limit)
-
-    with transaction.atomic():
-        reputation, created = Reputation.objects.select_for_update().get_or_create(
-            ip=remote_ip,
-            identifier=identifier,
-            defaults={
-                "score": clamp(
-                    amount, tenant.reputation_lower_limit, tenant.reputation_upper_limit
-                ),
-                "ip_geo_data": GEOIP_CONTEXT_PROCESSOR.city_dict(remote_ip) or {},
-                "ip_asn_data": ASN_CONTEXT_PROCESSOR.asn_dict(remote_ip) or {},
-                "expires": reputation_expiry(),
-            },
-        )
-
-        if not created:
-            new_score = clamp(
-                reputation.score + amount,
-                tenant.reputation_lower_limit,
-                tenant.reputation_upper_limit,
-            )
-            reputation.score = new_score
-            reputation.save()
-
-    LOGGER.info("Updated score", amount=new_score, for_user=identifier, for_ip=remote_ip)
+    add_pending_score(remote_ip, identifier, amount)
+    LOGGER.info("Updated score", amount=amount, for_user=identifier, for_ip=remote_ip)
 
 
 @receiver(login_failed)
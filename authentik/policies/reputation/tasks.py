@@ -0,0 +1,71 @@
+"""Reputation tasks"""
+
+from django.db import DatabaseError, connection
+from django.db.transaction import atomic
+from structlog.stdlib import get_logger
+
+from authentik.events.context_processors.asn import ASN_CONTEXT_PROCESSOR
+from authentik.events.context_processors.geoip import GEOIP_CONTEXT_PROCESSOR
+from authentik.policies.reputation.models import (
+    Reputation,
+    add_pending_score,
+    pop_pending_scores,
+    reputation_expiry,
+)
+from authentik.root.celery import CELERY_APP
+from authentik.tenants.utils import get_current_tenant
+
+LOGGER = get_logger()
+
+
+def write_scores(scores: dict[tuple[str, str], int], lower_limit: int, upper_limit: int):
+    """Add `scores` to the reputation of each (IP, identifier) pair with a constant
+    number of queries, clamping the resulting scores to the given limits"""
+    pairs = sorted(scores.keys())
+    with atomic():
+        Reputation.objects.bulk_create(
+            [
+                Reputation(
+                    ip=ip,
+                    identifier=identifier,
+                    score=0,
+                    ip_geo_data=GEOIP_CONTEXT_PROCESSOR.city_dict(ip) or {},
+                    ip_asn_data=ASN_CONTEXT_PROCESSOR.asn_dict(ip) or {},
+                    expires=reputation_expiry(),
+                )
+                for ip, identifier in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        table = connection.ops.quote_name(Reputation._meta.db_table)
+        values = ", ".join(["(%s, %s::inet, %s)"] * len(pairs))
+        params = [lower_limit, upper_limit]
+        for ip, identifier in pairs:
+            params.extend([identifier, ip, scores[(ip, identifier)]])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                (
+                    f"UPDATE {table} AS r "  # nosec
+                    "SET score = LEAST(GREATEST(r.score + d.amount, %s), %s) "
+                    f"FROM (VALUES {values}) AS d(identifier, ip, amount) "
+                    "WHERE r.identifier = d.identifier AND r.ip = d.ip"
+                ),
+                params,
+            )
+
+
+@CELERY_APP.task()
+def reputation_flush():
+    """Write pending score changes of the current tenant to the database"""
+    scores = pop_pending_scores()
+    if not scores:
+        return
+    tenant = get_current_tenant(only=["reputation_lower_limit", "reputation_upper_limit"])
+    try:
+        write_scores(scores, tenant.reputation_lower_limit, tenant.reputation_upper_limit)
+    except DatabaseError as exc:
+        LOGGER.warning("Failed to write reputation scores, retrying later", exc=exc)
+        for (ip, identifier), amount in scores.items():
+            add_pending_score(ip, identifier, amount)
+        return
+    LOGGER.debug("Wrote reputation scores", count=len(scores))
@@ -1,12 +1,20 @@
 """test reputation signals and policy"""
 
+from unittest.mock import MagicMock, patch
+
 from django.test import RequestFactory, TestCase
+from redis.exceptions import ConnectionError as RedisConnectionError
 
 from authentik.core.models import User
 from authentik.lib.generators import generate_id
 from authentik.policies.reputation.api import ReputationPolicySerializer
-from authentik.policies.reputation.models import Reputation, ReputationPolicy
+from authentik.policies.reputation.models import (
+    Reputation,
+    ReputationPolicy,
+    pop_pending_scores,
+)
 from authentik.policies.reputation.signals import update_score
+from authentik.policies.reputation.tasks import reputation_flush
 from authentik.policies.types import PolicyRequest
 from authentik.stages.password import BACKEND_INBUILT
 from authentik.stages.password.stage import authenticate
@@ -17,6 +25,8 @@ class TestReputationPolicy(TestCase):
     """test reputation signals and policy"""
 
     def setUp(self):
+        # Discard score changes which were not written by previous tests
+        pop_pending_scores()
         self.request_factory = RequestFactory()
         self.request = self.request_factory.get("/")
         self.ip = "127.0.0.1"
@@ -31,12 +41,14 @@ class TestReputationPolicy(TestCase):
         """test IP reputation"""
         # Trigger negative reputation
         authenticate(self.request, self.backends, username=self.username, password=self.username)
+        reputation_flush()
         self.assertEqual(Reputation.objects.get(ip=self.ip).score, -1)
 
     def test_user_reputation(self):
         """test User reputation"""
         # Trigger negative reputation
         authenticate(self.request, self.backends, username=self.username, password=self.username)
+        reputation_flush()
         self.assertEqual(Reputation.objects.get(identifier=self.username).score, -1)
 
     def test_update_reputation(self):
@@ -44,12 +56,14 @@ class TestReputationPolicy(TestCase):
         Reputation.objects.create(identifier=self.username, ip=self.ip, score=4)
         # Trigger negative reputation
         authenticate(self.request, self.backends, username=self.username, password=self.username)
+        reputation_flush()
         self.assertEqual(Reputation.objects.get(identifier=self.username).score, 3)
 
     def test_reputation_lower_limit(self):
         """test reputation lower limit"""
         Reputation.objects.create(identifier=self.username, ip=self.ip)
         update_score(self.request, identifier=self.username, amount=-1000)
+        reputation_flush()
         self.assertEqual(
             Reputation.objects.get(identifier=self.username).score, DEFAULT_REPUTATION_LOWER_LIMIT
         )
@@ -58,6 +72,7 @@ class TestReputationPolicy(TestCase):
         """test reputation upper limit"""
         Reputation.objects.create(identifier=self.username, ip=self.ip)
         update_score(self.request, identifier=self.username, amount=1000)
+        reputation_flush()
         self.assertEqual(
             Reputation.objects.get(identifier=self.username).score, DEFAULT_REPUTATION_UPPER_LIMIT
         )
@@ -70,6 +85,42 @@ class TestReputationPolicy(TestCase):
         )
         self.assertTrue(policy.passes(request).passing)
 
+    def test_policy_pending(self):
+        """Test policy with score changes which have not been written yet"""
+        request = PolicyRequest(user=self.user)
+        request.http_request = self.request
+        Reputation.objects.create(identifier=self.username, ip=self.ip, score=-2)
+        policy: ReputationPolicy = ReputationPolicy.objects.create(
+            name="reputation-test", threshold=-3
+        )
+        self.assertFalse(policy.passes(request).passing)
+        update_score(self.request, identifier=self.username, amount=-1)
+        update_score(self.request, identifier=generate_id(), amount=-1)
+        # Pending changes are counted once, even if they match both the IP and identifier
+        self.assertTrue(policy.passes(request).passing)
+        policy.check_ip = False
+        self.assertTrue(policy.passes(request).passing)
+        reputation_flush()
+        self.assertEqual(Reputation.objects.get(identifier=self.username).score, -3)
+        self.assertTrue(policy.passes(request).passing)
+
+    def test_policy_redis_unavailable(self):
+        """Test policy and score changes when redis is unavailable"""
+        request = PolicyRequest(user=self.user)
+        request.http_request = self.request
+        Reputation.objects.create(identifier=self.username, ip=self.ip, score=-4)
+        policy: ReputationPolicy = ReputationPolicy.objects.create(
+            name="reputation-test", threshold=-3
+        )
+        with patch(
+            "authentik.policies.reputation.models.get_redis_connection",
+            MagicMock(side_effect=RedisConnectionError()),
+        ):
+            update_score(self.request, identifier=self.username, amount=-1)
+            self.assertTrue(policy.passes(request).passing)
+            reputation_flush()
+        self.assertEqual(Reputation.objects.get(identifier=self.username).score, -4)
+
     def test_api(self):
         """Test API Validation"""
         no_toggle = ReputationPolicySerializer(data={"name": generate_id(), "threshold": -5})
@@ -1,16 +1,15 @@
 """authentik policy signals"""
 
-from django.core.cache import cache
 from django.db import connection
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from structlog.stdlib import get_logger
 
-from authentik.core.api.applications import user_app_cache_key
+from authentik.core.api.applications import APP_ACCESS_CACHE
 from authentik.core.models import Group, User
 from authentik.policies.apps import GAUGE_POLICIES_CACHED
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel
-from authentik.policies.types import CACHE_PREFIX
+from authentik.policies.process import POLICY_CACHE
 from authentik.root.monitoring import monitoring_set
 
 LOGGER = get_logger()
@@ -19,9 +18,7 @@ LOGGER = get_logger()
 @receiver(monitoring_set)
 def monitoring_set_policies(sender, **kwargs):
     """set policy gauges"""
-    GAUGE_POLICIES_CACHED.labels(tenant=connection.schema_name).set(
-        len(cache.keys(f"{CACHE_PREFIX}*") or [])
-    )
+    GAUGE_POLICIES_CACHED.labels(tenant=connection.schema_name).set(POLICY_CACHE.count())
 
 
 @receiver(post_save, sender=Policy)
@@ -32,13 +29,12 @@ def monitoring_set_policies(sender, **kwargs):
 def invalidate_policy_cache(sender, instance, **_):
     """Invalidate Policy cache when policy is updated"""
     if sender == Policy:
-        total = 0
-        for binding in PolicyBinding.objects.filter(policy=instance):
-            prefix = f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}_{binding.policy.pk.hex}*"
-            keys = cache.keys(prefix)
-            total += len(keys)
-            cache.delete_many(keys)
-        LOGGER.debug("Invalidating policy cache", policy=instance, keys=total)
+        for binding_pk in PolicyBinding.objects.filter(policy=instance).values_list(
+            "policy_binding_uuid", flat=True
+        ):
+            POLICY_CACHE.invalidate(binding_pk.hex)
+        LOGGER.debug("Invalidating policy cache", policy=instance)
+    if sender == PolicyBinding:
+        POLICY_CACHE.invalidate(instance.policy_binding_uuid.hex)
     # Also delete user application cache
-    keys = cache.keys(user_app_cache_key("*")) or []
-    cache.delete_many(keys)
+    APP_ACCESS_CACHE.invalidate()
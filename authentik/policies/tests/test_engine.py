@@ -1,6 +1,5 @@
 """policy engine tests"""
 
-from django.core.cache import cache
 from django.db import connections
 from django.test import TestCase
 from django.test.utils import CaptureQueriesContext
@@ -13,8 +12,9 @@ from authentik.policies.engine import PolicyEngine
 from authentik.policies.exceptions import PolicyEngineException
 from authentik.policies.expression.models import ExpressionPolicy
 from authentik.policies.models import Policy, PolicyBinding, PolicyBindingModel, PolicyEngineMode
+from authentik.policies.process import POLICY_CACHE, average_execution_time, observe_execution_time
 from authentik.policies.tests.test_process import clear_policy_cache
-from authentik.policies.types import CACHE_PREFIX
+from authentik.policies.types import SkippedPolicyResult
 
 
 class TestPolicyEngine(TestCase):
@@ -123,13 +123,13 @@ class TestPolicyEngine(TestCase):
     def test_engine_cache(self):
         """Ensure empty policy list passes"""
         pbm = PolicyBindingModel.objects.create()
-        binding = PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
         engine = PolicyEngine(pbm, self.user)
-        self.assertEqual(len(cache.keys(f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}*")), 0)
+        self.assertEqual(POLICY_CACHE.count(), 0)
         self.assertEqual(engine.build().passing, False)
-        self.assertEqual(len(cache.keys(f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}*")), 1)
+        self.assertEqual(POLICY_CACHE.count(), 1)
         self.assertEqual(engine.build().passing, False)
-        self.assertEqual(len(cache.keys(f"{CACHE_PREFIX}{binding.policy_binding_uuid.hex}*")), 1)
+        self.assertEqual(POLICY_CACHE.count(), 1)
 
     def test_engine_static_bindings(self):
         """Test static bindings"""
@@ -185,3 +185,58 @@ class TestPolicyEngine(TestCase):
             engine.build()
         self.assertLess(ctx.final_queries, 1000)
         self.assertTrue(engine.result.passing)
+
+    def test_engine_short_circuit_any(self):
+        """Test short-circuit evaluation with MODE_ANY"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ANY)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=0)
+        skipped = PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=1)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        engine.short_circuit = True
+        result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ("dummy",))
+        self.assertIsInstance(result.source_results[-1], SkippedPolicyResult)
+        self.assertEqual(result.source_results[-1].source_binding, skipped)
+
+    def test_engine_short_circuit_all(self):
+        """Test short-circuit evaluation with MODE_ALL"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ALL)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        engine.short_circuit = True
+        result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("dummy",))
+        self.assertEqual(
+            len([x for x in result.source_results if isinstance(x, SkippedPolicyResult)]), 1
+        )
+
+    def test_engine_short_circuit_static(self):
+        """Test short-circuit evaluation with a passing static binding"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ANY)
+        PolicyBinding.objects.create(target=pbm, user=self.user, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=1)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        engine.short_circuit = True
+        result = engine.build().result
+        self.assertEqual(result.passing, True)
+        self.assertEqual(result.messages, ())
+
+    def test_engine_short_circuit_cost(self):
+        """Test short-circuit evaluation orders bindings by their average execution time"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ALL)
+        expensive = PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        observe_execution_time(expensive, 10)
+        engine = PolicyEngine(pbm, self.user)
+        engine.use_cache = False
+        engine.short_circuit = True
+        result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("dummy", "dummy"))
+        self.assertGreater(average_execution_time(expensive), 0)
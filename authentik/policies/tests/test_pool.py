@@ -0,0 +1,87 @@
+"""policy worker pool tests"""
+
+from django.test import TestCase
+
+from authentik.core.tests.utils import create_test_user
+from authentik.lib.config import CONFIG
+from authentik.lib.generators import generate_id
+from authentik.policies.dummy.models import DummyPolicy
+from authentik.policies.engine import PolicyEngine
+from authentik.policies.models import PolicyBinding, PolicyBindingModel, PolicyEngineMode
+from authentik.policies.pool import EXECUTOR_THREAD, PolicyWorkerPool, get_policy_pool
+from authentik.policies.tests.test_process import clear_policy_cache
+from authentik.policies.types import PolicyRequest
+
+
+class TestPolicyWorkerPool(TestCase):
+    """Policy worker pool tests"""
+
+    def setUp(self):
+        clear_policy_cache()
+        self.user = create_test_user()
+        self.policy_false = DummyPolicy.objects.create(
+            name=generate_id(), result=False, wait_min=0, wait_max=1
+        )
+        self.policy_true = DummyPolicy.objects.create(
+            name=generate_id(), result=True, wait_min=0, wait_max=1
+        )
+
+    def test_pool_dispatch(self):
+        """Test dispatching bindings to the pool directly"""
+        bindings = [
+            PolicyBinding(policy=self.policy_true, order=0),
+            PolicyBinding(user=self.user, order=1),
+        ]
+        tasks, overflow = get_policy_pool().dispatch(bindings, PolicyRequest(self.user))
+        self.assertEqual(overflow, [])
+        self.assertEqual([x.future.result(timeout=5).passing for x in tasks], [True, True])
+        self.assertTrue(all(x.started_at for x in tasks))
+
+    def test_pool_saturated(self):
+        """Test that bindings exceeding the idle threads are not submitted"""
+        pool = PolicyWorkerPool(1)
+        bindings = [
+            PolicyBinding(policy=self.policy_true, order=0),
+            PolicyBinding(user=self.user, order=1),
+        ]
+        tasks, overflow = pool.dispatch(bindings, PolicyRequest(self.user))
+        self.assertEqual([x.binding for x in tasks], bindings[:1])
+        self.assertEqual(overflow, bindings[1:])
+        tasks[0].future.result(timeout=5)
+        tasks, overflow = pool.dispatch(bindings[1:], PolicyRequest(self.user))
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(overflow, [])
+        pool.shutdown()
+
+    def test_pool_reused(self):
+        """Test that the same executor is used across calls"""
+        pool = get_policy_pool()
+        self.assertIs(pool.executor, pool.executor)
+
+    def test_engine_thread(self):
+        """Test engine with thread executor"""
+        pbm = PolicyBindingModel.objects.create(policy_engine_mode=PolicyEngineMode.MODE_ALL)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_false, order=0)
+        PolicyBinding.objects.create(target=pbm, policy=self.policy_true, order=1)
+        with CONFIG.patch("policies.executor", EXECUTOR_THREAD):
+            engine = PolicyEngine(pbm, self.user)
+            engine.use_cache = False
+            result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("dummy", "dummy"))
+
+    def test_engine_thread_timeout(self):
+        """Test binding timeout with thread executor"""
+        policy_slow = DummyPolicy.objects.create(
+            name=generate_id(), result=True, wait_min=2, wait_max=3
+        )
+        pbm = PolicyBindingModel.objects.create()
+        PolicyBinding.objects.create(
+            target=pbm, policy=policy_slow, order=0, timeout=1, failure_result=False
+        )
+        with CONFIG.patch("policies.executor", EXECUTOR_THREAD):
+            engine = PolicyEngine(pbm, self.user)
+            engine.use_cache = False
+            result = engine.build().result
+        self.assertEqual(result.passing, False)
+        self.assertEqual(result.messages, ("Policy execution timed out",))
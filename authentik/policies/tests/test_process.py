@@ -1,7 +1,6 @@
 """policy process tests"""
 
 from django.contrib.auth.models import AnonymousUser
-from django.core.cache import cache
 from django.test import RequestFactory, TestCase
 from django.urls import resolve, reverse
 from django.views.debug import SafeExceptionReporterFilter
@@ -13,14 +12,13 @@ from authentik.lib.generators import generate_id
 from authentik.policies.dummy.models import DummyPolicy
 from authentik.policies.expression.models import ExpressionPolicy
 from authentik.policies.models import Policy, PolicyBinding
-from authentik.policies.process import PolicyProcess
-from authentik.policies.types import CACHE_PREFIX, PolicyRequest
+from authentik.policies.process import POLICY_CACHE, PolicyProcess
+from authentik.policies.types import PolicyRequest
 
 
 def clear_policy_cache():
     """Ensure no policy-related keys are still cached"""
-    keys = cache.keys(f"{CACHE_PREFIX}*")
-    cache.delete(keys)
+    POLICY_CACHE.invalidate()
 
 
 class TestPolicyProcess(TestCase):
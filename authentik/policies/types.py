@@ -92,3 +92,17 @@ class PolicyResult:
         if self.messages:
             return f"<PolicyResult passing={self.passing} messages={self.messages}>"
         return f"<PolicyResult passing={self.passing}>"
+
+
+class SkippedPolicyResult(PolicyResult):
+    """Result of a binding which was not evaluated, as the outcome of the engine
+    was already determined by other bindings."""
+
+    __slots__ = ()
+
+    def __init__(self, binding: PolicyBinding):
+        super().__init__(False)
+        self.source_binding = binding
+
+    def __str__(self):
+        return f"<SkippedPolicyResult binding={self.source_binding}>"
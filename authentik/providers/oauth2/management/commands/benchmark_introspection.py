@@ -0,0 +1,113 @@
+"""Benchmark token introspection"""
+
+import json
+from dataclasses import asdict
+from datetime import timedelta
+from random import sample
+from time import perf_counter
+
+from django.core.management.base import no_translations
+from django.db import connection
+from django.test import RequestFactory
+from django.utils.timezone import now
+
+from authentik.core.models import User
+from authentik.core.tests.utils import create_test_cert, create_test_flow, create_test_user
+from authentik.lib.generators import generate_id
+from authentik.providers.oauth2.id_token import IDToken
+from authentik.providers.oauth2.models import AccessToken, OAuth2Provider, hash_token
+from authentik.providers.oauth2.views.introspection import TokenIntrospectionView
+from authentik.tenants.management import TenantCommand
+
+
+class Command(TenantCommand):
+    """Benchmark token introspection latency with a large number of issued tokens"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=100_000)
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        # Length of generated tokens, similar to a signed JWT
+        parser.add_argument("--token-length", type=int, default=800)
+
+    def create_tokens(self, provider: OAuth2Provider, user: User, **options) -> list[str]:
+        """Bulk-create tokens, returns a sample of their raw values to look up"""
+        id_token = json.dumps(asdict(IDToken("authentik", generate_id())))
+        expires = now() + timedelta(hours=1)
+        keep = set(sample(range(options["tokens"]), min(options["iterations"], options["tokens"])))
+        lookup = []
+        batch = []
+        for idx in range(options["tokens"]):
+            token = generate_id(options["token_length"])
+            if idx in keep:
+                lookup.append(token)
+            batch.append(
+                AccessToken(
+                    provider=provider,
+                    user=user,
+                    token=token,
+                    # `bulk_create` doesn't call `save`, which sets the digest
+                    token_digest=hash_token(token),
+                    _id_token=id_token,
+                    _scope="openid",
+                    auth_time=now(),
+                    expires=expires,
+                )
+            )
+            if len(batch) >= options["batch_size"]:
+                AccessToken.objects.bulk_create(batch)
+                batch = []
+                self.stdout.write(f"Created {idx + 1} tokens\n")
+        AccessToken.objects.bulk_create(batch)
+        return lookup
+
+    @no_translations
+    def handle_per_tenant(self, *args, **options):
+        """Start benchmark"""
+        keypair = create_test_cert()
+        provider = OAuth2Provider.objects.create(
+            name=generate_id(),
+            authorization_flow=create_test_flow(),
+            signing_key=keypair,
+        )
+        user = create_test_user()
+        factory = RequestFactory()
+        view = TokenIntrospectionView.as_view()
+        try:
+            lookup = self.create_tokens(provider, user, **options)
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {AccessToken._meta.db_table}")
+            durations = []
+            for token in lookup:
+                request = factory.post(
+                    "/",
+                    {
+                        "token": token,
+                        "client_id": provider.client_id,
+                        "client_secret": provider.client_secret,
+                    },
+                )
+                start = perf_counter()
+                response = view(request)
+                durations.append(perf_counter() - start)
+                if not json.loads(response.content)["active"]:
+                    self.stderr.write("Token was not found\n")
+            durations.sort()
+            self.stdout.write(
+                f"Introspection with {options['tokens']} tokens: "
+                f"{len(durations) / sum(durations):.1f} requests/s, "
+                f"avg {sum(durations) / len(durations) * 1000:.2f}ms, "
+                f"p99 {durations[int(len(durations) * 0.99)] * 1000:.2f}ms\n"
+            )
+        finally:
+            # Delete tokens directly, as deleting millions of tokens through the ORM sends
+            # signals for each of them
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {AccessToken._meta.db_table} WHERE provider_id = %s",  # nosec
+                    [provider.pk],
+                )
+            provider.authorization_flow.delete()
+            provider.delete()
+            keypair.delete()
+            user.delete()
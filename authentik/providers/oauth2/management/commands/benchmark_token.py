@@ -0,0 +1,51 @@
+"""Benchmark token signing"""
+
+from time import perf_counter, time
+
+from django.core.management.base import no_translations
+
+from authentik.core.tests.utils import create_test_cert, create_test_flow
+from authentik.crypto.models import clear_key_material
+from authentik.lib.generators import generate_id
+from authentik.providers.oauth2.models import OAuth2Provider
+from authentik.tenants.management import TenantCommand
+
+
+class Command(TenantCommand):
+    """Benchmark how many tokens can be signed per second, with and without
+    the process-wide cache of parsed keys"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=500)
+
+    @no_translations
+    def handle_per_tenant(self, *args, **options):
+        """Start benchmark"""
+        iterations = options["iterations"]
+        keypair = create_test_cert()
+        provider = OAuth2Provider.objects.create(
+            name=generate_id(),
+            authorization_flow=create_test_flow(),
+            signing_key=keypair,
+        )
+        try:
+            for label, cached in (("Uncached", False), ("Cached", True)):
+                durations = []
+                for _ in range(iterations):
+                    if not cached:
+                        clear_key_material()
+                    start = perf_counter()
+                    # Load the provider again, as every token request does
+                    OAuth2Provider.objects.get(pk=provider.pk).encode(
+                        {"sub": generate_id(), "iat": int(time())}
+                    )
+                    durations.append(perf_counter() - start)
+                self.stdout.write(
+                    f"{label}: {iterations / sum(durations):.1f} tokens/s, "
+                    f"avg {sum(durations) / iterations * 1000:.2f}ms, "
+                    f"max {max(durations) * 1000:.2f}ms\n"
+                )
+        finally:
+            provider.authorization_flow.delete()
+            provider.delete()
+            keypair.delete()
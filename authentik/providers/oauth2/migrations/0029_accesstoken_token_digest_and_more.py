@@ -0,0 +1,59 @@
+# Generated by Django 5.0.13 on 2025-03-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Computed in the database, as tables can contain millions of tokens. Matches
+# `authentik.providers.oauth2.models.hash_token`
+BACKFILL_SQL = """
+UPDATE {table} SET token_digest = encode(sha256(convert_to(token, 'UTF8')), 'hex')
+WHERE token_digest = '';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_providers_oauth2", "0028_migrate_session"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accesstoken",
+            name="token_digest",
+            field=models.CharField(default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="refreshtoken",
+            name="token_digest",
+            field=models.CharField(default="", editable=False, max_length=64),
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(table="authentik_providers_oauth2_accesstoken"),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(table="authentik_providers_oauth2_refreshtoken"),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name="accesstoken",
+            name="authentik_p_token_e00883_hash",
+        ),
+        migrations.RemoveIndex(
+            model_name="refreshtoken",
+            name="authentik_p_token_32e2b7_hash",
+        ),
+        migrations.AddIndex(
+            model_name="accesstoken",
+            index=django.contrib.postgres.indexes.HashIndex(
+                fields=["token_digest"], name="authentik_p_token_d_ce5d75_hash"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="refreshtoken",
+            index=django.contrib.postgres.indexes.HashIndex(
+                fields=["token_digest"], name="authentik_p_token_d_54d6d8_hash"
+            ),
+        ),
+    ]
@@ -55,6 +55,11 @@ def generate_client_secret() -> str:
     return generate_id(128)
 
 
+def hash_token(token: str) -> str:
+    """Fixed-width digest of a token, which access and refresh tokens are looked up by"""
+    return sha256(token.encode()).hexdigest()
+
+
 class ClientTypes(models.TextChoices):
     """Confidential clients are capable of maintaining the confidentiality
     of their credentials. Public clients are incapable."""
@@ -428,6 +433,24 @@ class BaseGrantModel(models.Model):
         self._scope = " ".join(value)
 
 
+class TokenDigestModel(models.Model):
+    """Mixin for grants with a `token`, which store a digest of the token to look it up by.
+    Tokens can be long (for example JWTs), and looking them up by their digest keeps the
+    index and comparisons small."""
+
+    token_digest = models.CharField(max_length=64, default="", editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.token_digest = hash_token(self.token)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "token" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "token_digest"}
+        return super().save(*args, **kwargs)
+
+
 class AuthorizationCode(SerializerModel, ExpiringModel, BaseGrantModel):
     """OAuth2 Authorization Code"""
 
@@ -463,7 +486,7 @@ class AuthorizationCode(SerializerModel, ExpiringModel, BaseGrantModel):
         )
 
 
-class AccessToken(SerializerModel, ExpiringModel, BaseGrantModel):
+class AccessToken(SerializerModel, ExpiringModel, TokenDigestModel, BaseGrantModel):
     """OAuth2 access token, non-opaque using a JWT as identifier"""
 
     token = models.TextField()
@@ -471,7 +494,7 @@ class AccessToken(SerializerModel, ExpiringModel, BaseGrantModel):
 
     class Meta:
         indexes = ExpiringModel.Meta.indexes + [
-            HashIndex(fields=["token"]),
+            HashIndex(fields=["token_digest"]),
         ]
         verbose_name = _("OAuth2 Access Token")
         verbose_name_plural = _("OAuth2 Access Tokens")
@@ -509,7 +532,7 @@ class AccessToken(SerializerModel, ExpiringModel, BaseGrantModel):
         return TokenModelSerializer
 
 
-class RefreshToken(SerializerModel, ExpiringModel, BaseGrantModel):
+class RefreshToken(SerializerModel, ExpiringModel, TokenDigestModel, BaseGrantModel):
     """OAuth2 Refresh Token, opaque"""
 
     token = models.TextField(default=generate_client_secret)
@@ -522,7 +545,7 @@ class RefreshToken(SerializerModel, ExpiringModel, BaseGrantModel):
 
     class Meta:
         indexes = ExpiringModel.Meta.indexes + [
-            HashIndex(fields=["token"]),
+            HashIndex(fields=["token_digest"]),
         ]
         verbose_name = _("OAuth2 Refresh Token")
         verbose_name_plural = _("OAuth2 Refresh Tokens")
@@ -1,8 +1,22 @@
-from django.db.models.signals import post_save, pre_delete
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from authentik.core.models import AuthenticatedSession, User
-from authentik.providers.oauth2.models import AccessToken, DeviceToken, RefreshToken
+from authentik.core.models import Application, AuthenticatedSession, User
+from authentik.crypto.models import CertificateKeyPair
+from authentik.providers.oauth2.models import (
+    AccessToken,
+    DeviceToken,
+    OAuth2Provider,
+    RefreshToken,
+    ScopeMapping,
+)
+from authentik.providers.oauth2.utils import (
+    CLAIMS_CACHE,
+    DOCUMENT_CACHE,
+    claims_cache_scope,
+    document_cache_scope,
+)
 
 
 @receiver(pre_delete, sender=AuthenticatedSession)
@@ -22,3 +36,74 @@ def user_deactivated(sender, instance: User, **_):
     AccessToken.objects.filter(user=instance).delete()
     RefreshToken.objects.filter(user=instance).delete()
     DeviceToken.objects.filter(user=instance).delete()
+
+
+@receiver(post_save, sender=OAuth2Provider)
+@receiver(post_delete, sender=OAuth2Provider)
+def provider_documents_invalidate(sender: type[Model], instance: OAuth2Provider, **_):
+    """Invalidate cached discovery documents and JWKS of a provider when it changes"""
+    DOCUMENT_CACHE.invalidate(document_cache_scope(instance.pk))
+    CLAIMS_CACHE.invalidate()
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def application_documents_invalidate(sender: type[Model], instance: Application, **_):
+    """Invalidate cached documents of an application's provider, as they contain URLs
+    which include the application's slug"""
+    if not instance.provider_id:
+        return
+    DOCUMENT_CACHE.invalidate(document_cache_scope(instance.provider_id))
+
+
+@receiver(m2m_changed, sender=OAuth2Provider.property_mappings.through)
+def provider_mappings_documents_invalidate(
+    sender: type[Model], instance: Model, reverse: bool, pk_set: set | None, **_
+):
+    """Invalidate cached documents when a provider's property mappings change"""
+    CLAIMS_CACHE.invalidate()
+    if not reverse:
+        DOCUMENT_CACHE.invalidate(document_cache_scope(instance.pk))
+        return
+    for provider_pk in pk_set or []:
+        DOCUMENT_CACHE.invalidate(document_cache_scope(provider_pk))
+
+
+@receiver(post_save, sender=ScopeMapping)
+@receiver(post_delete, sender=ScopeMapping)
+def scope_mapping_claims_invalidate(sender: type[Model], instance: ScopeMapping, **_):
+    """Invalidate all cached claims and scope mappings when a scope mapping changes"""
+    CLAIMS_CACHE.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_claims_invalidate(sender: type[Model], instance: User, **_):
+    """Invalidate cached claims of a user when the user changes"""
+    CLAIMS_CACHE.invalidate(claims_cache_scope(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.ak_groups.through)
+def user_groups_claims_invalidate(
+    sender: type[Model], instance: Model, reverse: bool, pk_set: set | None, **_
+):
+    """Invalidate cached claims of users when their group memberships change"""
+    if not reverse:
+        CLAIMS_CACHE.invalidate(claims_cache_scope(instance.pk))
+        return
+    if pk_set is None:
+        CLAIMS_CACHE.invalidate()
+        return
+    for user_pk in pk_set:
+        CLAIMS_CACHE.invalidate(claims_cache_scope(user_pk))
+
+
+@receiver(post_save, sender=ScopeMapping)
+@receiver(post_delete, sender=ScopeMapping)
+@receiver(post_save, sender=CertificateKeyPair)
+@receiver(post_delete, sender=CertificateKeyPair)
+def documents_invalidate(sender: type[Model], instance: Model, **_):
+    """Invalidate all cached documents when a scope mapping or keypair changes. These are
+    shared between providers and change rarely, and the providers using them can't be
+    looked up anymore once they're deleted."""
+    DOCUMENT_CACHE.invalidate()
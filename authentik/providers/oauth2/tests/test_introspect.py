@@ -18,6 +18,7 @@ from authentik.providers.oauth2.models import (
     RedirectURI,
     RedirectURIMatchingMode,
     RefreshToken,
+    hash_token,
 )
 from authentik.providers.oauth2.tests.utils import OAuthTestCase
 
@@ -41,6 +42,35 @@ class TesOAuth2Introspection(OAuthTestCase):
             f"{self.provider.client_id}:{self.provider.client_secret}".encode()
         ).decode()
 
+    def test_introspect_digest(self):
+        """Test that tokens are looked up by their digest, which follows changes to the token"""
+        token: AccessToken = AccessToken.objects.create(
+            provider=self.provider,
+            user=self.user,
+            token=generate_id(),
+            auth_time=timezone.now(),
+            _scope="openid user profile",
+            _id_token=json.dumps(
+                asdict(
+                    IDToken("foo", "bar"),
+                )
+            ),
+        )
+        self.assertEqual(token.token_digest, hash_token(token.token))
+        old_token = token.token
+        token.token = generate_id()
+        token.save(update_fields=["token"])
+        token.refresh_from_db()
+        self.assertEqual(token.token_digest, hash_token(token.token))
+        for raw_token, active in ((old_token, False), (token.token, True)):
+            res = self.client.post(
+                reverse("authentik_providers_oauth2:token-introspection"),
+                HTTP_AUTHORIZATION=f"Basic {self.auth}",
+                data={"token": raw_token},
+            )
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(json.loads(res.content.decode())["active"], active)
+
     def test_introspect_refresh(self):
         """Test introspect"""
         token: RefreshToken = RefreshToken.objects.create(
@@ -62,6 +62,32 @@ class TestJWKS(OAuthTestCase):
         key = body["keys"][0]
         load_der_x509_certificate(base64.b64decode(key["x5c"][0]), default_backend()).public_key()
 
+    def test_etag(self):
+        """Test that JWKS are cached, served with an ETag and invalidated on changes"""
+        provider = OAuth2Provider.objects.create(
+            name=generate_id(),
+            client_id=generate_id(),
+            authorization_flow=create_test_flow(),
+            signing_key=create_test_cert(),
+        )
+        app = Application.objects.create(name=generate_id(), slug=generate_id(), provider=provider)
+        url = reverse("authentik_providers_oauth2:jwks", kwargs={"application_slug": app.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("max-age", response["Cache-Control"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        provider.signing_key = create_test_cert(PrivateKeyAlg.ECDSA)
+        provider.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        body = json.loads(response.content.decode())
+        self.assertEqual(body["keys"][0]["kty"], "EC")
+
     def test_hs256(self):
         """Test JWKS request with HS256"""
         provider = OAuth2Provider.objects.create(
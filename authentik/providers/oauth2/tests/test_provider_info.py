@@ -0,0 +1,60 @@
+"""OpenID Connect discovery tests"""
+
+from unittest.mock import patch
+
+from django.urls import reverse
+
+from authentik.brands.models import Brand
+from authentik.core.models import Application
+from authentik.core.tests.utils import create_test_cert, create_test_flow
+from authentik.lib.generators import generate_id
+from authentik.providers.oauth2.models import OAuth2Provider
+from authentik.providers.oauth2.tests.utils import OAuthTestCase
+from authentik.providers.oauth2.views.provider import ProviderInfoView
+
+
+class TestProviderInfo(OAuthTestCase):
+    """OpenID Connect discovery tests"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.provider = OAuth2Provider.objects.create(
+            name=generate_id(),
+            client_id=generate_id(),
+            authorization_flow=create_test_flow(),
+            signing_key=create_test_cert(),
+        )
+        self.app = Application.objects.create(
+            name=generate_id(), slug=generate_id(), provider=self.provider
+        )
+        self.url = reverse(
+            "authentik_providers_oauth2:provider-info",
+            kwargs={"application_slug": self.app.slug},
+        )
+
+    def test_cached_brand_domain(self):
+        """Test that documents are cached for brand domains"""
+        Brand.objects.create(domain="testserver")
+        with patch.object(
+            ProviderInfoView, "get_info", autospec=True, side_effect=ProviderInfoView.get_info
+        ) as get_info:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            etag = response["ETag"]
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(get_info.call_count, 1)
+
+    def test_not_cached_unknown_domain(self):
+        """Test that documents are not cached for arbitrary hosts"""
+        with patch.object(
+            ProviderInfoView, "get_info", autospec=True, side_effect=ProviderInfoView.get_info
+        ) as get_info:
+            host = f"{generate_id().lower()}.testserver"
+            response = self.client.get(self.url, HTTP_HOST=host)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(host, response.json()["issuer"])
+            etag = response["ETag"]
+            response = self.client.get(self.url, HTTP_HOST=host, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(get_info.call_count, 2)
@@ -7,7 +7,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from authentik.blueprints.tests import apply_blueprint
-from authentik.core.models import Application
+from authentik.core.models import Application, User
 from authentik.core.tests.utils import create_test_admin_user, create_test_cert, create_test_flow
 from authentik.events.models import Event, EventAction
 from authentik.lib.generators import generate_id
@@ -102,3 +102,26 @@ class TestUserinfo(OAuthTestCase):
             events.first().context["message"],
             "Failed to evaluate property-mapping: 'test'",
         )
+
+    def test_userinfo_cached(self):
+        """test that claims are cached and invalidated when the user changes"""
+        res = self.client.get(
+            reverse("authentik_providers_oauth2:userinfo"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token.token}",
+        )
+        self.assertEqual(json.loads(res.content.decode())["name"], self.user.name)
+        # Updating via the queryset doesn't send signals, hence the cached claims are returned
+        User.objects.filter(pk=self.user.pk).update(name=generate_id())
+        res = self.client.get(
+            reverse("authentik_providers_oauth2:userinfo"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token.token}",
+        )
+        self.assertEqual(json.loads(res.content.decode())["name"], self.user.name)
+
+        self.user.name = generate_id()
+        self.user.save()
+        res = self.client.get(
+            reverse("authentik_providers_oauth2:userinfo"),
+            HTTP_AUTHORIZATION=f"Bearer {self.token.token}",
+        )
+        self.assertEqual(json.loads(res.content.decode())["name"], self.user.name)
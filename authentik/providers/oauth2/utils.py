@@ -3,20 +3,42 @@
 import re
 from base64 import b64decode
 from binascii import Error
+from collections.abc import Callable
+from hashlib import sha256
 from typing import Any
 from urllib.parse import urlparse
 
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.http.response import HttpResponseRedirect
 from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from structlog.stdlib import get_logger
 
 from authentik.core.middleware import CTX_AUTH_VIA, KEY_USER
 from authentik.events.models import Event, EventAction
+from authentik.lib.config import CONFIG
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.providers.oauth2.errors import BearerTokenError
-from authentik.providers.oauth2.models import AccessToken, OAuth2Provider
+from authentik.providers.oauth2.models import AccessToken, OAuth2Provider, hash_token
 
 LOGGER = get_logger()
+# Rendered discovery documents and JWKS, invalidated per provider by
+# `authentik.providers.oauth2.signals`
+DOCUMENT_CACHE = CacheNamespace(
+    "goauthentik.io/providers/oauth2/documents/",
+    CONFIG.get_int("cache.timeout_oauth2_documents"),
+    local=True,
+)
+# Claims evaluated from scope mappings, scoped per user. Invalidating the namespace also
+# invalidates the per-process sets of scope mappings, see `UserInfoView.get_scope_mappings`
+CLAIMS_CACHE = CacheNamespace(
+    "goauthentik.io/providers/oauth2/claims/",
+    CONFIG.get_int("cache.timeout_oauth2_claims"),
+    local=True,
+)
+# Clients may re-use documents for this many seconds before they have to revalidate them
+# using their ETag, which bounds how long clients might use outdated keys after a rotation
+DOCUMENT_MAX_AGE = 60
 
 
 class TokenResponse(JsonResponse):
@@ -30,6 +52,62 @@ class TokenResponse(JsonResponse):
         self["Pragma"] = "no-cache"
 
 
+def document_cache_scope(provider_pk: int) -> str:
+    """Cache scope of all documents of a provider"""
+    return f"provider_{provider_pk}"
+
+
+def claims_cache_scope(user_pk: int) -> str:
+    """Cache scope of all claims of a user"""
+    return f"user_{user_pk}"
+
+
+def _brand_origin(request: HttpRequest) -> str | None:
+    """Origin of the request, if it's the exact domain of the request's brand. Any host is
+    accepted, so this bounds how many origins documents are cached for."""
+    brand = getattr(request, "brand", None)
+    if not brand or not brand.domain or brand.domain.lower() != request.get_host().lower():
+        return None
+    return request.build_absolute_uri("/")
+
+
+def cached_document_response(
+    request: HttpRequest,
+    provider: OAuth2Provider,
+    document: str,
+    build: Callable[[], dict[str, Any]],
+    per_origin: bool = False,
+    **kwargs,
+) -> HttpResponse:
+    """Render the JSON document returned by `build` once per provider, and serve it with a
+    strong ETag. Responds with 304 when the client's copy is up to date. Documents which
+    depend on the origin of the request (`per_origin`) are only cached for the domains of
+    brands. `kwargs` are passed to `JsonResponse`."""
+    key = None
+    if not per_origin:
+        key = DOCUMENT_CACHE.key(document, scope=document_cache_scope(provider.pk))
+    elif origin := _brand_origin(request):
+        key = DOCUMENT_CACHE.key(
+            document,
+            sha256(origin.encode()).hexdigest(),
+            scope=document_cache_scope(provider.pk),
+        )
+    cached = DOCUMENT_CACHE.get(key) if key else None
+    if not cached:
+        content = JsonResponse(build(), **kwargs).content
+        cached = (content, f'"{sha256(content).hexdigest()}"')
+        if key:
+            DOCUMENT_CACHE.set(key, cached)
+    content, etag = cached
+    if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={DOCUMENT_MAX_AGE}"
+    return response
+
+
 def cors_allow(request: HttpRequest, response: HttpResponse, *allowed_origins: str):
     """Add headers to permit CORS requests from allowed_origins, with or without credentials,
     with any headers."""
@@ -134,7 +212,7 @@ def protected_resource_view(scopes: list[str]):
                     LOGGER.debug("No token passed")
                     raise BearerTokenError("invalid_token")
 
-                token = AccessToken.objects.filter(token=access_token).first()
+                token = AccessToken.objects.filter(token_digest=hash_token(access_token)).first()
                 if not token:
                     LOGGER.debug("Token does not exist", access_token=access_token)
                     raise BearerTokenError("invalid_token")
@@ -1,6 +1,7 @@
 """authentik OAuth2 JWKS Views"""
 
 from base64 import b64encode, urlsafe_b64encode
+from copy import deepcopy
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric.ec import (
@@ -12,7 +13,7 @@ from cryptography.hazmat.primitives.asymmetric.ec import (
 )
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey, RSAPublicKey
 from cryptography.hazmat.primitives.serialization import Encoding
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 from jwt.utils import base64url_encode
@@ -20,6 +21,7 @@ from jwt.utils import base64url_encode
 from authentik.core.models import Application
 from authentik.crypto.models import CertificateKeyPair
 from authentik.providers.oauth2.models import JWTAlgorithms, OAuth2Provider
+from authentik.providers.oauth2.utils import cached_document_response
 
 # See https://notes.salrahman.com/generate-es256-es384-es512-private-keys/
 # and _CURVE_TYPES in the same file as the below curve files
@@ -67,6 +69,12 @@ class JWKSView(View):
     @staticmethod
     def get_jwk_for_key(key: CertificateKeyPair, use: str) -> dict | None:
         """Convert a certificate-key pair into JWK"""
+        jwk = key.cached_material(f"jwk/{use}", lambda: JWKSView.build_jwk_for_key(key, use))
+        return deepcopy(jwk)
+
+    @staticmethod
+    def build_jwk_for_key(key: CertificateKeyPair, use: str) -> dict | None:
+        """Convert a certificate-key pair into JWK, without caching"""
         private_key = key.private_key
         key_data = None
         if not private_key:
@@ -113,11 +121,9 @@ class JWKSView(View):
         )
         return key_data
 
-    def get(self, request: HttpRequest, application_slug: str) -> HttpResponse:
-        """Show JWK Key data for Provider"""
-        application = get_object_or_404(Application, slug=application_slug)
-        provider: OAuth2Provider = get_object_or_404(OAuth2Provider, pk=application.provider_id)
-
+    @staticmethod
+    def get_jwks(provider: OAuth2Provider) -> dict:
+        """Get JWKS of all keys of a provider"""
         response_data = {}
 
         if signing_key := provider.signing_key:
@@ -130,8 +136,16 @@ class JWKSView(View):
             if jwk:
                 response_data.setdefault("keys", [])
                 response_data["keys"].append(jwk)
+        return response_data
 
-        response = JsonResponse(response_data)
+    def get(self, request: HttpRequest, application_slug: str) -> HttpResponse:
+        """Show JWK Key data for Provider"""
+        application = get_object_or_404(Application, slug=application_slug)
+        provider: OAuth2Provider = get_object_or_404(OAuth2Provider, pk=application.provider_id)
+
+        response = cached_document_response(
+            request, provider, "jwks", lambda: JWKSView.get_jwks(provider)
+        )
         response["Access-Control-Allow-Origin"] = "*"
 
         return response
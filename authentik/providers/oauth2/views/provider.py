@@ -2,7 +2,7 @@
 
 from typing import Any
 
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, reverse
 from django.views import View
 from guardian.shortcuts import get_anonymous_user
@@ -28,7 +28,7 @@ from authentik.providers.oauth2.models import (
     ResponseTypes,
     ScopeMapping,
 )
-from authentik.providers.oauth2.utils import cors_allow
+from authentik.providers.oauth2.utils import cached_document_response, cors_allow
 
 LOGGER = get_logger()
 
@@ -151,7 +151,14 @@ class ProviderInfoView(View):
 
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         """OpenID-compliant Provider Info"""
-        return JsonResponse(self.get_info(self.provider), json_dumps_params={"indent": 2})
+        return cached_document_response(
+            request,
+            self.provider,
+            "openid-configuration",
+            lambda: self.get_info(self.provider),
+            per_origin=True,
+            json_dumps_params={"indent": 2},
+        )
 
     def dispatch(
         self, request: HttpRequest, application_slug: str, *args: Any, **kwargs: Any
@@ -61,6 +61,7 @@ from authentik.providers.oauth2.models import (
     RedirectURIMatchingMode,
     RefreshToken,
     ScopeMapping,
+    hash_token,
 )
 from authentik.providers.oauth2.utils import TokenResponse, cors_allow, extract_client_auth
 from authentik.providers.oauth2.views.authorize import FORBIDDEN_URI_SCHEMES
@@ -284,7 +285,7 @@ class TokenParams:
             raise TokenError("invalid_grant")
 
         self.refresh_token = RefreshToken.objects.filter(
-            token=raw_token, provider=self.provider
+            token_digest=hash_token(raw_token), provider=self.provider
         ).first()
         if not self.refresh_token:
             LOGGER.warning(
@@ -413,7 +414,8 @@ class TokenParams:
     ) -> tuple[dict, OAuth2Provider] | tuple[None, None]:
         token = provider = _key = None
         federated_token = AccessToken.objects.filter(
-            token=assertion, provider__in=self.provider.jwt_federation_providers.all()
+            token_digest=hash_token(assertion),
+            provider__in=self.provider.jwt_federation_providers.all(),
         ).first()
         if federated_token:
             _key, _alg = federated_token.provider.jwt_key
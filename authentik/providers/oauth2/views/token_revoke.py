@@ -9,7 +9,13 @@ from django.views.decorators.csrf import csrf_exempt
 from structlog.stdlib import get_logger
 
 from authentik.providers.oauth2.errors import TokenRevocationError
-from authentik.providers.oauth2.models import AccessToken, ClientTypes, OAuth2Provider, RefreshToken
+from authentik.providers.oauth2.models import (
+    AccessToken,
+    ClientTypes,
+    OAuth2Provider,
+    RefreshToken,
+    hash_token,
+)
 from authentik.providers.oauth2.utils import (
     TokenResponse,
     authenticate_provider,
@@ -37,10 +43,10 @@ class TokenRevocationParams:
         if not provider:
             raise TokenRevocationError("invalid_client")
 
-        access_token = AccessToken.objects.filter(token=raw_token).first()
+        access_token = AccessToken.objects.filter(token_digest=hash_token(raw_token)).first()
         if access_token:
             return TokenRevocationParams(access_token, provider)
-        refresh_token = RefreshToken.objects.filter(token=raw_token).first()
+        refresh_token = RefreshToken.objects.filter(token_digest=hash_token(raw_token)).first()
         if refresh_token:
             return TokenRevocationParams(refresh_token, provider)
         LOGGER.debug("Token does not exist", token=raw_token)
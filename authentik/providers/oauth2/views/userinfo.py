@@ -1,8 +1,12 @@
 """authentik OAuth2 OpenID Userinfo views"""
 
+from hashlib import sha256
+from threading import Lock
 from typing import Any
 
+from cachetools import LRUCache
 from deepmerge import always_merger
+from django.db import connection
 from django.http import HttpRequest, HttpResponse
 from django.http.response import HttpResponseBadRequest
 from django.utils.decorators import method_decorator
@@ -11,9 +15,9 @@ from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from structlog.stdlib import get_logger
 
-from authentik.core.expression.exceptions import PropertyMappingExpressionException
 from authentik.events.models import Event, EventAction
 from authentik.flows.challenge import PermissionDict
+from authentik.lib.sync.mapper import PropertyMappingManager
 from authentik.providers.oauth2.constants import (
     SCOPE_GITHUB_ORG_READ,
     SCOPE_GITHUB_USER,
@@ -27,9 +31,21 @@ from authentik.providers.oauth2.models import (
     RefreshToken,
     ScopeMapping,
 )
-from authentik.providers.oauth2.utils import TokenResponse, cors_allow, protected_resource_view
+from authentik.providers.oauth2.utils import (
+    CLAIMS_CACHE,
+    TokenResponse,
+    claims_cache_scope,
+    cors_allow,
+    protected_resource_view,
+)
 
 LOGGER = get_logger()
+# Scope mappings per provider and set of scopes, along with the generation of
+# `CLAIMS_CACHE` they were loaded in
+_SCOPE_MAPPINGS: LRUCache[tuple[str, int, tuple[str, ...]], tuple[str, PropertyMappingManager]] = (
+    LRUCache(maxsize=256)
+)
+_SCOPE_MAPPINGS_LOCK = Lock()
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -64,25 +80,58 @@ class UserInfoView(View):
                 )
         return scope_descriptions
 
+    @staticmethod
+    def get_scope_mappings(provider: OAuth2Provider, scopes: list[str]) -> PropertyMappingManager:
+        """Get the scope mappings of `provider` for `scopes`, which are kept per process
+        until any provider or scope mapping changes"""
+        generation = CLAIMS_CACHE.generations()[None]
+        key = (connection.schema_name, provider.pk, tuple(sorted(set(scopes))))
+        with _SCOPE_MAPPINGS_LOCK:
+            entry = _SCOPE_MAPPINGS.get(key)
+        if not entry or entry[0] != generation:
+            manager = PropertyMappingManager(
+                ScopeMapping.objects.filter(provider=provider, scope_name__in=scopes),
+                ScopeMapping,
+                ["user", "http_request", "provider", "token"],
+                order_by="scope_name",
+            )
+            entry = (generation, manager)
+            with _SCOPE_MAPPINGS_LOCK:
+                _SCOPE_MAPPINGS[key] = entry
+        return entry[1]
+
+    @staticmethod
+    def claims_cache_key(provider: OAuth2Provider, token: BaseGrantModel) -> str:
+        """Cache key for claims of `token`. Tokens issued for the same session and scopes,
+        such as an access token and its refresh token, share their claims"""
+        return CLAIMS_CACHE.key(
+            str(provider.pk),
+            str(token.session_id or "-"),
+            str(token.auth_time.timestamp() if token.auth_time else "-"),
+            sha256(" ".join(sorted(set(token.scope))).encode()).hexdigest(),
+            scope=claims_cache_scope(token.user_id),
+        )
+
     def get_claims(self, provider: OAuth2Provider, token: BaseGrantModel) -> dict[str, Any]:
         """Get a dictionary of claims from scopes that the token
         requires and are assigned to the provider."""
+        cache_key = None
+        if CLAIMS_CACHE.timeout:
+            cache_key = self.claims_cache_key(provider, token)
+            cached = CLAIMS_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
 
-        scopes_from_client = token.scope
         final_claims = {}
-        for scope in ScopeMapping.objects.filter(
-            provider=provider, scope_name__in=scopes_from_client
-        ).order_by("scope_name"):
+        mappings = self.get_scope_mappings(provider, token.scope)
+        for scope, value, exc in mappings.iter_eval_each(
+            user=token.user,
+            request=self.request,
+            provider=provider,
+            token=token,
+        ):
             scope: ScopeMapping
-            value = None
-            try:
-                value = scope.evaluate(
-                    user=token.user,
-                    request=self.request,
-                    provider=provider,
-                    token=token,
-                )
-            except PropertyMappingExpressionException as exc:
+            if exc:
                 Event.new(
                     EventAction.CONFIGURATION_ERROR,
                     message=f"Failed to evaluate property-mapping: '{scope.name}'",
@@ -101,6 +150,8 @@ class UserInfoView(View):
                 continue
             always_merger.merge(final_claims, value)
             LOGGER.debug("updated scope", scope=scope)
+        if cache_key:
+            CLAIMS_CACHE.set(cache_key, final_claims)
         return final_claims
 
     def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
@@ -1,6 +1,5 @@
 """RAC Provider API Views"""
 
-from django.core.cache import cache
 from django.db.models import QuerySet
 from django.urls import reverse
 from drf_spectacular.types import OpenApiTypes
@@ -14,17 +13,19 @@ from structlog.stdlib import get_logger
 from authentik.core.api.used_by import UsedByMixin
 from authentik.core.api.utils import ModelSerializer
 from authentik.core.models import Provider
+from authentik.lib.utils.cache import CacheNamespace
 from authentik.policies.engine import PolicyEngine
 from authentik.providers.rac.api.providers import RACProviderSerializer
 from authentik.providers.rac.models import Endpoint
 from authentik.rbac.filters import ObjectFilter
 
 LOGGER = get_logger()
+ENDPOINT_ACCESS_CACHE = CacheNamespace("goauthentik.io/providers/rac/endpoint_access/", 86400)
 
 
 def user_endpoint_cache_key(user_pk: str) -> str:
     """Cache key where endpoint list for user is saved"""
-    return f"goauthentik.io/providers/rac/endpoint_access/{user_pk}"
+    return ENDPOINT_ACCESS_CACHE.key(user_pk)
 
 
 class EndpointSerializer(ModelSerializer):
@@ -120,14 +121,11 @@ class EndpointViewSet(UsedByMixin, ModelViewSet):
         if not should_cache:
             allowed_endpoints = self._get_allowed_endpoints(queryset)
         if should_cache:
-            allowed_endpoints = cache.get(user_endpoint_cache_key(self.request.user.pk))
+            key = user_endpoint_cache_key(self.request.user.pk)
+            allowed_endpoints = ENDPOINT_ACCESS_CACHE.get(key)
             if not allowed_endpoints:
                 LOGGER.debug("Caching allowed endpoint list")
                 allowed_endpoints = self._get_allowed_endpoints(queryset)
-                cache.set(
-                    user_endpoint_cache_key(self.request.user.pk),
-                    allowed_endpoints,
-                    timeout=86400,
-                )
+                ENDPOINT_ACCESS_CACHE.set(key, allowed_endpoints)
         serializer = self.get_serializer(allowed_endpoints, many=True)
         return self.get_paginated_response(serializer.data)
@@ -150,6 +150,9 @@ class ConnectionToken(ExpiringModel):
     settings = models.JSONField(default=dict)
     session = models.ForeignKey("authentik_core.AuthenticatedSession", on_delete=models.CASCADE)
 
+    # Deleting a token disconnects its connection, see `pre_delete_connection_token_disconnect`
+    expire_per_object = True
+
     def get_settings(self) -> dict:
         """Get settings"""
         default_settings = {}
@@ -0,0 +1,73 @@
+"""Benchmark SAML assertion generation"""
+
+from time import perf_counter
+
+from django.core.management.base import no_translations
+
+from authentik.core.tests.utils import create_test_admin_user, create_test_cert, create_test_flow
+from authentik.crypto.builder import PrivateKeyAlg
+from authentik.lib.generators import generate_id
+from authentik.lib.tests.utils import get_request
+from authentik.providers.saml.models import SAMLProvider
+from authentik.providers.saml.processors.assertion import AssertionProcessor
+from authentik.providers.saml.processors.authn_request_parser import AuthNRequest
+from authentik.sources.saml.processors.constants import (
+    DIGEST_ALGORITHM_TRANSLATION_MAP,
+    DSA_SHA1,
+    SIGN_ALGORITHM_TRANSFORM_MAP,
+)
+from authentik.tenants.management import TenantCommand
+
+
+class Command(TenantCommand):
+    """Benchmark how many signed SAML responses can be generated per second,
+    for each combination of signature and digest algorithm"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+
+    @no_translations
+    def handle_per_tenant(self, *args, **options):
+        """Start benchmark"""
+        iterations = options["iterations"]
+        user = create_test_admin_user()
+        keypairs = {
+            PrivateKeyAlg.RSA: create_test_cert(PrivateKeyAlg.RSA),
+            PrivateKeyAlg.ECDSA: create_test_cert(PrivateKeyAlg.ECDSA),
+        }
+        provider = SAMLProvider.objects.create(
+            name=generate_id(),
+            authorization_flow=create_test_flow(),
+            acs_url="http://testserver/source/saml/provider/acs/",
+            sign_assertion=True,
+            sign_response=True,
+        )
+        request = get_request("/", user=user)
+        try:
+            for signature_algorithm in SIGN_ALGORITHM_TRANSFORM_MAP.keys():
+                # DSA keys can't be generated by authentik
+                if signature_algorithm == DSA_SHA1:
+                    continue
+                provider.signing_kp = keypairs[
+                    PrivateKeyAlg.ECDSA if "ecdsa" in signature_algorithm else PrivateKeyAlg.RSA
+                ]
+                provider.signature_algorithm = signature_algorithm
+                for digest_algorithm in DIGEST_ALGORITHM_TRANSLATION_MAP.keys():
+                    provider.digest_algorithm = digest_algorithm
+                    durations = []
+                    for _ in range(iterations):
+                        start = perf_counter()
+                        AssertionProcessor(provider, request, AuthNRequest()).build_response()
+                        durations.append(perf_counter() - start)
+                    self.stdout.write(
+                        f"{signature_algorithm.rsplit('#', 1)[-1]} / "
+                        f"{digest_algorithm.rsplit('#', 1)[-1]}: "
+                        f"{iterations / sum(durations):.1f} responses/s, "
+                        f"avg {sum(durations) / iterations * 1000:.2f}ms\n"
+                    )
+        finally:
+            provider.authorization_flow.delete()
+            provider.delete()
+            for keypair in keypairs.values():
+                keypair.delete()
+            user.delete()
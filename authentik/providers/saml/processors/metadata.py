@@ -11,6 +11,7 @@ from lxml.etree import Element, SubElement, tostring  # nosec
 
 from authentik.providers.saml.models import SAMLProvider
 from authentik.providers.saml.utils.encoding import strip_pem_header
+from authentik.providers.saml.utils.keys import get_xmlsec_key
 from authentik.sources.saml.processors.constants import (
     DIGEST_ALGORITHM_TRANSLATION_MAP,
     NS_MAP,
@@ -149,16 +150,7 @@ class MetadataProcessor:
 
         ctx = xmlsec.SignatureContext()
 
-        key = xmlsec.Key.from_memory(
-            self.provider.signing_kp.key_data,
-            xmlsec.constants.KeyDataFormatPem,
-            None,
-        )
-        key.load_cert_from_memory(
-            self.provider.signing_kp.certificate_data,
-            xmlsec.constants.KeyDataFormatCertPem,
-        )
-        ctx.key = key
+        ctx.key = get_xmlsec_key(self.provider.signing_kp)
         ctx.sign(signature_node)
 
     def build_entity_descriptor(self) -> str:
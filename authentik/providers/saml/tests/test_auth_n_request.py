@@ -116,6 +116,32 @@ class TestAuthNRequest(TestCase):
         self.assertEqual(parsed_request.id, request_proc.request_id)
         self.assertEqual(parsed_request.relay_state, "test_state")
 
+    def test_signature_template(self):
+        """Test that signature templates are not shared between responses"""
+        self.provider.sign_assertion = True
+        self.provider.sign_response = True
+        self.provider.save()
+        self.source.allow_idp_initiated = True
+        self.source.save()
+        http_request = get_request("/")
+        parsed_request = AuthNRequestParser(self.provider).idp_initiated()
+        for _ in range(2):
+            response = lxml_from_string(
+                AssertionProcessor(self.provider, http_request, parsed_request).build_response()
+            )
+            assertion = response.xpath("saml:Assertion", namespaces=NS_MAP)[0]
+            for element in (response, assertion):
+                signatures = element.xpath("ds:Signature", namespaces=NS_MAP)
+                self.assertEqual(len(signatures), 1)
+                self.assertEqual(
+                    signatures[0].xpath("ds:SignedInfo/ds:Reference/@URI", namespaces=NS_MAP),
+                    [f"#{element.attrib['ID']}"],
+                )
+
+            http_request.POST = QueryDict(mutable=True)
+            http_request.POST["SAMLResponse"] = b64encode(etree.tostring(response)).decode()
+            ResponseProcessor(self.source, http_request).parse()
+
     def test_request_encrypt(self):
         """Test full SAML Request/Response flow, fully encrypted"""
         self.provider.encryption_kp = self.cert
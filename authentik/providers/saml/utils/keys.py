@@ -0,0 +1,66 @@
+"""xmlsec keys and templates"""
+
+from copy import deepcopy
+
+import xmlsec
+from lxml.etree import Element  # nosec
+
+from authentik.crypto.models import CertificateKeyPair
+
+DSIG_NS = xmlsec.constants.DSigNs
+
+
+def _load_key(keypair: CertificateKeyPair) -> xmlsec.Key:
+    key = xmlsec.Key.from_memory(
+        keypair.key_data,
+        xmlsec.constants.KeyDataFormatPem,
+        None,
+    )
+    key.load_cert_from_memory(
+        keypair.certificate_data,
+        xmlsec.constants.KeyDataFormatCertPem,
+    )
+    return key
+
+
+def get_xmlsec_key(keypair: CertificateKeyPair) -> xmlsec.Key:
+    """Get the private key and certificate of `keypair` as xmlsec Key, cached per process.
+    The key is copied when it's assigned to a signature context or added to a keys manager,
+    so the cached key is never modified."""
+    return keypair.cached_material("xmlsec_key", lambda: _load_key(keypair))
+
+
+_SIGNATURE_TEMPLATES: dict[tuple[str, str], Element] = {}
+
+
+def _signature_template(
+    sign_algorithm: xmlsec.Transform, digest_algorithm: xmlsec.Transform
+) -> Element:
+    cache_key = (sign_algorithm.href, digest_algorithm.href)
+    if cache_key in _SIGNATURE_TEMPLATES:
+        return _SIGNATURE_TEMPLATES[cache_key]
+    container = Element("container")
+    signature = xmlsec.template.create(
+        container,
+        xmlsec.constants.TransformExclC14N,
+        sign_algorithm,
+        ns=xmlsec.constants.DSigNs,
+    )
+    ref = xmlsec.template.add_reference(signature, digest_algorithm, uri="#")
+    xmlsec.template.add_transform(ref, xmlsec.constants.TransformEnveloped)
+    xmlsec.template.add_transform(ref, xmlsec.constants.TransformExclC14N)
+    key_info = xmlsec.template.ensure_key_info(signature)
+    xmlsec.template.add_x509_data(key_info)
+    _SIGNATURE_TEMPLATES[cache_key] = signature
+    return signature
+
+
+def get_signature_template(
+    sign_algorithm: xmlsec.Transform, digest_algorithm: xmlsec.Transform, reference_id: str
+) -> Element:
+    """Get an enveloped signature template for the element with ID `reference_id`,
+    copied from a template which is built once per combination of algorithms"""
+    signature = deepcopy(_signature_template(sign_algorithm, digest_algorithm))
+    ref = signature.find(f"{{{DSIG_NS}}}SignedInfo/{{{DSIG_NS}}}Reference")
+    ref.attrib["URI"] = f"#{reference_id}"
+    return signature
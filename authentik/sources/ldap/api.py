@@ -113,8 +113,16 @@ class LDAPSourceSerializer(SourceSerializer):
             "connectivity",
             "lookup_groups_from_user",
             "delete_not_found_objects",
+            "incremental_sync",
+            "full_sync_interval",
+            "last_synced",
+            "last_full_synced",
         ]
-        extra_kwargs = {"bind_password": {"write_only": True}}
+        extra_kwargs = {
+            "bind_password": {"write_only": True},
+            "last_synced": {"read_only": True},
+            "last_full_synced": {"read_only": True},
+        }
 
 
 class LDAPSourceViewSet(UsedByMixin, ModelViewSet):
@@ -151,6 +159,7 @@ class LDAPSourceViewSet(UsedByMixin, ModelViewSet):
         "group_property_mappings",
         "lookup_groups_from_user",
         "delete_not_found_objects",
+        "incremental_sync",
     ]
     search_fields = ["name", "slug"]
     ordering = ["name"]
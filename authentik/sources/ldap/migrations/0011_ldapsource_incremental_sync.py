@@ -0,0 +1,50 @@
+# Generated by Django 5.1.11 on 2025-07-14 10:41
+
+from django.db import migrations, models
+
+import authentik.lib.utils.time
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentik_sources_ldap", "0010_ldapsource_user_membership_attribute"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ldapsource",
+            name="incremental_sync",
+            field=models.BooleanField(
+                default=False,
+                help_text=(
+                    "Only synchronize objects which have been modified since the last "
+                    "synchronization, based on their modifyTimestamp attribute. A full "
+                    "synchronization is still done periodically, and is required to delete "
+                    "objects which are missing from the source."
+                ),
+            ),
+        ),
+        migrations.AddField(
+            model_name="ldapsource",
+            name="full_sync_interval",
+            field=models.TextField(
+                default="days=1",
+                help_text=(
+                    "Interval between full synchronizations when incremental synchronization "
+                    "is enabled (Format: hours=1;minutes=2;seconds=3)."
+                ),
+                validators=[authentik.lib.utils.time.timedelta_string_validator],
+            ),
+        ),
+        migrations.AddField(
+            model_name="ldapsource",
+            name="last_synced",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="ldapsource",
+            name="last_full_synced",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
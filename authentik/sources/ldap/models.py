@@ -1,5 +1,6 @@
 """authentik LDAP Models"""
 
+from datetime import datetime, timedelta
 from os import chmod
 from os.path import dirname, exists
 from shutil import rmtree
@@ -10,6 +11,7 @@ from typing import Any
 import pglock
 from django.db import connection, models
 from django.templatetags.static import static
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from ldap3 import ALL, NONE, RANDOM, Connection, Server, ServerPool, Tls
 from ldap3.core.exceptions import LDAPException, LDAPInsufficientAccessRightsResult, LDAPSchemaError
@@ -25,10 +27,13 @@ from authentik.core.models import (
 from authentik.crypto.models import CertificateKeyPair
 from authentik.lib.config import CONFIG
 from authentik.lib.models import DomainlessURLValidator
+from authentik.lib.utils.time import timedelta_from_string, timedelta_string_validator
 
 LDAP_TIMEOUT = 15
 LDAP_UNIQUENESS = "ldap_uniq"
 LDAP_DISTINGUISHED_NAME = "distinguishedName"
+LDAP_MODIFY_TIMESTAMP = "modifyTimestamp"
+INCREMENTAL_SYNC_OVERLAP = timedelta(minutes=5)
 
 
 def flatten(value: Any) -> Any:
@@ -149,10 +154,43 @@ class LDAPSource(Source):
         ),
     )
 
+    incremental_sync = models.BooleanField(
+        default=False,
+        help_text=_(
+            "Only synchronize objects which have been modified since the last synchronization, "
+            "based on their modifyTimestamp attribute. A full synchronization is still done "
+            "periodically, and is required to delete objects which are missing from the source."
+        ),
+    )
+    full_sync_interval = models.TextField(
+        default="days=1",
+        validators=[timedelta_string_validator],
+        help_text=_(
+            "Interval between full synchronizations when incremental synchronization is enabled "
+            "(Format: hours=1;minutes=2;seconds=3)."
+        ),
+    )
+    last_synced = models.DateTimeField(null=True, blank=True, default=None)
+    last_full_synced = models.DateTimeField(null=True, blank=True, default=None)
+
     @property
     def component(self) -> str:
         return "ak-source-ldap-form"
 
+    def sync_modified_since(self) -> datetime | None:
+        """Get the time since which modified objects need to be synchronized, or None
+        when all objects need to be synchronized"""
+        if not self.incremental_sync or not self.last_synced or not self.last_full_synced:
+            return None
+        # modifyTimestamp is maintained by each server separately, so it can't be compared
+        # across the servers of a pool
+        if "," in self.server_uri:
+            return None
+        if self.last_full_synced + timedelta_from_string(self.full_sync_interval) <= now():
+            return None
+        # Allow for some clock skew between authentik and the LDAP server
+        return self.last_synced - INCREMENTAL_SYNC_OVERLAP
+
     @property
     def serializer(self) -> type[Serializer]:
         from authentik.sources.ldap.api import LDAPSourceSerializer
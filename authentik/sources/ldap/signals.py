@@ -35,7 +35,8 @@ def sync_ldap_source_on_save(sender, instance: LDAPSource, **_):
         return
     if instance.sync_groups and not instance.group_property_mappings.exists():
         return
-    ldap_sync_single.delay(instance.pk)
+    # Settings or mappings might have changed, which affects objects that haven't been modified
+    ldap_sync_single.delay(instance.pk, full=True)
 
 
 @receiver(password_validate)
@@ -1,6 +1,7 @@
 """Sync LDAP Users and groups into authentik"""
 
 from collections.abc import Generator
+from datetime import UTC
 
 from django.conf import settings
 from ldap3 import DEREF_ALWAYS, SUBTREE, Connection
@@ -9,7 +10,7 @@ from structlog.stdlib import BoundLogger, get_logger
 from authentik.core.sources.mapper import SourceMapper
 from authentik.lib.config import CONFIG
 from authentik.lib.sync.mapper import PropertyMappingManager
-from authentik.sources.ldap.models import LDAPSource, flatten
+from authentik.sources.ldap.models import LDAP_MODIFY_TIMESTAMP, LDAPSource, flatten
 
 
 class BaseLDAPSynchronizer:
@@ -77,6 +78,15 @@ class BaseLDAPSynchronizer:
         """Get objects from LDAP, implemented in subclass"""
         raise NotImplementedError()
 
+    def search_filter(self, search_filter: str) -> str:
+        """Limit `search_filter` to objects modified since the last sync, when
+        incremental synchronization is due"""
+        since = self._source.sync_modified_since()
+        if not since:
+            return search_filter
+        timestamp = since.astimezone(UTC).strftime("%Y%m%d%H%M%SZ")
+        return f"(&{search_filter}({LDAP_MODIFY_TIMESTAMP}>={timestamp}))"
+
     def get_attributes(self, object):
         if "attributes" not in object:
             return
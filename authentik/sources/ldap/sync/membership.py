@@ -36,7 +36,7 @@ class MembershipLDAPSynchronizer(BaseLDAPSynchronizer):
 
         return self.search_paginator(
             search_base=self.base_dn_groups,
-            search_filter=self._source.group_object_filter,
+            search_filter=self.search_filter(self._source.group_object_filter),
             search_scope=SUBTREE,
             attributes=attributes,
             **kwargs,
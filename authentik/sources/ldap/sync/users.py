@@ -1,8 +1,12 @@
 """Sync LDAP Users into authentik"""
 
 from collections.abc import Generator
+from copy import deepcopy
+from typing import Any
 
-from django.core.exceptions import FieldError
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.db.models.signals import post_save
+from django.db.transaction import atomic
 from django.db.utils import IntegrityError
 from ldap3 import ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, SUBTREE
 
@@ -24,6 +28,9 @@ from authentik.sources.ldap.sync.base import BaseLDAPSynchronizer
 from authentik.sources.ldap.sync.vendor.freeipa import FreeIPA
 from authentik.sources.ldap.sync.vendor.ms_ad import MicrosoftActiveDirectory
 
+# Errors which are caused by a single user, and are reported per user
+USER_ERRORS = (IntegrityError, FieldError, TypeError, AttributeError)
+
 
 class UserLDAPSynchronizer(BaseLDAPSynchronizer):
     """Sync LDAP Users into authentik"""
@@ -32,6 +39,7 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
         super().__init__(source)
         self.mapper = SourceMapper(source)
         self.manager = self.mapper.get_manager(User, ["ldap", "dn"])
+        self.vendors = [MicrosoftActiveDirectory(source), FreeIPA(source)]
 
     @staticmethod
     def name() -> str:
@@ -43,7 +51,7 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
             return iter(())
         return self.search_paginator(
             search_base=self.base_dn_users,
-            search_filter=self._source.user_object_filter,
+            search_filter=self.search_filter(self._source.user_object_filter),
             search_scope=SUBTREE,
             attributes=[
                 ALL_ATTRIBUTES,
@@ -58,7 +66,8 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
         if not self._source.sync_users:
             self.message("User syncing is disabled for this Source")
             return -1
-        user_count = 0
+        identifiers = []
+        contexts = []
         for user in page_data:
             if (attributes := self.get_attributes(user)) is None:
                 continue
@@ -70,48 +79,167 @@ class UserLDAPSynchronizer(BaseLDAPSynchronizer):
                     dn=user_dn,
                 )
                 continue
-            try:
-                defaults = {
-                    k: flatten(v)
-                    for k, v in self.mapper.build_object_properties(
-                        object_type=User,
-                        manager=self.manager,
-                        user=None,
-                        request=None,
-                        dn=user_dn,
-                        ldap=attributes,
-                    ).items()
-                }
+            identifiers.append(uniq)
+            contexts.append({"dn": user_dn, "ldap": attributes})
+        entries = []
+        evaluations = self.mapper.build_objects_properties(
+            object_type=User,
+            manager=self.manager,
+            contexts=contexts,
+        )
+        try:
+            for uniq, (context, properties, exc) in zip(identifiers, evaluations, strict=True):
+                user_dn, attributes = context["dn"], context["ldap"]
+                if isinstance(exc, SkipObjectException):
+                    continue
+                if exc:
+                    raise exc
+                defaults = {k: flatten(v) for k, v in properties.items()}
                 self._logger.debug("Writing user with attributes", **defaults)
                 if "username" not in defaults:
-                    raise IntegrityError("Username was not set by propertymappings")
-                ak_user, created = User.update_or_create_attributes(
-                    {f"attributes__{LDAP_UNIQUENESS}": uniq}, defaults
-                )
-                if not UserLDAPSourceConnection.objects.filter(
-                    source=self._source, identifier=uniq
-                ):
-                    UserLDAPSourceConnection.objects.create(
-                        source=self._source, user=ak_user, identifier=uniq
+                    self._report_error(
+                        IntegrityError("Username was not set by propertymappings"), uniq, user_dn
                     )
-            except PropertyMappingExpressionException as exc:
-                raise StopSync(exc, None, exc.mapping) from exc
-            except SkipObjectException:
+                    continue
+                entries.append((uniq, user_dn, attributes, defaults))
+        except PropertyMappingExpressionException as exc:
+            raise StopSync(exc, None, exc.mapping) from exc
+        if not entries:
+            return 0
+        try:
+            synced = self._sync_bulk(entries)
+        except IntegrityError as exc:
+            # Any conflict rolls back the whole page, so sync users individually to
+            # find out which ones are affected
+            self._logger.debug("Failed to sync page in bulk, syncing individually", exc=exc)
+            synced = []
+            for entry in entries:
+                if result := self._sync_single(*entry):
+                    synced.append(result)
+        for ak_user, attributes, created in synced:
+            self._logger.debug("Synced User", user=ak_user.username, created=created)
+            for vendor in self.vendors:
+                vendor.sync(attributes, ak_user, created)
+        return len(synced)
+
+    def _report_error(self, exc: Exception, uniq: str, user_dn: str):
+        """Create an event for a user which could not be synced"""
+        Event.new(
+            EventAction.CONFIGURATION_ERROR,
+            message=(
+                f"Failed to create user: {str(exc)} "
+                "To merge new user with existing user, set the user's "
+                f"Attribute '{LDAP_UNIQUENESS}' to '{uniq}'"
+            ),
+            source=self._source,
+            dn=user_dn,
+        ).save()
+
+    def _sync_single(
+        self, uniq: str, user_dn: str, attributes: dict[str, Any], defaults: dict[str, Any]
+    ) -> tuple[User, dict[str, Any], bool] | None:
+        """Create or update a single user"""
+        try:
+            ak_user, created = User.update_or_create_attributes(
+                {f"attributes__{LDAP_UNIQUENESS}": uniq}, defaults
+            )
+            if not UserLDAPSourceConnection.objects.filter(source=self._source, identifier=uniq):
+                UserLDAPSourceConnection.objects.create(
+                    source=self._source, user=ak_user, identifier=uniq
+                )
+        except USER_ERRORS as exc:
+            self._report_error(exc, uniq, user_dn)
+            return None
+        return ak_user, attributes, created
+
+    def _sync_bulk(
+        self, entries: list[tuple[str, str, dict[str, Any], dict[str, Any]]]
+    ) -> list[tuple[User, dict[str, Any], bool]]:
+        """Create and update all users of a page with a constant number of queries.
+        Raises an IntegrityError when any user conflicts, in which case nothing is written."""
+        existing: dict[str, User] = {}
+        for user in User.objects.filter(
+            **{f"attributes__{LDAP_UNIQUENESS}__in": [entry[0] for entry in entries]}
+        ).order_by("pk"):
+            existing.setdefault(user.attributes.get(LDAP_UNIQUENESS), user)
+        connected = set(
+            UserLDAPSourceConnection.objects.filter(
+                source=self._source, identifier__in=[entry[0] for entry in entries]
+            ).values_list("identifier", flat=True)
+        )
+
+        synced: list[tuple[User, dict[str, Any], bool]] = []
+        identifiers: list[str] = []
+        # Users which are in the same page multiple times are synced individually afterwards
+        deferred = []
+        seen = set()
+        to_create: list[User] = []
+        to_update: list[User] = []
+        update_fields: set[str] = set()
+        for uniq, user_dn, attributes, defaults in entries:
+            if uniq in seen:
+                deferred.append((uniq, user_dn, attributes, defaults))
                 continue
-            except (IntegrityError, FieldError, TypeError, AttributeError) as exc:
-                Event.new(
-                    EventAction.CONFIGURATION_ERROR,
-                    message=(
-                        f"Failed to create user: {str(exc)} "
-                        "To merge new user with existing user, set the user's "
-                        f"Attribute '{LDAP_UNIQUENESS}' to '{uniq}'"
-                    ),
-                    source=self._source,
-                    dn=user_dn,
-                ).save()
-            else:
-                self._logger.debug("Synced User", user=ak_user.username, created=created)
-                user_count += 1
-                MicrosoftActiveDirectory(self._source).sync(attributes, ak_user, created)
-                FreeIPA(self._source).sync(attributes, ak_user, created)
-        return user_count
+            seen.add(uniq)
+            try:
+                if ak_user := existing.get(uniq):
+                    changed = self._merge_user(ak_user, defaults)
+                    if changed:
+                        to_update.append(ak_user)
+                        update_fields.update(changed)
+                    created = False
+                else:
+                    ak_user = User(**defaults)
+                    to_create.append(ak_user)
+                    created = True
+            except USER_ERRORS as exc:
+                self._report_error(exc, uniq, user_dn)
+                continue
+            synced.append((ak_user, attributes, created))
+            identifiers.append(uniq)
+
+        with atomic():
+            User.objects.bulk_create(to_create)
+            if to_update:
+                User.objects.bulk_update(to_update, sorted(update_fields))
+            # Connections use multi-table inheritance, which bulk_create doesn't support.
+            # These are only created once per user.
+            for (ak_user, _, _), uniq in zip(synced, identifiers, strict=True):
+                if uniq in connected:
+                    continue
+                UserLDAPSourceConnection.objects.create(
+                    source=self._source, user=ak_user, identifier=uniq
+                )
+                connected.add(uniq)
+        # Bulk writes don't send signals, which other parts of authentik rely on
+        # (for example outgoing syncs), hence send them for all users that were written
+        for ak_user, created in [(x, True) for x in to_create] + [(x, False) for x in to_update]:
+            post_save.send(
+                User,
+                instance=ak_user,
+                created=created,
+                update_fields=None,
+                raw=False,
+                using=User.objects.db,
+            )
+        for entry in deferred:
+            if result := self._sync_single(*entry):
+                synced.append(result)
+        return synced
+
+    def _merge_user(self, user: User, defaults: dict[str, Any]) -> set[str]:
+        """Apply `defaults` to an existing user, returns the names of all fields that changed"""
+        fields = {}
+        for key in defaults.keys():
+            try:
+                field = User._meta.get_field(key)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                fields[field.attname] = field.name
+        fields[User._meta.get_field("attributes").attname] = "attributes"
+        before = {attname: deepcopy(getattr(user, attname)) for attname in fields}
+        user.merge_attributes(defaults)
+        return {
+            name for attname, name in fields.items() if getattr(user, attname) != before[attname]
+        }
@@ -1,9 +1,12 @@
 """LDAP Sync tasks"""
 
+from datetime import datetime
 from uuid import uuid4
 
+from billiard.exceptions import SoftTimeLimitExceeded
 from celery import chain, group
 from django.core.cache import cache
+from django.utils.timezone import now
 from ldap3.core.exceptions import LDAPException
 from structlog.stdlib import get_logger
 
@@ -31,6 +34,9 @@ SYNC_CLASSES = [
 CACHE_KEY_PREFIX = "goauthentik.io/sources/ldap/page/"
 CACHE_KEY_STATUS = "goauthentik.io/sources/ldap/status/"
 
+SYNC_MODE_CACHE = "cache"
+SYNC_MODE_STREAM = "stream"
+
 
 @CELERY_APP.task()
 def ldap_sync_all():
@@ -59,7 +65,7 @@ def ldap_connectivity_check(pk: str | None = None):
     soft_time_limit=(60 * 60 * CONFIG.get_int("ldap.task_timeout_hours")) * 3.5,
     task_time_limit=(60 * 60 * CONFIG.get_int("ldap.task_timeout_hours")) * 3.5,
 )
-def ldap_sync_single(source_pk: str):
+def ldap_sync_single(source_pk: str, full: bool = False):
     """Sync a single source"""
     source: LDAPSource = LDAPSource.objects.filter(pk=source_pk).first()
     if not source:
@@ -71,6 +77,14 @@ def ldap_sync_single(source_pk: str):
         # Delete all sync tasks from the cache
         DBSystemTask.objects.filter(name="ldap_sync", uid__startswith=source.slug).delete()
 
+        started = now()
+        if full and source.last_synced:
+            # Sync tasks decide whether to do an incremental sync based on the source,
+            # use update() to not trigger another sync from the post_save signal
+            LDAPSource.objects.filter(pk=source.pk).update(last_synced=None)
+            source.last_synced = None
+        incremental = source.sync_modified_since() is not None
+
         # The order of these operations needs to be preserved as each depends on the previous one(s)
         # 1. User and group sync can happen simultaneously
         # 2. Membership sync needs to run afterwards
@@ -79,9 +93,12 @@ def ldap_sync_single(source_pk: str):
             source, GroupLDAPSynchronizer
         )
         membership_sync = ldap_sync_paginator(source, MembershipLDAPSynchronizer)
-        user_group_deletion = ldap_sync_paginator(
-            source, UserLDAPForwardDeletion
-        ) + ldap_sync_paginator(source, GroupLDAPForwardDeletion)
+        # Deletions require all objects from the source, so they only run during full syncs
+        user_group_deletion = []
+        if not incremental:
+            user_group_deletion = ldap_sync_paginator(
+                source, UserLDAPForwardDeletion
+            ) + ldap_sync_paginator(source, GroupLDAPForwardDeletion)
 
         # Celery is buggy with empty groups, so we are careful only to add non-empty groups.
         # See https://github.com/celery/celery/issues/9772
@@ -93,12 +110,40 @@ def ldap_sync_single(source_pk: str):
         if user_group_deletion:
             task_groups.append(group(user_group_deletion))
 
+        task_groups.append(
+            ldap_sync_finish.si(str(source.pk), started.isoformat(), not incremental)
+        )
+
         all_tasks = chain(task_groups)
         all_tasks()
 
 
+@CELERY_APP.task()
+def ldap_sync_finish(source_pk: str, started: str, full: bool):
+    """Remember when the source has last been synced, after all sync tasks have finished.
+    When any sync task failed, the timestamps are kept so the next sync covers the same
+    objects again."""
+    source: LDAPSource = LDAPSource.objects.filter(pk=source_pk).first()
+    if not source:
+        return
+    failed = DBSystemTask.objects.filter(
+        name="ldap_sync", uid__startswith=f"{source.slug}:", status=TaskStatus.ERROR
+    )
+    if failed.exists():
+        LOGGER.info("LDAP sync failed, not updating last sync", source=source.slug)
+        return
+    updates = {"last_synced": datetime.fromisoformat(started)}
+    if full:
+        updates["last_full_synced"] = updates["last_synced"]
+    # Use update() to not trigger another sync from the post_save signal
+    LDAPSource.objects.filter(pk=source_pk).update(**updates)
+
+
 def ldap_sync_paginator(source: LDAPSource, sync: type[BaseLDAPSynchronizer]) -> list:
     """Return a list of task signatures with LDAP pagination data"""
+    if CONFIG.get("ldap.sync_mode", SYNC_MODE_CACHE) == SYNC_MODE_STREAM:
+        # Pages are fetched by the task itself
+        return [ldap_sync.si(str(source.pk), class_to_path(sync))]
     sync_inst: BaseLDAPSynchronizer = sync(source)
     signatures = []
     for page in sync_inst.get_objects():
@@ -115,7 +160,7 @@ def ldap_sync_paginator(source: LDAPSource, sync: type[BaseLDAPSynchronizer]) ->
     soft_time_limit=60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"),
     task_time_limit=60 * 60 * CONFIG.get_int("ldap.task_timeout_hours"),
 )
-def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key: str):
+def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key: str | None = None):
     """Synchronization of an LDAP Source"""
     self.result_timeout_hours = CONFIG.get_int("ldap.task_timeout_hours")
     source: LDAPSource = LDAPSource.objects.filter(pk=source_pk).first()
@@ -124,6 +169,10 @@ def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key:
         # to set the state with
         return
     sync: type[BaseLDAPSynchronizer] = path_to_class(sync_class)
+    if not page_cache_key:
+        self.set_uid(f"{source.slug}:{sync.name()}:{SYNC_MODE_STREAM}")
+        ldap_sync_stream(self, source, sync)
+        return
     uid = page_cache_key.replace(CACHE_KEY_PREFIX, "")
     self.set_uid(f"{source.slug}:{sync.name()}:{uid}")
     try:
@@ -150,3 +199,28 @@ def ldap_sync(self: SystemTask, source_pk: str, sync_class: str, page_cache_key:
         # No explicit event is created here as .set_status with an error will do that
         LOGGER.warning("Failed to sync LDAP", exc=exc, source=source)
         self.set_error(exc)
+
+
+def ldap_sync_stream(task: SystemTask, source: LDAPSource, sync: type[BaseLDAPSynchronizer]):
+    """Fetch pages from LDAP and sync each page as soon as it has been received. Only the
+    current page is held in memory. Paged result cookies are bound to the LDAP connection,
+    so all pages are fetched within this task."""
+    try:
+        sync_inst: BaseLDAPSynchronizer = sync(source)
+        count = 0
+        for page in sync_inst.get_objects():
+            count += max(sync_inst.sync(page), 0)
+        messages = sync_inst.messages
+        messages.append(f"Synced {count} objects.")
+        task.set_status(
+            TaskStatus.SUCCESSFUL,
+            *messages,
+        )
+    except (LDAPException, StopSync) as exc:
+        LOGGER.warning("Failed to sync LDAP", exc=exc, source=source)
+        task.set_error(exc)
+    except SoftTimeLimitExceeded as exc:
+        # All pages are synced within this task, so running out of time is likely with
+        # large directories
+        LOGGER.warning("LDAP sync timed out, try increasing ldap.task_timeout_hours", source=source)
+        task.set_error(exc)
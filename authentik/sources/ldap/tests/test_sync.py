@@ -1,15 +1,19 @@
 """LDAP Source tests"""
 
+from datetime import UTC, datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+from billiard.exceptions import SoftTimeLimitExceeded
 from django.db.models import Q
 from django.test import TestCase
+from django.utils.timezone import now
 
 from authentik.blueprints.tests import apply_blueprint
 from authentik.core.models import Group, User
 from authentik.core.tests.utils import create_test_admin_user
 from authentik.events.models import Event, EventAction, SystemTask
 from authentik.events.system_tasks import TaskStatus
+from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_id, generate_key
 from authentik.lib.sync.outgoing.exceptions import StopSync
 from authentik.lib.utils.reflection import class_to_path
@@ -23,7 +27,12 @@ from authentik.sources.ldap.sync.forward_delete_users import DELETE_CHUNK_SIZE
 from authentik.sources.ldap.sync.groups import GroupLDAPSynchronizer
 from authentik.sources.ldap.sync.membership import MembershipLDAPSynchronizer
 from authentik.sources.ldap.sync.users import UserLDAPSynchronizer
-from authentik.sources.ldap.tasks import ldap_sync, ldap_sync_all
+from authentik.sources.ldap.tasks import (
+    SYNC_MODE_STREAM,
+    ldap_sync,
+    ldap_sync_all,
+    ldap_sync_finish,
+)
 from authentik.sources.ldap.tests.mock_ad import mock_ad_connection
 from authentik.sources.ldap.tests.mock_freeipa import mock_freeipa_connection
 from authentik.sources.ldap.tests.mock_slapd import (
@@ -157,6 +166,48 @@ class LDAPSyncTests(TestCase):
             self.assertTrue(User.objects.filter(username="user0_sn").exists())
             self.assertFalse(User.objects.filter(username="user1_sn").exists())
 
+    def test_sync_users_conflict(self):
+        """Test user sync with a conflicting user, which is reported per user"""
+        User.objects.create(username="user0_sn")
+        self.source.object_uniqueness_field = "uid"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
+            user_sync = UserLDAPSynchronizer(self.source)
+            user_sync.sync_full()
+        self.assertFalse(UserLDAPSourceConnection.objects.filter(identifier="user0_sn").exists())
+        self.assertTrue(UserLDAPSourceConnection.objects.filter(identifier="user-posix").exists())
+        self.assertTrue(
+            Event.objects.filter(
+                action=EventAction.CONFIGURATION_ERROR,
+                context__dn="cn=user0,ou=users,dc=goauthentik,dc=io",
+            ).exists()
+        )
+
+    def test_sync_users_unchanged(self):
+        """Test that users which haven't changed aren't written again"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
+            UserLDAPSynchronizer(self.source).sync_full()
+            user = User.objects.get(username="user0_sn")
+            with patch.object(User, "save", autospec=True) as save:
+                UserLDAPSynchronizer(self.source).sync_full()
+            self.assertNotIn(user.pk, [call.args[0].pk for call in save.call_args_list])
+        user.refresh_from_db()
+        self.assertEqual(user.attributes["ldap_uniq"], "user0_sn")
+
     def test_sync_users_freeipa_ish(self):
         """Test user sync (FreeIPA-ish), mainly testing vendor quirks"""
         self.source.object_uniqueness_field = "uid"
@@ -365,6 +416,99 @@ class LDAPSyncTests(TestCase):
         with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
             ldap_sync_all.delay().get()
 
+    def test_tasks_openldap_stream(self):
+        """Test Scheduled tasks, with pages streamed from LDAP"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.group_object_filter = "(objectClass=groupOfNames)"
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        self.source.save()
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with (
+            patch("authentik.sources.ldap.models.LDAPSource.connection", connection),
+            CONFIG.patch("ldap.sync_mode", SYNC_MODE_STREAM),
+        ):
+            ldap_sync_all.delay().get()
+        self.assertTrue(User.objects.filter(username="user0_sn").exists())
+        task = SystemTask.objects.filter(name="ldap_sync", uid="ldap:users:stream").first()
+        self.assertEqual(task.status, TaskStatus.SUCCESSFUL)
+
+    def test_tasks_stream_timeout(self):
+        """Test streamed sync running into the soft time limit"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.save()
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with (
+            patch("authentik.sources.ldap.models.LDAPSource.connection", connection),
+            patch(
+                "authentik.sources.ldap.sync.users.UserLDAPSynchronizer.sync",
+                MagicMock(side_effect=SoftTimeLimitExceeded()),
+            ),
+        ):
+            ldap_sync.delay(str(self.source.pk), class_to_path(UserLDAPSynchronizer)).get()
+        task = SystemTask.objects.filter(name="ldap_sync", uid="ldap:users:stream").first()
+        self.assertEqual(task.status, TaskStatus.ERROR)
+
+    def test_incremental_filter(self):
+        """Test search filter for incremental syncs"""
+        self.source.incremental_sync = True
+        self.source.full_sync_interval = "days=1"
+        self.source.last_synced = datetime(2025, 1, 2, 3, 14, 5, tzinfo=UTC)
+        self.source.last_full_synced = now()
+        user_sync = UserLDAPSynchronizer(self.source)
+        self.assertEqual(
+            user_sync.search_filter("(objectClass=person)"),
+            "(&(objectClass=person)(modifyTimestamp>=20250102030905Z))",
+        )
+        # Full sync is due
+        self.source.last_full_synced = now() - timedelta(days=2)
+        self.assertEqual(user_sync.search_filter("(objectClass=person)"), "(objectClass=person)")
+        # Timestamps can't be compared across the servers of a pool
+        self.source.last_full_synced = now()
+        self.source.server_uri = "ldap://a.goauthentik.io,ldap://b.goauthentik.io"
+        self.assertEqual(user_sync.search_filter("(objectClass=person)"), "(objectClass=person)")
+
+    def test_incremental_tasks(self):
+        """Test that sync timestamps are recorded"""
+        self.source.object_uniqueness_field = "uid"
+        self.source.group_object_filter = "(objectClass=groupOfNames)"
+        self.source.incremental_sync = True
+        self.source.user_property_mappings.set(
+            LDAPSourcePropertyMapping.objects.filter(
+                Q(managed__startswith="goauthentik.io/sources/ldap/default")
+                | Q(managed__startswith="goauthentik.io/sources/ldap/openldap")
+            )
+        )
+        self.source.save()
+        connection = MagicMock(return_value=mock_slapd_connection(LDAP_PASSWORD))
+        with patch("authentik.sources.ldap.models.LDAPSource.connection", connection):
+            ldap_sync_all.delay().get()
+        self.source.refresh_from_db()
+        self.assertIsNotNone(self.source.last_synced)
+        self.assertEqual(self.source.last_synced, self.source.last_full_synced)
+        self.assertIsNotNone(self.source.sync_modified_since())
+
+    def test_incremental_tasks_failed(self):
+        """Test that sync timestamps are kept when a sync task failed"""
+        self.source.incremental_sync = True
+        self.source.save()
+        SystemTask.objects.create(
+            name="ldap_sync",
+            uid=f"{self.source.slug}:users:{generate_id()}",
+            status=TaskStatus.ERROR,
+            messages=[],
+            task_call_module=ldap_sync.__module__,
+            task_call_func=ldap_sync.__name__,
+        )
+        ldap_sync_finish(str(self.source.pk), now().isoformat(), True)
+        self.source.refresh_from_db()
+        self.assertIsNone(self.source.last_synced)
+        self.assertIsNone(self.source.last_full_synced)
+
     def test_user_deletion(self):
         """Test user deletion"""
         user = User.objects.create_user(username="not-in-the-source")